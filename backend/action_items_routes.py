@@ -1,36 +1,63 @@
-from datetime import date
-from flask import Blueprint, request, jsonify, session
-from models import db, ActionItem, Meeting
+from datetime import date, datetime
+from flask import Blueprint, request, jsonify
+from sqlalchemy import delete, update
+from models import db, bump_versions, ActionItem, Meeting
+from auth import require_auth
+from query_budget import query_budget
+from utils import description_hash
 
 bp_items = Blueprint("action_items", __name__, url_prefix="")
 
 
-def _require_auth():
-    uid = session.get("user_id")
-    if not uid:
-        return None, (jsonify({"error": "unauthorized"}), 401)
-    return uid, None
+def _meeting_owner(mid: int):
+    """creator_id of a meeting (None if it doesn't exist) without loading the row."""
+    return db.session.query(Meeting.creator_id).filter_by(id=mid).scalar()
+
+
+def _item_for_user(item_id: int, uid: int):
+    """
+    Load an action item and its meeting's owner in one joined query.
+    Returns (item, error_response).
+    """
+    row = (
+        db.session.query(ActionItem, Meeting.creator_id)
+        .join(Meeting, Meeting.id == ActionItem.meeting_id)
+        .filter(ActionItem.id == item_id)
+        .first()
+    )
+    if row is None:
+        return None, (jsonify({"error": "not found"}), 404)
+    item, creator_id = row
+    if creator_id != uid:
+        return None, (jsonify({"error": "forbidden"}), 403)
+    return item, None
 
 
 @bp_items.get("/meetings/<int:mid>/action-items")
+@query_budget(2)
 def list_items(mid):
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
-    meeting = Meeting.query.get_or_404(mid)
-    if meeting.creator_id != uid:
+    owner = _meeting_owner(mid)
+    if owner is None:
+        return jsonify({"error": "not found"}), 404
+    if owner != uid:
         return jsonify({"error": "forbidden"}), 403
-    items = [a.to_dict() for a in meeting.action_items]
+    items = [a.to_dict() for a in ActionItem.query.filter_by(meeting_id=mid)]
     return jsonify(items), 200
 
 
 @bp_items.post("/meetings/<int:mid>/action-items")
+@query_budget(4)
 def create_item(mid):
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
-    meeting = Meeting.query.get_or_404(mid)
-    if meeting.creator_id != uid:
+    owner = _meeting_owner(mid)
+    if owner is None:
+        return jsonify({"error": "not found"}), 404
+    if owner != uid:
         return jsonify({"error": "forbidden"}), 403
     data = request.get_json() or {}
     item = ActionItem(
@@ -51,14 +78,14 @@ def create_item(mid):
 
 
 @bp_items.patch("/action-items/<int:item_id>")
+@query_budget(4)
 def update_item(item_id):
-    uid, err = _require_auth()
+    uid, err = require_auth()
+    if err:
+        return err
+    item, err = _item_for_user(item_id, uid)
     if err:
         return err
-    item = ActionItem.query.get_or_404(item_id)
-    meeting = Meeting.query.get(item.meeting_id)
-    if meeting.creator_id != uid:
-        return jsonify({"error": "forbidden"}), 403
     data = request.get_json() or {}
     if "description" in data:
         item.description = data["description"].strip()
@@ -76,14 +103,182 @@ def update_item(item_id):
 
 
 @bp_items.delete("/action-items/<int:item_id>")
+@query_budget(3)
 def delete_item(item_id):
-    uid, err = _require_auth()
+    uid, err = require_auth()
+    if err:
+        return err
+    item, err = _item_for_user(item_id, uid)
     if err:
         return err
-    item = ActionItem.query.get_or_404(item_id)
-    meeting = Meeting.query.get(item.meeting_id)
-    if meeting.creator_id != uid:
-        return jsonify({"error": "forbidden"}), 403
     db.session.delete(item)
     db.session.commit()
     return "", 204
+
+
+# ---- Batch endpoints (one transaction per request) ----
+
+PRIORITIES = ("low", "medium", "high")
+STATUSES = ("open", "blocked", "done")
+EDITABLE = ("description", "priority", "status", "assignee_id", "due_date")
+MAX_BATCH = 500
+
+
+def _batch_payload():
+    """Accept either a bare JSON array or {"items": [...]}."""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list) or not data:
+        return None, (jsonify({"error": "expected a non-empty array of items"}), 400)
+    if len(data) > MAX_BATCH:
+        return None, (jsonify({"error": f"at most {MAX_BATCH} items per batch"}), 400)
+    return data, None
+
+
+def _clean_fields(data: dict, creating: bool):
+    """
+    Validate/normalize the editable fields of one batch entry.
+    Returns (values, error_message).
+    """
+    if not isinstance(data, dict):
+        return None, "item must be an object"
+    values = {}
+    if "description" in data or creating:
+        desc = (data.get("description") or "").strip()
+        if not desc:
+            return None, "description required"
+        if len(desc) > 500:
+            return None, "description too long (max 500)"
+        values["description"] = desc
+        # bulk UPDATE bypasses the model's @validates hook
+        values["description_hash"] = description_hash(desc)
+    if "priority" in data or creating:
+        values["priority"] = data.get("priority") or "medium"
+        if values["priority"] not in PRIORITIES:
+            return None, f"priority must be one of {', '.join(PRIORITIES)}"
+    if "status" in data or creating:
+        values["status"] = data.get("status") or "open"
+        if values["status"] not in STATUSES:
+            return None, f"status must be one of {', '.join(STATUSES)}"
+    if "assignee_id" in data or creating:
+        values["assignee_id"] = data.get("assignee_id") or None
+    if "due_date" in data or creating:
+        try:
+            values["due_date"] = (date.fromisoformat(data["due_date"])
+                                  if data.get("due_date") else None)
+        except (TypeError, ValueError):
+            return None, "due_date must be YYYY-MM-DD"
+    return values, None
+
+
+@bp_items.post("/meetings/<int:mid>/action-items:batch")
+@query_budget(3)
+def create_items_batch(mid):
+    """
+    Create many action items at once. All entries are validated first;
+    if any is invalid nothing is written and the per-item errors come back.
+    """
+    uid, err = require_auth()
+    if err:
+        return err
+    owner = _meeting_owner(mid)
+    if owner is None:
+        return jsonify({"error": "not found"}), 404
+    if owner != uid:
+        return jsonify({"error": "forbidden"}), 403
+    data, err = _batch_payload()
+    if err:
+        return err
+
+    rows, errors = [], []
+    for i, entry in enumerate(data):
+        values, msg = _clean_fields(entry, creating=True)
+        if msg:
+            errors.append({"index": i, "status": 400, "error": msg})
+        else:
+            rows.append({"meeting_id": mid, **values})
+    if errors:
+        return jsonify({"error": "validation failed", "results": errors}), 400
+
+    items = ActionItem.bulk_insert(rows)
+    # serialize before commit expires the RETURNING-populated objects
+    results = [{"index": i, "status": 201, "item": item.to_dict()}
+               for i, item in enumerate(items)]
+    db.session.commit()
+    return jsonify({"results": results}), 201
+
+
+@bp_items.patch("/action-items:batch")
+# owners + one UPDATE executemany per distinct field set + DELETE + reload
+@query_budget(10)
+def update_items_batch():
+    """
+    Update or delete many action items at once.
+    Each entry: {"id": 1, ...fields} or {"id": 1, "delete": true}.
+    Ownership and fields are checked for every entry before anything is written.
+    """
+    uid, err = require_auth()
+    if err:
+        return err
+    data, err = _batch_payload()
+    if err:
+        return err
+
+    ids = [e.get("id") for e in data if isinstance(e, dict)]
+    owners, meetings = {}, {}
+    for item_id, creator_id, meeting_id in (
+        db.session.query(ActionItem.id, Meeting.creator_id, ActionItem.meeting_id)
+        .join(Meeting, Meeting.id == ActionItem.meeting_id)
+        .filter(ActionItem.id.in_([i for i in ids if isinstance(i, int)]))
+    ):
+        owners[item_id], meetings[item_id] = creator_id, meeting_id
+
+    updates, deletes, errors, seen = [], [], [], set()
+    now = datetime.utcnow()
+    for i, entry in enumerate(data):
+        item_id = entry.get("id") if isinstance(entry, dict) else None
+        if not isinstance(item_id, int):
+            errors.append({"index": i, "status": 400, "error": "id required"})
+            continue
+        if item_id in seen:
+            errors.append({"index": i, "status": 400, "error": "duplicate id"})
+            continue
+        seen.add(item_id)
+        if item_id not in owners:
+            errors.append({"index": i, "status": 404, "error": "not found"})
+            continue
+        if owners[item_id] != uid:
+            errors.append({"index": i, "status": 403, "error": "forbidden"})
+            continue
+        if entry.get("delete"):
+            deletes.append(item_id)
+            continue
+        values, msg = _clean_fields(
+            {k: v for k, v in entry.items() if k in EDITABLE}, creating=False)
+        if msg:
+            errors.append({"index": i, "status": 400, "error": msg})
+        elif values:
+            updates.append({"id": item_id, "updated_at": now, **values})
+    if errors:
+        return jsonify({"error": "validation failed", "results": errors}), 400
+
+    if updates:
+        # ORM bulk UPDATE by primary key (executemany, grouped by key set)
+        db.session.execute(update(ActionItem), updates)
+    if deletes:
+        db.session.execute(delete(ActionItem).where(ActionItem.id.in_(deletes)))
+    bump_versions(meeting_ids={meetings[i] for i in seen})
+    db.session.commit()
+
+    deleted = set(deletes)
+    fresh = {a.id: a for a in ActionItem.query.filter(
+        ActionItem.id.in_([i for i in seen if i not in deleted]))}
+    results = []
+    for i, entry in enumerate(data):
+        if entry["id"] in deleted:
+            results.append({"index": i, "status": 204, "id": entry["id"]})
+        else:
+            results.append({"index": i, "status": 200,
+                            "item": fresh[entry["id"]].to_dict()})
+    return jsonify({"results": results}), 200
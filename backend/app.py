@@ -2,7 +2,17 @@ from action_items_routes import bp_items
 from meetings_routes import bp_meetings
 from auth_routes import bp_auth
 from google_routes import bp_google
+from usage_routes import bp_usage
+from metrics_routes import bp_metrics
 from models import db
+import auth
+import jobs
+import passwords
+import query_budget
+from query_plans import check_query_plans_command
+from backfill import resummarize_command, summarize_stub_command
+from rotate_keys import rotate_tokens_command
+from calendar_import import import_calendar_command
 from config import Settings
 from flask_migrate import Migrate
 from flask_cors import CORS
@@ -19,11 +29,24 @@ def create_app():
     db.init_app(app)
     Migrate(app, db)
 
+    # Resolve the caller (session cookie or signed token) once per request
+    auth.init_app(app)
+
+    # bcrypt pool (forkserver/spawn workers), created before any request thread
+    passwords.init_pool()
+
+    # Background summarize jobs (re-queued from the DB on first request)
+    jobs.init_app(app)
+
+    # Per-request SQL statement counting (QUERY_BUDGET_MODE=warn|raise)
+    query_budget.init_app(app)
+
     # CORS for React dev server (cookies enabled)
     CORS(
         app,
         resources={r"/*": {"origins": Settings.FRONTEND_ORIGIN}},
         supports_credentials=True,
+        expose_headers=["ETag", "X-Next-Cursor", "Retry-After", "X-Calendar-Synced-At"],
     )
 
     # Blueprints
@@ -31,6 +54,15 @@ def create_app():
     app.register_blueprint(bp_meetings)
     app.register_blueprint(bp_items)
     app.register_blueprint(bp_google)
+    app.register_blueprint(bp_usage)
+    app.register_blueprint(bp_metrics)
+
+    # CLI
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(summarize_stub_command)
+    app.cli.add_command(resummarize_command)
+    app.cli.add_command(rotate_tokens_command)
+    app.cli.add_command(import_calendar_command)
 
     @app.get("/")
     def health():
@@ -0,0 +1,146 @@
+"""
+Request identity, shared by every blueprint.
+
+A before_request hook resolves the caller once per request into g.user_id,
+from (in order):
+  - `Authorization: Bearer <token>` when AUTH_TOKENS=1: a compact token
+    signed with the app's SECRET_KEY (itsdangerous), valid for
+    AUTH_TOKEN_MAX_AGE seconds. Any worker holding the key can verify it
+    without a database or shared session store.
+  - the Flask session cookie set by /auth/login and /auth/signup.
+Neither path touches the database. Routes call require_auth() for the id
+and current_user() when they need the user's fields; the latter is served
+from a per-process TTL cache (USER_CACHE_TTL seconds, USER_CACHE_SIZE
+entries) that is dropped whenever a User row is flushed. Other workers see
+a change after at most the TTL.
+
+Tokens can't be revoked before they expire; logout only clears the cookie.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, jsonify, request, session
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, User
+
+TOKEN_SALT = "auth-token"
+
+
+# ---- signed tokens ----
+
+
+def tokens_enabled() -> bool:
+    return os.getenv("AUTH_TOKENS", "0") == "1"
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt=TOKEN_SALT)
+
+
+def issue_token(user_id: int) -> str:
+    return _serializer().dumps(user_id)
+
+
+def _token_user_id(token: str):
+    max_age = int(os.getenv("AUTH_TOKEN_MAX_AGE", str(7 * 24 * 3600)))
+    try:
+        uid = _serializer().loads(token, max_age=max_age)
+    except BadSignature:   # also covers SignatureExpired
+        return None
+    return uid if isinstance(uid, int) else None
+
+
+# ---- per-request identity ----
+
+
+def _load_identity():
+    g.user_id = None
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if tokens_enabled() and scheme.lower() == "bearer" and token:
+        # not ours (e.g. METRICS_TOKEN) -> fall through to the cookie
+        g.user_id = _token_user_id(token.strip())
+    if g.user_id is None:
+        g.user_id = session.get("user_id")
+
+
+def current_user_id():
+    return g.get("user_id")
+
+
+def require_auth():
+    """(user_id, None) for an authenticated request, else (None, 401 response)."""
+    uid = current_user_id()
+    if not uid:
+        return None, (jsonify({"error": "unauthorized"}), 401)
+    return uid, None
+
+
+def login_user(user: User):
+    """Start a cookie session for `user` and prime the cache with it."""
+    session["user_id"] = user.id
+    g.user_id = user.id
+    _cache_put(user.id, user.to_dict())
+
+
+# ---- user cache ----
+
+_lock = threading.Lock()
+_users = OrderedDict()   # user_id -> (expires_at, User.to_dict())
+stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _cache_put(user_id: int, data: dict):
+    ttl = float(os.getenv("USER_CACHE_TTL", "60"))
+    if ttl <= 0:
+        return
+    size = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    with _lock:
+        _users[user_id] = (time.monotonic() + ttl, data)
+        _users.move_to_end(user_id)
+        while len(_users) > size:
+            _users.popitem(last=False)
+
+
+def invalidate_user(user_id: int):
+    with _lock:
+        if _users.pop(user_id, None) is not None:
+            stats["invalidations"] += 1
+
+
+def current_user():
+    """to_dict() of the authenticated user (cached), or None."""
+    uid = current_user_id()
+    if not uid:
+        return None
+    with _lock:
+        hit = _users.get(uid)
+        if hit and hit[0] > time.monotonic():
+            _users.move_to_end(uid)
+            stats["hits"] += 1
+            return hit[1]
+        stats["misses"] += 1
+    user = db.session.get(User, uid)
+    if user is None:
+        return None
+    data = user.to_dict()
+    _cache_put(uid, data)
+    return data
+
+
+def cache_stats() -> dict:
+    with _lock:
+        return {**stats, "entries": len(_users)}
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session, flush_context):
+    for obj in [*session.dirty, *session.deleted]:
+        if isinstance(obj, User):
+            invalidate_user(obj.id)
+
+
+def init_app(app):
+    app.before_request(_load_identity)
@@ -1,23 +1,28 @@
-import os
-import bcrypt
 from flask import Blueprint, request, session, jsonify
 from models import db, User
+from auth import current_user, issue_token, login_user, require_auth, tokens_enabled
+from passwords import HashingBusy, check_password, hash_password, needs_rehash
+from query_budget import query_budget
 
 bp_auth = Blueprint("auth", __name__, url_prefix="/auth")
 
 
-def _hash_password(pw: str) -> bytes:
-    return bcrypt.hashpw(pw.encode("utf-8"), bcrypt.gensalt(rounds=12))
+def _logged_in(user: User, status: int):
+    login_user(user)
+    data = user.to_dict()
+    if tokens_enabled():
+        # for API clients / other workers: send as `Authorization: Bearer <token>`
+        data["token"] = issue_token(user.id)
+    return jsonify(data), status
 
 
-def _check_password(pw: str, hashed: bytes) -> bool:
-    try:
-        return bcrypt.checkpw(pw.encode("utf-8"), hashed)
-    except Exception:
-        return False
+def _busy(e: HashingBusy):
+    return (jsonify({"error": "server busy, try again shortly"}), 503,
+            {"Retry-After": str(e.retry_after)})
 
 
 @bp_auth.post("/signup")
+@query_budget(3)
 def signup():
     data = request.get_json() or {}
     email = (data.get("email") or "").strip().lower()
@@ -27,35 +32,53 @@ def signup():
         return jsonify({"error": "email, name, and password are required"}), 400
     if User.query.filter_by(email=email).first():
         return jsonify({"error": "email already in use"}), 409
-    user = User(email=email, name=name, password_hash=_hash_password(password))
+    try:
+        pw_hash = hash_password(password)
+    except HashingBusy as e:
+        return _busy(e)
+    user = User(email=email, name=name, password_hash=pw_hash)
     db.session.add(user)
     db.session.commit()
-    session["user_id"] = user.id
-    return jsonify(user.to_dict()), 201
+    return _logged_in(user, 201)
 
 
 @bp_auth.post("/login")
+@query_budget(3)
 def login():
     data = request.get_json() or {}
     email = (data.get("email") or "").strip().lower()
     password = data.get("password") or ""
     user = User.query.filter_by(email=email).first()
-    if not user or not _check_password(password, user.password_hash):
-        return jsonify({"error": "invalid credentials"}), 401
-    session["user_id"] = user.id
-    return jsonify(user.to_dict()), 200
+    try:
+        if not user or not check_password(password, user.password_hash):
+            return jsonify({"error": "invalid credentials"}), 401
+    except HashingBusy as e:
+        return _busy(e)
+    if needs_rehash(user.password_hash):
+        # BCRYPT_ROUNDS changed since this hash was made; upgrade it while we
+        # have the plaintext (or on a later login if the pool is busy)
+        try:
+            user.password_hash = hash_password(password)
+            db.session.commit()
+        except HashingBusy:
+            pass
+    return _logged_in(user, 200)
 
 
 @bp_auth.delete("/logout")
+@query_budget(0)
 def logout():
     session.clear()
     return "", 204
 
 
 @bp_auth.get("/me")
+@query_budget(1)
 def me():
-    uid = session.get("user_id")
-    if not uid:
+    _, err = require_auth()
+    if err:
+        return err
+    user = current_user()   # in-process cache; a DB read only on a miss
+    if user is None:
         return jsonify({"error": "unauthorized"}), 401
-    user = User.query.get(uid)
-    return jsonify(user.to_dict()), 200
+    return jsonify(user), 200
@@ -0,0 +1,218 @@
+"""
+Bulk summary back-fills.
+
+    flask summarize-stub [--all] [--batch-size 1000] [--workers N]
+
+Runs the rules-stub summarizer over archived meetings on every core
+(summarizer.summarize_many) and writes Summary rows with one INSERT per
+batch. By default only meetings without any summary are processed.
+
+    flask resummarize [--concurrency 4] [--rate 2] [--batch-size 100] [--restart]
+
+Regenerates summaries with the configured provider after PROMPT_VERSION
+changes. Meetings whose latest summary already has the current content hash
+are skipped. Progress is checkpointed per batch in `backfill_checkpoint`
+(named resummarize:<PROMPT_VERSION> by default), so re-running an
+interrupted command resumes after the last committed meeting.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import exists
+from models import db, BackfillCheckpoint, Meeting, Summary
+from summaries import meeting_content_hash, save_summaries_bulk
+from summarizer import get_provider, summarize_many, summarize_notes
+
+
+def _iter_meetings(batch_size: int, missing_only: bool):
+    """(id, title, raw_notes) rows in id order, fetched a page at a time."""
+    last_id = 0
+    while True:
+        q = (
+            db.session.query(Meeting.id, Meeting.title, Meeting.raw_notes)
+            .filter(Meeting.id > last_id,
+                    Meeting.title.isnot(None), Meeting.raw_notes.isnot(None))
+        )
+        if missing_only:
+            q = q.filter(~exists().where(Summary.meeting_id == Meeting.id))
+        rows = q.order_by(Meeting.id).limit(batch_size).all()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].id
+
+
+@click.command("summarize-stub")
+@click.option("--all", "all_meetings", is_flag=True,
+              help="Also re-summarize meetings that already have a summary.")
+@click.option("--batch-size", default=1000, show_default=True,
+              help="Meetings per read page and per INSERT.")
+@click.option("--workers", type=int, default=None,
+              help="Worker processes (default: SUMMARY_BATCH_WORKERS or CPU count).")
+@with_appcontext
+def summarize_stub_command(all_meetings, batch_size, workers):
+    """Summarize meetings in bulk with the rules stub."""
+    # Titles/notes are needed again for the content hash; keep them per page.
+    titles = {}
+
+    def source():
+        for row in _iter_meetings(batch_size, not all_meetings):
+            titles[row.id] = (row.title, row.raw_notes)
+            yield row
+
+    start = time.monotonic()
+    done, pending = 0, []
+    for mid, result, meta in summarize_many(source(), workers=workers):
+        title, notes = titles.pop(mid)
+        pending.append((mid, result, meta, meeting_content_hash(title, notes)))
+        if len(pending) >= batch_size:
+            done += save_summaries_bulk(pending)
+            db.session.commit()
+            pending = []
+            click.echo(f"{done} meetings, {done / (time.monotonic() - start):.0f}/s")
+    done += save_summaries_bulk(pending)
+    db.session.commit()
+
+    elapsed = time.monotonic() - start
+    click.echo(f"summarized {done} meetings in {elapsed:.1f}s "
+               f"({done / elapsed if elapsed else 0:.0f}/s)")
+
+
+# ---- resummarize ----
+
+
+class _RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads (rate <= 0: unlimited)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+def _meetings_after(last_id: int):
+    return db.session.query(Meeting.id, Meeting.title, Meeting.raw_notes).filter(
+        Meeting.id > last_id, Meeting.title.isnot(None), Meeting.raw_notes.isnot(None))
+
+
+def _latest_hashes(ids) -> dict:
+    """meeting_id -> content_hash of its latest summary, one query per page."""
+    rows = (
+        db.session.query(Summary.meeting_id, Summary.content_hash)
+        .filter(Summary.meeting_id.in_(ids))
+        .order_by(Summary.meeting_id, Summary.created_at, Summary.id)
+    )
+    return dict(rows.all())   # later (newer) rows overwrite earlier ones
+
+
+def _summarize_in_context(app, limiter, title, notes):
+    limiter.wait()
+    with app.app_context():   # summary cache DB tier needs one
+        return summarize_notes(title, notes)
+
+
+def _checkpoint(name: str, restart: bool) -> BackfillCheckpoint:
+    cp = BackfillCheckpoint.query.filter_by(name=name).first()
+    if cp is None:
+        cp = BackfillCheckpoint(name=name)
+        db.session.add(cp)
+    if cp.id is None or restart:
+        cp.last_meeting_id = cp.processed = cp.skipped = cp.failed = cp.total_tokens = 0
+        cp.started_at = datetime.utcnow()
+        cp.finished_at = None
+    db.session.commit()
+    return cp
+
+
+@click.command("resummarize")
+@click.option("--batch-size", default=100, show_default=True,
+              help="Meetings per page; one commit + checkpoint per page.")
+@click.option("--concurrency", default=4, show_default=True,
+              help="Summarize calls in flight.")
+@click.option("--rate", default=0.0, show_default=True,
+              help="Max summarize calls per second (0 = unlimited).")
+@click.option("--name", default=None,
+              help="Checkpoint name (default: resummarize:<PROMPT_VERSION>).")
+@click.option("--restart", is_flag=True, help="Ignore the checkpoint and start over.")
+@with_appcontext
+def resummarize_command(batch_size, concurrency, rate, name, restart):
+    """Re-summarize every meeting whose summary is stale for the current prompt."""
+    name = name or f"resummarize:{os.getenv('PROMPT_VERSION', 'v1')}"
+    cp = _checkpoint(name, restart)
+    if cp.finished_at is not None:
+        click.echo(f"{name} finished at {cp.finished_at:%Y-%m-%d %H:%M}; use --restart to run again")
+        return
+
+    total = _meetings_after(cp.last_meeting_id).count()
+    click.echo(f"{name}: {total} meetings after id {cp.last_meeting_id}")
+    app = current_app._get_current_object()
+    limiter = _RateLimiter(rate)
+    provider = get_provider().name
+    start, seen, tokens = time.monotonic(), 0, 0
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency),
+                            thread_name_prefix="resummarize") as pool:
+        while True:
+            rows = (_meetings_after(cp.last_meeting_id)
+                    .order_by(Meeting.id).limit(batch_size).all())
+            if not rows:
+                break
+            latest = _latest_hashes([r.id for r in rows])
+            todo = []
+            for r in rows:
+                h = meeting_content_hash(r.title, r.raw_notes)
+                if latest.get(r.id) == h:
+                    cp.skipped += 1
+                else:
+                    todo.append((r, h, pool.submit(
+                        _summarize_in_context, app, limiter, r.title, r.raw_notes)))
+
+            out, notes = [], {}
+            for r, h, fut in todo:
+                try:
+                    result, meta = fut.result()
+                except Exception as e:
+                    print("[RESUMMARIZE ERROR]", r.id, repr(e))
+                    cp.failed += 1
+                    continue
+                if meta.get("provider") != provider:
+                    # summarize_notes fell back to the stub; leave it stale for a re-run
+                    cp.failed += 1
+                    continue
+                out.append((r.id, result, meta, h))
+                notes[r.id] = r.raw_notes
+                tokens += (meta.get("usage") or {}).get("total_tokens") or 0
+
+            cp.processed += save_summaries_bulk(out, notes)
+            cp.total_tokens += tokens
+            cp.last_meeting_id = rows[-1].id
+            db.session.commit()
+
+            seen += len(rows)
+            tokens = 0
+            elapsed = time.monotonic() - start
+            per_sec = seen / elapsed if elapsed else 0
+            eta = timedelta(seconds=int((total - seen) / per_sec)) if per_sec else "?"
+            click.echo(f"{seen}/{total}  {per_sec:.1f} meetings/s  "
+                       f"summarized={cp.processed} skipped={cp.skipped} "
+                       f"failed={cp.failed} tokens={cp.total_tokens}  eta {eta}")
+
+    cp.finished_at = datetime.utcnow()
+    db.session.commit()
+    click.echo(f"{name} done: summarized={cp.processed} skipped={cp.skipped} "
+               f"failed={cp.failed} tokens={cp.total_tokens}")
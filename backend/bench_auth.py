@@ -0,0 +1,112 @@
+"""
+Login throughput with bcrypt inline vs in the hashing pool.
+
+    python bench_auth.py [-n 200] [-c 16] [--workers N] [--rounds 12]
+
+Runs POST /auth/login from -c client threads against a throwaway SQLite
+database, first with PASSWORD_HASH_WORKERS=0 (bcrypt in the request
+thread, the old behaviour) and then with the pool. A background thread
+polls GET /auth/me meanwhile, to show what the login storm does to other
+requests. Clients retry 503s after 50 ms. Reports logins/s, logins/s per
+core used, latencies and how many 503s were retried.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_db = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db.name}"
+os.environ["QUERY_BUDGET_MODE"] = "off"
+
+from app import app  # noqa: E402  (after DATABASE_URL)
+from models import db  # noqa: E402
+import passwords  # noqa: E402
+
+CREDS = {"email": "bench@example.com", "name": "Bench", "password": "correct horse"}
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+
+
+def run(label: str, n: int, concurrency: int, cores: int):
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "c"):
+            local.c = app.test_client()
+        return local.c
+
+    def login(_):
+        # a well-behaved client: back off and retry on 503
+        start, busy = time.perf_counter(), 0
+        while True:
+            status = client().post("/auth/login", json=CREDS).status_code
+            if status != 503:
+                return status, time.perf_counter() - start, busy
+            busy += 1
+            time.sleep(0.05)
+
+    me_latency, stop = [], threading.Event()
+
+    def poll_me():
+        c = app.test_client()
+        c.post("/auth/login", json=CREDS)
+        while not stop.is_set():
+            start = time.perf_counter()
+            c.get("/auth/me")
+            me_latency.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    poller = threading.Thread(target=poll_me, daemon=True)
+    poller.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(login, range(n)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    poller.join()
+
+    ok = [t for s, t, _ in results if s == 200]
+    busy = sum(b for _, _, b in results)
+    print(f"{label}: {len(ok)} logins in {elapsed:.2f}s  {len(ok) / elapsed:.1f}/s  "
+          f"({len(ok) / elapsed / cores:.1f}/s per core over {cores})  503s retried={busy}")
+    if ok:
+        print(f"    login ms  p50={_pct(ok, 0.5):.0f}  p95={_pct(ok, 0.95):.0f}  "
+              f"mean={statistics.mean(ok) * 1000:.0f}")
+    print(f"    /auth/me ms during storm  p50={_pct(me_latency, 0.5):.1f}  "
+          f"p95={_pct(me_latency, 0.95):.1f}  (n={len(me_latency)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", type=int, default=200, help="logins per run")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="hashing pool size for the second run")
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+    cpus = os.cpu_count() or 1
+
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+    with app.app_context():
+        db.create_all()
+    app.test_client().post("/auth/signup", json=CREDS)
+
+    try:
+        run("inline", args.n, args.concurrency, cpus)
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+        run(f"pool({args.workers})", args.n, args.concurrency, min(args.workers, cpus))
+        print("pool:", passwords.pool_stats())
+    finally:
+        os.unlink(_db.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Offline load test of the summarize pipeline against fake_openai.py.
+
+    python bench_pipeline.py -n 200 -c 16 --latency 0.2 --error-rate 0.1 --repeat 0.3
+
+Runs summarize_notes from a thread pool (no app context, so only the
+in-memory summary cache is used) and reports throughput, latency
+percentiles, stub fallbacks, cache hits and what the fake server saw.
+--repeat is the fraction of requests that reuse earlier notes (cache hits).
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fake_openai import serve_in_thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", type=int, default=200, help="summaries to request")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--lines", type=int, default=40, help="note lines per meeting")
+    parser.add_argument("--repeat", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server, base_url = serve_in_thread(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate, retry_after=0, seed=args.seed)
+    os.environ.update(LLM_PROVIDER="openai", OPENAI_API_KEY="fake", OPENAI_BASE_URL=base_url)
+    from summarizer import summarize_notes   # after env so the pooled client targets the fake
+
+    rng = random.Random(args.seed)
+    docs = []
+    for i in range(args.n):
+        if docs and rng.random() < args.repeat:
+            docs.append(rng.choice(docs))
+            continue
+        lines = [f"{rng.choice(['', 'Decision: ', 'todo: '])}meeting {i} point {j}"
+                 for j in range(args.lines)]
+        docs.append((f"Meeting {i}", "\n".join(lines)))
+
+    def run(doc):
+        start = time.perf_counter()
+        _, meta = summarize_notes(*doc)
+        return time.perf_counter() - start, meta
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(run, docs))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    latencies = sorted(t for t, _ in results)
+    metas = [m for _, m in results]
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"{args.n} summaries in {elapsed:.2f}s  ({args.n / elapsed:.1f}/s, c={args.concurrency})")
+    print(f"latency ms  p50={p(0.5):.0f}  p95={p(0.95):.0f}  p99={p(0.99):.0f}  "
+          f"mean={statistics.mean(latencies) * 1000:.0f}")
+    print(f"stub fallbacks={sum(m['provider'] == 'stub' for m in metas)}  "
+          f"cache hits={sum(bool(m.get('cache_hit')) for m in metas)}  "
+          f"cost=${sum(m.get('cost_usd') or 0 for m in metas):.4f}")
+    print("fake server:", server.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Micro-benchmark for the summarizer's per-call schema overhead.
+
+    python bench_summarizer.py [-n 20000]
+
+Compares what each summarize call used to pay (build a validator, validate,
+render the schema into the prompt) with the compiled validator, the fast
+path, and the pre-rendered SCHEMA_TEXT.
+"""
+import argparse
+import json
+import timeit
+from jsonschema import Draft202012Validator
+from summarizer import SCHEMA, SCHEMA_TEXT, _VALIDATOR, _fast_check, _prompt
+
+SAMPLE = {
+    "summary_bullets": [f"Bullet point number {i} about the roadmap" for i in range(8)],
+    "decisions": ["Ship v2 on Friday", "Drop the legacy importer"],
+    "action_items": [
+        {"description": f"Follow up on item {i}", "owner": "alex@example.com",
+         "due_date": "2025-01-31", "priority": "high"}
+        for i in range(10)
+    ],
+}
+NOTES = "\n".join(f"- line {i} of the meeting notes" for i in range(200))
+
+
+def _old_validate():
+    Draft202012Validator(SCHEMA).validate(SAMPLE)
+
+
+def _old_prompt():
+    json.dumps(SCHEMA, indent=2)
+    return _prompt("Weekly sync", NOTES)
+
+
+CASES = [
+    ("validate: new validator per call", _old_validate),
+    ("validate: compiled validator", lambda: _VALIDATOR.validate(SAMPLE)),
+    ("validate: fast path", lambda: _fast_check(SAMPLE)),
+    ("prompt: json.dumps(SCHEMA) per call", _old_prompt),
+    ("prompt: pre-rendered SCHEMA_TEXT", lambda: _prompt("Weekly sync", NOTES)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", type=int, default=20000, help="calls per case")
+    args = parser.parse_args()
+
+    assert _fast_check(SAMPLE) and _VALIDATOR.is_valid(SAMPLE)
+    assert json.loads(SCHEMA_TEXT) == SCHEMA
+    for name, fn in CASES:
+        best = min(timeit.repeat(fn, number=args.n, repeat=3))
+        print(f"{name:40s} {best / args.n * 1e6:9.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Import upcoming Google Calendar events as meetings, for every connected user.
+
+    flask import-calendar [--shard 0 --shards 1] [--concurrency 8] [--days 14] [--every 0]
+
+Each user's calendar is brought up to date through calendar_sync (skipped
+when the stored copy is within CALENDAR_MAX_STALENESS, so it shares work
+with GET /google/events). Events starting in the next --days days are then
+upserted into `meeting` keyed by the unique (creator_id, external_event_id)
+index, a few hundred rows per INSERT ... ON CONFLICT DO UPDATE (SQLite and
+PostgreSQL; other databases fall back to the ORM). Title, date and
+attendees follow the event; notes, summaries and action items are never
+touched, and events that are cancelled later leave their meeting in place.
+
+Users are worked --concurrency at a time, each in its own app context and
+database session. Running N copies with --shard 0..N-1 --shards N splits
+users by user_id % N, so thousands of users fit one polling window.
+--every S repeats the run every S seconds (0: run once, e.g. from cron).
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, bump_versions, CalendarEvent, IntegrationToken, Meeting
+from google_routes import REQUIRED_CAL_SCOPE
+import calendar_sync
+
+# columns an import writes; everything else on a meeting belongs to the user
+SYNCED = ("title", "meeting_date", "attendees_json")
+CHUNK = 500   # rows per INSERT; stays under SQLite's bound-parameter limit
+_UPSERT = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _connected_tokens(shard: int, shards: int):
+    """IntegrationToken ids in this shard that can read the calendar."""
+    return [
+        row.id for row in
+        db.session.query(IntegrationToken.id)
+        .filter(IntegrationToken.provider == "google",
+                IntegrationToken.scopes.contains(REQUIRED_CAL_SCOPE),
+                IntegrationToken.user_id % shards == shard)
+        .order_by(IntegrationToken.user_id)
+    ]
+
+
+def _upcoming_events(user_id: int, days: int, calendar_id: str = "primary"):
+    now = datetime.utcnow()
+    return (
+        db.session.query(CalendarEvent.event_id, CalendarEvent.summary,
+                         CalendarEvent.start_at, CalendarEvent.attendees_json)
+        .filter(CalendarEvent.user_id == user_id, CalendarEvent.calendar_id == calendar_id,
+                CalendarEvent.end_at >= now, CalendarEvent.start_at < now + timedelta(days=days))
+        .all()
+    )
+
+
+def _meeting_values(user_id: int, event, now: datetime) -> dict:
+    return {
+        "creator_id": user_id,
+        "external_event_id": event.event_id,
+        "title": (event.summary or "Calendar event")[:255],
+        "meeting_date": event.start_at,
+        "attendees_json": event.attendees_json,
+        "version": 1,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _upsert_orm(user_id: int, rows: list) -> int:
+    existing = {
+        m.external_event_id: m for m in
+        Meeting.query.filter(Meeting.creator_id == user_id,
+                             Meeting.external_event_id.in_([r["external_event_id"] for r in rows]))
+    }
+    changed = 0
+    for r in rows:
+        m = existing.get(r["external_event_id"])
+        if m is None:
+            db.session.add(Meeting(**r))
+            changed += 1
+        elif any(getattr(m, k) != r[k] for k in SYNCED):
+            for k in SYNCED:
+                setattr(m, k, r[k])
+            changed += 1
+    return changed
+
+
+def upsert_meetings(user_id: int, events) -> int:
+    """
+    Insert or update one meeting per event; returns how many were created or
+    changed. Unchanged rows aren't written. Caller commits.
+    """
+    now = datetime.utcnow()
+    rows = [_meeting_values(user_id, e, now) for e in events]
+    if not rows:
+        return 0
+    insert = _UPSERT.get(db.session.get_bind().dialect.name)
+    if insert is None:
+        return _upsert_orm(user_id, rows)   # flush listener bumps versions
+
+    t = Meeting.__table__
+    changed = []
+    for i in range(0, len(rows), CHUNK):
+        stmt = insert(t).values(rows[i:i + CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[t.c.creator_id, t.c.external_event_id],
+            set_={**{k: stmt.excluded[k] for k in SYNCED}, "updated_at": now},
+            where=or_(*(t.c[k].is_distinct_from(stmt.excluded[k]) for k in SYNCED)),
+        ).returning(t.c.id)
+        changed.extend(db.session.execute(stmt).scalars())
+    # bulk statements skip the before_flush hook: bump list/detail ETags here
+    if changed:
+        bump_versions(meeting_ids=changed, user_ids=[user_id])
+    return len(changed)
+
+
+def import_user(app, token_id: int, days: int):
+    """(events seen, meetings changed) for one user, in its own app context."""
+    with app.app_context():
+        tok = db.session.get(IntegrationToken, token_id)
+        if tok is None:   # disconnected since the listing
+            return 0, 0
+        user_id = tok.user_id
+        try:
+            calendar_sync.sync_if_stale(tok)
+            events = _upcoming_events(user_id, days)
+            changed = upsert_meetings(user_id, events)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(events), changed
+
+
+def run_import(shard: int, shards: int, concurrency: int, days: int) -> dict:
+    app = current_app._get_current_object()
+    token_ids = _connected_tokens(shard, shards)
+    db.session.remove()   # don't hold a connection while the workers run
+    totals = {"users": len(token_ids), "events": 0, "changed": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency),
+                            thread_name_prefix="calendar-import") as pool:
+        futures = {pool.submit(import_user, app, tid, days): tid for tid in token_ids}
+        for fut in as_completed(futures):
+            try:
+                events, changed = fut.result()
+            except Exception as e:
+                print("[CALENDAR IMPORT ERROR] token", futures[fut], repr(e))
+                totals["failed"] += 1
+                continue
+            totals["events"] += events
+            totals["changed"] += changed
+    return totals
+
+
+@click.command("import-calendar")
+@click.option("--shard", type=int, default=lambda: int(os.getenv("CALENDAR_IMPORT_SHARD", "0")),
+              help="This worker's shard, 0..shards-1 (default: CALENDAR_IMPORT_SHARD or 0).")
+@click.option("--shards", type=int, default=lambda: int(os.getenv("CALENDAR_IMPORT_SHARDS", "1")),
+              help="Number of workers splitting users by user_id (default: CALENDAR_IMPORT_SHARDS or 1).")
+@click.option("--concurrency", default=8, show_default=True,
+              help="Users synced at once; keep within the database pool size.")
+@click.option("--days", default=14, show_default=True, help="Import events starting within this many days.")
+@click.option("--every", default=0.0, show_default=True,
+              help="Repeat every this many seconds (0 = run once).")
+@with_appcontext
+def import_calendar_command(shard, shards, concurrency, days, every):
+    """Upsert upcoming calendar events as meetings for connected users."""
+    if shards < 1 or not 0 <= shard < shards:
+        raise click.BadParameter(f"need 0 <= shard < shards, got {shard}/{shards}")
+    while True:
+        start = time.monotonic()
+        totals = run_import(shard, shards, concurrency, days)
+        elapsed = time.monotonic() - start
+        click.echo(f"shard {shard}/{shards}: {totals['users']} users, {totals['events']} events, "
+                   f"{totals['changed']} meetings created/updated, {totals['failed']} failed "
+                   f"in {elapsed:.1f}s")
+        if every <= 0:
+            break
+        if elapsed > every:
+            click.echo(f"run took longer than --every {every:g}s; add shards or concurrency")
+        time.sleep(max(0.0, every - elapsed))
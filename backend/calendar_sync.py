@@ -0,0 +1,296 @@
+"""
+Local copy of each user's Google Calendar, kept current with incremental sync.
+
+GET /google/events serves from the calendar_event table. When the user's
+last sync is older than CALENDAR_MAX_STALENESS seconds (default 60), the
+request syncs first:
+  - full sync (first time, or when Google answers 410 Gone for an expired
+    sync token): events ending after CALENDAR_SYNC_LOOKBACK_DAYS ago replace
+    the user's stored events
+  - incremental sync: events.list(syncToken=...) returns only what changed
+    since the last sync; cancelled events are deleted, the rest upserted
+Either way nextSyncToken is kept in calendar_sync_state, so the staleness
+bound holds across workers. Within a process one sync per user runs at a
+time; requests that arrive meanwhile serve what is stored.
+
+The googleapiclient service (parsed discovery doc + authorized http) is
+cached per user for CALENDAR_SERVICE_TTL seconds and rebuilt when the
+stored tokens change. Access tokens the client refreshes are written back.
+
+GOOGLE_CALENDAR_API_URL and GOOGLE_TOKEN_URI point all of this at
+fake_calendar.py for offline runs.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from sqlalchemy import delete, insert, update
+from models import db, CalendarEvent, CalendarSyncState
+from utils import encrypt_bytes
+import credential_cache
+
+GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+PAGE_SIZE = 250
+MAX_SERVICES = 1000
+
+_services = OrderedDict()   # user_id -> _Service
+_services_lock = threading.Lock()
+# striped so the lock table stays bounded; a collision only serializes two users
+_sync_locks = [threading.Lock() for _ in range(64)]
+stats = {"services_built": 0, "service_hits": 0, "full_syncs": 0,
+         "incremental_syncs": 0, "sync_tokens_expired": 0}
+
+
+def _utcnow() -> datetime:
+    return datetime.utcnow()
+
+
+# ---- credentials + cached service ----
+
+
+def load_credentials(tok, default_scopes=None) -> Credentials:
+    """Rehydrate google Credentials from encrypted DB tokens (decrypted via a short TTL cache)."""
+    access, refresh = credential_cache.get_tokens(tok)
+    return Credentials(
+        token=access,
+        refresh_token=refresh,
+        token_uri=os.getenv("GOOGLE_TOKEN_URI") or GOOGLE_TOKEN_URI,
+        client_id=os.getenv("GOOGLE_CLIENT_ID"),
+        client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
+        scopes=tok.scopes.split() if tok.scopes else default_scopes,
+    )
+
+
+class _Service:
+    __slots__ = ("service", "creds", "source", "access", "built_at")
+
+    def __init__(self, service, creds, source, built_at):
+        self.service = service
+        self.creds = creds
+        self.source = source          # ciphertexts the creds came from
+        self.access = creds.token     # to notice refreshes
+        self.built_at = built_at
+
+
+def _source(tok) -> tuple:
+    return bytes(tok.access_token_encrypted), bytes(tok.refresh_token_encrypted or b"")
+
+
+def get_service(tok) -> _Service:
+    now = time.monotonic()
+    ttl = float(os.getenv("CALENDAR_SERVICE_TTL", "1800"))
+    with _services_lock:
+        entry = _services.get(tok.user_id)
+        if entry is not None and entry.source == _source(tok) and now - entry.built_at < ttl:
+            _services.move_to_end(tok.user_id)
+            stats["service_hits"] += 1
+            return entry
+
+    creds = load_credentials(tok)
+    options = {}
+    if os.getenv("GOOGLE_CALENDAR_API_URL"):
+        options["client_options"] = {"api_endpoint": os.getenv("GOOGLE_CALENDAR_API_URL")}
+    service = build("calendar", "v3", credentials=creds, cache_discovery=False, **options)
+    entry = _Service(service, creds, _source(tok), now)
+    with _services_lock:
+        _services[tok.user_id] = entry
+        _services.move_to_end(tok.user_id)
+        while len(_services) > MAX_SERVICES:
+            _services.popitem(last=False)
+        stats["services_built"] += 1
+    return entry
+
+
+def forget(user_id: int):
+    """Drop the cached service (tokens replaced or revoked)."""
+    with _services_lock:
+        _services.pop(user_id, None)
+
+
+def _save_refreshed_token(tok, entry: _Service):
+    if entry.creds.token and entry.creds.token != entry.access:
+        tok.access_token_encrypted = encrypt_bytes(entry.creds.token.encode())
+        credential_cache.invalidate(tok.user_id)
+        entry.access = entry.creds.token
+        entry.source = _source(tok)
+
+
+# ---- Google events -> rows ----
+
+
+def _when(part):
+    """(raw, naive UTC datetime) from an event's start/end."""
+    raw = (part or {}).get("dateTime") or (part or {}).get("date")
+    if not raw:
+        return None, None
+    dt = datetime.fromisoformat(raw)
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return raw, dt
+
+
+def attendees(event: dict):
+    people = [{"email": a.get("email"), "name": a.get("displayName"),
+               "response": a.get("responseStatus")}
+              for a in event.get("attendees") or [] if not a.get("resource")]
+    return people or None
+
+
+def _values(user_id: int, calendar_id: str, event: dict, now: datetime) -> dict:
+    start_raw, start_at = _when(event.get("start"))
+    end_raw, end_at = _when(event.get("end"))
+    people = attendees(event)
+    updated = event.get("updated")
+    return {
+        "user_id": user_id, "calendar_id": calendar_id, "event_id": event["id"],
+        "status": event.get("status"), "summary": event.get("summary"),
+        "start_raw": start_raw, "end_raw": end_raw, "start_at": start_at, "end_at": end_at,
+        "html_link": event.get("htmlLink"),
+        "attendees_json": json.dumps(people) if people else None,
+        "updated": _when({"dateTime": updated})[1] if updated else None,
+        "synced_at": now,
+    }
+
+
+def _fetch(service, calendar_id: str, sync_token):
+    """All pages of events.list -> (items, nextSyncToken)."""
+    params = {"calendarId": calendar_id, "singleEvents": True, "maxResults": PAGE_SIZE}
+    if sync_token:
+        params["syncToken"] = sync_token
+    else:
+        days = int(os.getenv("CALENDAR_SYNC_LOOKBACK_DAYS", "30"))
+        params["timeMin"] = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    items, page = [], None
+    while True:
+        resp = service.events().list(pageToken=page, **params).execute()
+        items.extend(resp.get("items", []))
+        page = resp.get("nextPageToken")
+        if not page:
+            return items, resp.get("nextSyncToken")
+
+
+def _apply(user_id: int, calendar_id: str, items: list, full: bool):
+    t = CalendarEvent
+    mine = (t.user_id == user_id, t.calendar_id == calendar_id)
+    now = _utcnow()
+    live, cancelled = {}, []
+    for event in items:   # later entries for the same id win
+        if event.get("status") == "cancelled":
+            cancelled.append(event["id"])
+            live.pop(event["id"], None)
+        else:
+            live[event["id"]] = _values(user_id, calendar_id, event, now)
+
+    if full:
+        db.session.execute(delete(t).where(*mine))
+        existing = {}
+    else:
+        if cancelled:
+            db.session.execute(delete(t).where(*mine, t.event_id.in_(cancelled)))
+        existing = dict(
+            db.session.query(t.event_id, t.id).filter(*mine, t.event_id.in_(list(live)))
+        ) if live else {}
+    updates = [{"id": existing[eid], **vals} for eid, vals in live.items() if eid in existing]
+    inserts = [vals for eid, vals in live.items() if eid not in existing]
+    if updates:
+        db.session.execute(update(t), updates)
+    if inserts:
+        # Core insert: one executemany even when some rows have NULL columns
+        db.session.execute(insert(t.__table__), inserts)
+    return len(live), len(cancelled)
+
+
+# ---- sync ----
+
+
+def sync_state(user_id: int, calendar_id: str):
+    return CalendarSyncState.query.filter_by(user_id=user_id, calendar_id=calendar_id).first()
+
+
+def sync(tok, calendar_id: str = "primary", state=None, now=None) -> dict:
+    """Bring the stored events up to date with Google; commits."""
+    entry = get_service(tok)
+    if state is None:
+        state = sync_state(tok.user_id, calendar_id)
+    if state is None:
+        state = CalendarSyncState(user_id=tok.user_id, calendar_id=calendar_id)
+        db.session.add(state)
+
+    full = not state.sync_token
+    try:
+        items, next_token = _fetch(entry.service, calendar_id, state.sync_token)
+    except HttpError as e:
+        if full or e.resp.status != 410:
+            raise
+        # sync token expired or invalidated: Google wants a full sync
+        stats["sync_tokens_expired"] += 1
+        full = True
+        items, next_token = _fetch(entry.service, calendar_id, None)
+
+    upserted, deleted = _apply(tok.user_id, calendar_id, items, full)
+    now = now or _utcnow()
+    state.sync_token = next_token
+    state.synced_at = now
+    if full:
+        state.full_synced_at = now
+    _save_refreshed_token(tok, entry)
+    db.session.commit()
+    stats["full_syncs" if full else "incremental_syncs"] += 1
+    return {"full": full, "upserted": upserted, "deleted": deleted}
+
+
+def _fresh(state) -> bool:
+    bound = timedelta(seconds=float(os.getenv("CALENDAR_MAX_STALENESS", "60")))
+    return bool(state and state.synced_at and _utcnow() - state.synced_at < bound)
+
+
+def sync_if_stale(tok, calendar_id: str = "primary"):
+    """
+    Sync unless the last one is within CALENDAR_MAX_STALENESS. Returns when
+    the stored copy was last synced (None if never). When another request in
+    this process is already syncing the user, doesn't wait for it unless
+    nothing is stored yet.
+    """
+    user_id = tok.user_id   # tok expires on commit; don't reload it for this
+    state = sync_state(user_id, calendar_id)
+    if _fresh(state):
+        return state.synced_at
+    lock = _sync_locks[user_id % len(_sync_locks)]
+    if not lock.acquire(blocking=not (state and state.synced_at)):
+        return state.synced_at
+    try:
+        if state is not None:
+            db.session.refresh(state)   # may have been synced while we waited
+        else:
+            state = sync_state(user_id, calendar_id)
+        if _fresh(state):
+            return state.synced_at
+        synced_at = _utcnow()
+        sync(tok, calendar_id, state, now=synced_at)
+        return synced_at
+    finally:
+        lock.release()
+
+
+def upcoming(user_id: int, limit: int = 10, calendar_id: str = "primary"):
+    """Stored events that haven't ended yet, soonest first."""
+    return (
+        CalendarEvent.query
+        .filter(CalendarEvent.user_id == user_id, CalendarEvent.calendar_id == calendar_id,
+                CalendarEvent.end_at >= _utcnow())
+        .order_by(CalendarEvent.start_at)
+        .limit(limit)
+        .all()
+    )
+
+
+def clear_user(user_id: int):
+    """Remove a user's stored calendar (disconnect); caller commits."""
+    forget(user_id)
+    db.session.execute(delete(CalendarEvent).where(CalendarEvent.user_id == user_id))
+    db.session.execute(delete(CalendarSyncState).where(CalendarSyncState.user_id == user_id))
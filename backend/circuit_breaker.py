@@ -0,0 +1,138 @@
+"""
+Circuit breaker for outbound LLM calls.
+
+Each provider keeps a sliding window (LLM_BREAKER_WINDOW seconds) of call
+outcomes and latencies. Once at least LLM_BREAKER_MIN_CALLS calls are in the
+window and either the error rate reaches LLM_BREAKER_ERROR_RATE or the p95
+latency reaches LLM_BREAKER_P95_SECONDS, the breaker opens. For
+LLM_BREAKER_COOLDOWN seconds calls fail fast with CircuitOpen (callers use
+the stub), then one probe call is let through: success closes the breaker,
+failure re-opens it. State is per process.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+MAX_SAMPLES = 1000
+
+
+class CircuitOpen(Exception):
+    """The provider's breaker is open; don't call it."""
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def percentile(values: list, pct: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100.0))]
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = None
+        self.reason = None
+        self.trips = 0
+        self.rejected = 0
+        self._probe = False
+        self._calls = deque(maxlen=MAX_SAMPLES)   # (ts, ok, seconds)
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        cutoff = now - _env_float("LLM_BREAKER_WINDOW", 60)
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def allow(self) -> bool:
+        """May a call go out now? Counts a rejection when it may not."""
+        with self._lock:
+            if self.state == OPEN and time.time() - self.opened_at >= _env_float("LLM_BREAKER_COOLDOWN", 30):
+                self.state = HALF_OPEN
+                self._probe = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe:
+                self._probe = True
+                return True
+            self.rejected += 1
+            return False
+
+    def release_probe(self):
+        """The allowed call never reached the provider; let another one probe."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe = False
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpen(f"{self.name} circuit open ({self.reason})")
+
+    def record(self, ok: bool, seconds: float):
+        now = time.time()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if ok:
+                    self.state, self.reason = CLOSED, None
+                    self._calls.clear()
+                    print("[LLM BREAKER]", self.name, "closed after successful probe")
+                else:
+                    self._open(now, "probe failed")
+                return
+            self._calls.append((now, ok, seconds))
+            self._trim(now)
+            if self.state == CLOSED:
+                reason = self._trip_reason()
+                if reason:
+                    self._open(now, reason)
+
+    def _trip_reason(self):
+        n = len(self._calls)
+        if n < int(os.getenv("LLM_BREAKER_MIN_CALLS", "5")):
+            return None
+        errors = sum(1 for _, ok, _ in self._calls if not ok)
+        if errors / n >= _env_float("LLM_BREAKER_ERROR_RATE", 0.5):
+            return f"error rate {errors}/{n}"
+        p95 = percentile([s for _, _, s in self._calls], 95)
+        if p95 >= _env_float("LLM_BREAKER_P95_SECONDS", 15):
+            return f"p95 latency {p95:.1f}s"
+        return None
+
+    def _open(self, now: float, reason: str):
+        self.state, self.opened_at, self.reason = OPEN, now, reason
+        self.trips += 1
+        print("[LLM BREAKER]", self.name, "open:", reason)
+
+    def latency_percentile(self, pct: float, min_samples: int = 20):
+        """pct-th percentile of successful call latency in the window, or None."""
+        with self._lock:
+            self._trim(time.time())
+            ok = [s for _, success, s in self._calls if success]
+        return percentile(ok, pct) if len(ok) >= min_samples else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = time.time()
+            self._trim(now)
+            calls = list(self._calls)
+            state, opened_at, reason = self.state, self.opened_at, self.reason
+        latencies = [s for _, _, s in calls]
+        errors = sum(1 for _, ok, _ in calls if not ok)
+        return {
+            "state": state,
+            "reason": reason,
+            "opened_seconds_ago": round(now - opened_at, 1) if state != CLOSED and opened_at else None,
+            "window_calls": len(calls),
+            "window_errors": errors,
+            "error_rate": round(errors / len(calls), 3) if calls else 0.0,
+            "p50_seconds": percentile(latencies, 50),
+            "p95_seconds": percentile(latencies, 95),
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
@@ -15,3 +15,16 @@ class Settings:
 
     # CORS
     FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "http://localhost:5173")
+
+    # Summarize: "sync" runs inline, "job" enqueues and returns 202.
+    # Callers can also pick per request with ?mode=job|sync.
+    SUMMARIZE_MODE = os.getenv("SUMMARIZE_MODE", "sync")
+    # Worker pool for summarize jobs: "thread" or "process". In process mode
+    # LLM rate limits, breakers and the memory cache are per child process.
+    SUMMARY_EXECUTOR = os.getenv("SUMMARY_EXECUTOR", "thread")
+    SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "4"))
+    # Jobs stuck in "running" longer than this (e.g. worker crashed) are re-queued
+    SUMMARY_JOB_STALE_SECONDS = int(os.getenv("SUMMARY_JOB_STALE_SECONDS", "300"))
+
+    # SQL statements per request vs @query_budget: off | warn | raise
+    QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off")
@@ -0,0 +1,112 @@
+"""
+Short-lived cache of decrypted IntegrationToken secrets, per user.
+
+/google/events used to decrypt the access and refresh tokens on every call.
+Entries live CREDENTIAL_CACHE_TTL seconds (default 300; 0 = off) and are
+only used while the row's ciphertext is unchanged, so a refresh, reconnect
+or key rotation on any worker is picked up on the next read.
+
+Plaintext is held in bytearrays that are overwritten with zeros when an
+entry expires, is evicted or invalidated. This is best effort: the str
+copies handed to google Credentials live until garbage collected.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from utils import decrypt_bytes
+
+MAX_ENTRIES = int(os.getenv("CREDENTIAL_CACHE_SIZE", "1000"))
+
+_lock = threading.Lock()
+_entries = OrderedDict()   # (user_id, provider) -> _Entry
+stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+class _Entry:
+    __slots__ = ("expires_at", "source", "access", "refresh")
+
+    def __init__(self, expires_at, source, access: bytearray, refresh):
+        self.expires_at = expires_at
+        self.source = source       # the ciphertexts this was decrypted from
+        self.access = access
+        self.refresh = refresh
+
+    def wipe(self):
+        for buf in (self.access, self.refresh):
+            if buf is not None:
+                buf[:] = bytes(len(buf))
+
+
+def _ttl() -> float:
+    return float(os.getenv("CREDENTIAL_CACHE_TTL", "300"))
+
+
+def _decrypt_refresh(ciphertext):
+    if not ciphertext:
+        return None
+    try:
+        return bytearray(decrypt_bytes(ciphertext))
+    except Exception:
+        return None
+
+
+def get_tokens(tok) -> tuple[str, str | None]:
+    """(access_token, refresh_token or None) for an IntegrationToken row."""
+    key = (tok.user_id, tok.provider)
+    source = (bytes(tok.access_token_encrypted), bytes(tok.refresh_token_encrypted or b""))
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry.expires_at > now and entry.source == source:
+            _entries.move_to_end(key)
+            stats["hits"] += 1
+            return _plain(entry)
+        stats["misses"] += 1
+
+    entry = _Entry(now + _ttl(), source, bytearray(decrypt_bytes(source[0])),
+                   _decrypt_refresh(source[1]))
+    out = _plain(entry)
+    if _ttl() <= 0:
+        entry.wipe()
+        return out
+    with _lock:
+        old = _entries.pop(key, None)
+        if old is not None:
+            old.wipe()
+        _entries[key] = entry
+        while len(_entries) > MAX_ENTRIES:
+            _, evicted = _entries.popitem(last=False)
+            evicted.wipe()
+            stats["evictions"] += 1
+        _expire(now)
+    return out
+
+
+def _plain(entry: _Entry):
+    return (entry.access.decode(),
+            entry.refresh.decode() if entry.refresh is not None else None)
+
+
+def _expire(now: float):
+    for key in [k for k, e in _entries.items() if e.expires_at <= now]:
+        _entries.pop(key).wipe()
+
+
+def invalidate(user_id: int, provider: str = "google"):
+    with _lock:
+        entry = _entries.pop((user_id, provider), None)
+        if entry is not None:
+            entry.wipe()
+
+
+def clear():
+    with _lock:
+        for entry in _entries.values():
+            entry.wipe()
+        _entries.clear()
+
+
+def cache_stats() -> dict:
+    with _lock:
+        return {**stats, "entries": len(_entries)}
@@ -0,0 +1,246 @@
+"""
+Local fake of the Google Calendar v3 events API and OAuth token endpoint,
+for offline runs of calendar sync.
+
+    python fake_calendar.py --port 8090 --events 20
+
+then point the backend at it:
+
+    GOOGLE_CALENDAR_API_URL=http://127.0.0.1:8090/calendar/v3/
+    GOOGLE_TOKEN_URI=http://127.0.0.1:8090/token
+
+GET /calendar/v3/calendars/<id>/events supports maxResults/pageToken,
+timeMin and syncToken incremental sync: every change bumps a sequence
+number, the nextSyncToken on the last page records it, and a listing with
+that token returns only events changed since (deleted ones as status
+"cancelled"). Tokens issued before expire_sync_tokens() get 410 Gone, as
+Google's do. Access tokens starting with "expired" get 401, so clients
+refresh through POST /token. GET /stats returns request counters.
+
+From a script:
+
+    server, api_url, token_uri = serve_in_thread()
+    server.add_event("primary", summary="Standup", start=dt, end=dt + timedelta(minutes=15))
+    ...
+    server.shutdown()
+"""
+import argparse
+import itertools
+import json
+import socket
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+EVENTS_PATH = "/calendar/v3/calendars/"
+
+
+def _rfc3339(dt: datetime) -> str:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.isoformat()
+
+
+def _when(value):
+    """datetime/date -> the {dateTime}/{date} shape of an event's start/end."""
+    if isinstance(value, datetime):
+        return {"dateTime": _rfc3339(value)}
+    if isinstance(value, date):
+        return {"date": value.isoformat()}
+    return value
+
+
+def _end_of(event: dict):
+    end = event.get("end") or {}
+    raw = end.get("dateTime") or end.get("date")
+    if not raw:
+        return None
+    dt = datetime.fromisoformat(raw)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+class FakeCalendar(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, latency: float = 0.0):
+        super().__init__(addr, _Handler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.min_sync_seq = 0        # tokens older than this are expired
+        self.calendars = {}          # calendar_id -> {event_id: (seq, event)}
+        self._ids = itertools.count(1)
+        self._access = itertools.count(1)
+        self.stats = {"requests": 0, "full": 0, "incremental": 0, "gone": 0,
+                      "unauthorized": 0, "refreshes": 0}
+
+    # ---- test helpers ----
+
+    def _store(self, calendar_id: str, event: dict) -> dict:
+        self.seq += 1
+        event["updated"] = _rfc3339(datetime.now(timezone.utc))
+        self.calendars.setdefault(calendar_id, {})[event["id"]] = (self.seq, event)
+        return dict(event)
+
+    def add_event(self, calendar_id: str = "primary", event_id: str | None = None, **fields) -> dict:
+        with self.lock:
+            eid = event_id or f"evt{next(self._ids)}"
+            event = {"kind": "calendar#event", "id": eid, "status": "confirmed",
+                     "htmlLink": f"https://calendar.example/event?eid={eid}"}
+            event.update({k: _when(v) for k, v in fields.items()})
+            return self._store(calendar_id, event)
+
+    def update_event(self, calendar_id: str, event_id: str, **fields) -> dict:
+        with self.lock:
+            _, event = self.calendars[calendar_id][event_id]
+            event = {**event, **{k: _when(v) for k, v in fields.items()}}
+            return self._store(calendar_id, event)
+
+    def delete_event(self, calendar_id: str, event_id: str):
+        with self.lock:
+            _, event = self.calendars[calendar_id][event_id]
+            # tombstone, like Google: incremental syncs see it as cancelled
+            self._store(calendar_id, {"kind": "calendar#event", "id": event_id,
+                                      "status": "cancelled"})
+
+    def expire_sync_tokens(self):
+        with self.lock:
+            self.min_sync_seq = self.seq + 1
+
+    # ---- listing ----
+
+    def list_events(self, calendar_id: str, query: dict):
+        """(status, payload) for events.list."""
+        max_results = min(int(query.get("maxResults", 250)), 2500)
+        with self.lock:
+            if "pageToken" in query:
+                snapshot, since, offset = (int(x) for x in query["pageToken"].split("."))
+            else:
+                snapshot, offset = self.seq, 0
+                since = None
+                if "syncToken" in query:
+                    since = int(query["syncToken"].removeprefix("sync-"))
+                    if since < self.min_sync_seq:
+                        self.stats["gone"] += 1
+                        return 410, {"error": {"code": 410, "message": "Sync token is no longer valid, a full sync is required.",
+                                               "errors": [{"domain": "calendar", "reason": "fullSyncRequired"}]}}
+                    self.stats["incremental"] += 1
+                else:
+                    since = -1
+                    self.stats["full"] += 1
+            full = since < 0
+            events = sorted(
+                (e for s, e in (self.calendars.get(calendar_id) or {}).values()
+                 if since < s <= snapshot and (not full or e.get("status") != "cancelled")),
+                key=lambda e: e["id"])
+        if full and query.get("timeMin"):
+            time_min = datetime.fromisoformat(query["timeMin"])
+            events = [e for e in events if (_end_of(e) or time_min) >= time_min]
+
+        page = events[offset:offset + max_results]
+        payload = {"kind": "calendar#events", "items": [dict(e) for e in page]}
+        if offset + max_results < len(events):
+            payload["nextPageToken"] = f"{snapshot}.{since}.{offset + max_results}"
+        else:
+            payload["nextSyncToken"] = f"sync-{snapshot}"
+        return 200, payload
+
+    def new_access_token(self) -> str:
+        with self.lock:
+            self.stats["refreshes"] += 1
+            return f"fake-access-{next(self._access)}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") == "/stats":
+            with self.server.lock:
+                return self._json(200, dict(self.server.stats))
+        if not (url.path.startswith(EVENTS_PATH) and url.path.endswith("/events")):
+            return self._json(404, {"error": {"code": 404, "message": "Not Found"}})
+
+        with self.server.lock:
+            self.server.stats["requests"] += 1
+        time.sleep(self.server.latency)
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not token or token.startswith("expired"):
+            with self.server.lock:
+                self.server.stats["unauthorized"] += 1
+            return self._json(401, {"error": {"code": 401, "message": "Invalid Credentials",
+                                              "status": "UNAUTHENTICATED"}})
+
+        calendar_id = unquote(url.path[len(EVENTS_PATH):-len("/events")])
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self._json(*self.server.list_events(calendar_id, query))
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        form = {k: v[-1] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        if url.path.rstrip("/") != "/token":
+            return self._json(404, {"error": {"code": 404, "message": "Not Found"}})
+        if form.get("grant_type") != "refresh_token" or not form.get("refresh_token"):
+            return self._json(400, {"error": "invalid_grant"})
+        self._json(200, {"access_token": self.server.new_access_token(), "expires_in": 3599,
+                         "token_type": "Bearer"})
+
+
+def serve_in_thread(host: str = "127.0.0.1", port: int = 0, **options):
+    """Start a fake server on a daemon thread; returns (server, api_url, token_uri)."""
+    server = FakeCalendar((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://{host}:{server.server_port}"
+    return server, f"{base}/calendar/v3/", f"{base}/token"
+
+
+def seed(server: FakeCalendar, n: int, calendar_id: str = "primary"):
+    """n hour-long events, one a day starting tomorrow at 10:00 UTC."""
+    start = datetime.now(timezone.utc).replace(hour=10, minute=0, second=0, microsecond=0)
+    for i in range(n):
+        at = start + timedelta(days=i + 1)
+        server.add_event(calendar_id, summary=f"Meeting {i + 1}", start=at,
+                         end=at + timedelta(hours=1),
+                         attendees=[{"email": f"person{j}@example.com",
+                                     "responseStatus": "accepted"} for j in range(3)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Google Calendar API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--events", type=int, default=10, help="events to seed in 'primary'")
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeCalendar((args.host, args.port), latency=args.latency)
+    seed(server, args.events)
+    print(f"fake Calendar API on http://{args.host}:{server.server_port}/calendar/v3/ "
+          f"(token URI http://{args.host}:{server.server_port}/token)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Local fake of the OpenAI chat-completions API, for offline load tests and CI.
+
+    python fake_openai.py --port 8089 --latency 0.3 --error-rate 0.1
+
+then point the backend at it:
+
+    LLM_PROVIDER=openai OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+
+POST /v1/chat/completions answers with the rules-stub summary of the notes
+quoted in the prompt, so results are deterministic for the same input.
+`"stream": true` is answered with SSE chunks (plus a usage chunk when
+stream_options.include_usage is set). Latency, jitter, injected HTTP errors
+(with Retry-After) and malformed model output are configurable; --seed makes
+the injected faults reproducible. Output longer than the request's max_tokens
+is cut off there (finish_reason "length"), as the real API does. GET /stats
+returns request counters.
+
+From a script:
+
+    server, base_url = serve_in_thread(latency=0.05, error_rate=0.2, seed=1)
+    ...
+    server.shutdown()
+"""
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from summarizer import _rules_stub
+
+DEFAULTS = {
+    "latency": 0.0,        # seconds before the first byte
+    "jitter": 0.0,         # + uniform(0, jitter)
+    "chunk_delay": 0.0,    # seconds between streamed chunks
+    "chunk_size": 16,      # characters per streamed chunk
+    "error_rate": 0.0,     # fraction of requests answered with an error
+    "error_status": (429, 500, 503),
+    "retry_after": 1,      # Retry-After seconds on 429/503
+    "fail_first": 0,       # the first N requests always fail
+    "malformed_rate": 0.0,  # fraction answered 200 with non-JSON content
+    "seed": None,
+}
+
+
+def _notes_from_prompt(messages: list) -> str:
+    """The first \"\"\"-quoted block of the last user message (the notes)."""
+    user = [m.get("content") or "" for m in messages if m.get("role") == "user"]
+    text = user[-1] if user else ""
+    parts = text.split('"""')
+    return parts[1] if len(parts) >= 3 else text
+
+
+def _tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+class FakeOpenAI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, **options):
+        super().__init__(addr, _Handler)
+        self.options = {**DEFAULTS, **options}
+        self.rng = random.Random(self.options["seed"])
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "malformed": 0, "streams": 0,
+                      "truncated": 0}
+        self.last_request = None   # body of the latest chat.completions call
+
+    def plan(self):
+        """Decide this request's fate up front: (delay, error_status or None, malformed)."""
+        o = self.options
+        with self.lock:
+            self.stats["requests"] += 1
+            n = self.stats["requests"]
+            delay = o["latency"] + self.rng.uniform(0, o["jitter"])
+            status = None
+            if n <= o["fail_first"] or self.rng.random() < o["error_rate"]:
+                status = self.rng.choice(o["error_status"])
+                self.stats["errors"] += 1
+            malformed = status is None and self.rng.random() < o["malformed_rate"]
+            if malformed:
+                self.stats["malformed"] += 1
+        return delay, status, malformed
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # headers and body go out in separate writes; don't let Nagle hold the body
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status: int, payload: dict, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.server.lock:
+                return self._json(200, dict(self.server.stats))
+        self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": "not found"}})
+
+        delay, status, malformed = self.server.plan()
+        time.sleep(delay)
+        if status is not None:
+            headers = {}
+            if status in (429, 503):
+                headers["Retry-After"] = str(self.server.options["retry_after"])
+            return self._json(status, {"error": {"message": "injected failure",
+                                                 "type": "fake_error", "code": status}}, headers)
+
+        self.server.last_request = body
+        messages = body.get("messages") or []
+        notes = _notes_from_prompt(messages)
+        content = "Sure! Here is the summary" if malformed else json.dumps(_rules_stub(notes, ""))
+        finish_reason = "stop"
+        if body.get("max_tokens") and _tokens(content) > body["max_tokens"]:
+            # like the real API: cut off at max_tokens, usually mid-JSON
+            content = content[:body["max_tokens"] * 4]
+            finish_reason = "length"
+            with self.server.lock:
+                self.server.stats["truncated"] += 1
+        prompt_tokens = sum(_tokens(m.get("content") or "") for m in messages)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": _tokens(content),
+                 "total_tokens": prompt_tokens + _tokens(content)}
+        model = body.get("model") or "fake"
+
+        if body.get("stream"):
+            with self.server.lock:
+                self.server.stats["streams"] += 1
+            include_usage = (body.get("stream_options") or {}).get("include_usage")
+            return self._stream(model, content, usage if include_usage else None, finish_reason)
+
+        self._json(200, {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": finish_reason,
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": usage,
+        })
+
+    def _stream(self, model: str, content: str, usage, finish_reason: str = "stop"):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(choices, extra=None):
+            return {"id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                    "created": int(time.time()), "model": model, "choices": choices, **(extra or {})}
+
+        size, pause = max(1, int(self.server.options["chunk_size"])), self.server.options["chunk_delay"]
+        events = [chunk([{"index": 0, "delta": {"content": content[i:i + size]}, "finish_reason": None}])
+                  for i in range(0, len(content), size)]
+        events.append(chunk([{"index": 0, "delta": {}, "finish_reason": finish_reason}]))
+        if usage:
+            events.append(chunk([], {"usage": usage}))
+        try:
+            for event in events:
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+                time.sleep(pause)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away mid-stream
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+def serve_in_thread(host: str = "127.0.0.1", port: int = 0, **options):
+    """Start a fake server on a daemon thread; returns (server, base_url)."""
+    server = FakeOpenAI((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat-completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=DEFAULTS["latency"])
+    parser.add_argument("--jitter", type=float, default=DEFAULTS["jitter"])
+    parser.add_argument("--chunk-delay", type=float, default=DEFAULTS["chunk_delay"])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULTS["chunk_size"])
+    parser.add_argument("--error-rate", type=float, default=DEFAULTS["error_rate"])
+    parser.add_argument("--error-status", default="429,500,503",
+                        help="comma-separated statuses to inject")
+    parser.add_argument("--retry-after", type=int, default=DEFAULTS["retry_after"])
+    parser.add_argument("--fail-first", type=int, default=DEFAULTS["fail_first"])
+    parser.add_argument("--malformed-rate", type=float, default=DEFAULTS["malformed_rate"])
+    parser.add_argument("--seed", type=int, default=None)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+    args["error_status"] = tuple(int(s) for s in args["error_status"].split(",") if s)
+
+    server = FakeOpenAI((host, port), **args)
+    print(f"fake OpenAI on http://{host}:{server.server_port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
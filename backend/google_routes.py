@@ -1,14 +1,14 @@
 import os
 from flask import Blueprint, session, request, redirect, jsonify
 from models import db, IntegrationToken
-from utils import encrypt_bytes, decrypt_bytes
-from datetime import datetime, timezone
+from auth import require_auth
+from utils import encrypt_bytes
+import calendar_sync
+import credential_cache
+from query_budget import query_budget
 
 # Google OAuth / API
 from google_auth_oauthlib.flow import Flow
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from google.auth.transport.requests import Request as GoogleRequest
 from oauthlib.oauth2.rfc6749.errors import OAuth2Error
 
 bp_google = Blueprint("google", __name__, url_prefix="/google")
@@ -23,14 +23,6 @@ REQUIRED_CAL_SCOPE = "https://www.googleapis.com/auth/calendar.readonly"
 
 
 # --------- helpers ---------
-def _require_auth():
-    """Gate endpoints behind our own session auth."""
-    uid = session.get("user_id")
-    if not uid:
-        return None, (jsonify({"error": "unauthorized"}), 401)
-    return uid, None
-
-
 def _client_config():
     """Shape expected by Flow.from_client_config."""
     return {
@@ -57,9 +49,10 @@ def _frontend_redirect(query: str = ""):
 
 # --------- routes ---------
 @bp_google.get("/login")
+@query_budget(0)
 def login():
     """Step 1: send user to Google's consent screen."""
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
 
@@ -83,13 +76,14 @@ def login():
 
 
 @bp_google.get("/callback")
+@query_budget(3)
 def callback():
     """
     Step 2: Google returns code + (space-delimited) scopes.
     If calendar scope wasn't granted, bounce back with a friendly message.
     Then exchange code for tokens, store encrypted, and redirect home.
     """
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
 
@@ -150,6 +144,8 @@ def callback():
             tok.refresh_token_encrypted = encrypt_bytes(refresh_tok)
         tok.scopes = " ".join(granted_scopes)
     db.session.commit()
+    credential_cache.invalidate(uid)
+    calendar_sync.forget(uid)
 
     # If still missing calendar: inform the UI
     if REQUIRED_CAL_SCOPE not in granted_scopes:
@@ -161,31 +157,11 @@ def callback():
     return _frontend_redirect()
 
 
-def _load_credentials(tok: IntegrationToken) -> Credentials:
-    """Rehydrate google Credentials from encrypted DB tokens."""
-    access = decrypt_bytes(tok.access_token_encrypted).decode()
-    refresh = None
-    if tok.refresh_token_encrypted:
-        try:
-            refresh = decrypt_bytes(tok.refresh_token_encrypted).decode()
-        except Exception:
-            refresh = None
-
-    scopes = tok.scopes.split() if tok.scopes else GOOGLE_SCOPES
-    return Credentials(
-        token=access,
-        refresh_token=refresh,
-        token_uri="https://oauth2.googleapis.com/token",
-        client_id=os.getenv("GOOGLE_CLIENT_ID"),
-        client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-        scopes=scopes,
-    )
-
-
 @bp_google.get("/status")
+@query_budget(1)
 def status():
     """Used by the SPA to know if Google is connected and if calendar scope is present."""
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
 
@@ -199,9 +175,14 @@ def status():
 
 
 @bp_google.get("/events")
+@query_budget(11)
 def list_events():
-    """Smoke test: list next 10 events from the user's primary calendar."""
-    uid, err = _require_auth()
+    """
+    Next 10 events from the user's primary calendar, served from the local
+    copy (calendar_sync); syncs first when it is older than
+    CALENDAR_MAX_STALENESS. X-Calendar-Synced-At says how fresh it is.
+    """
+    uid, err = require_auth()
     if err:
         return err
 
@@ -214,46 +195,33 @@ def list_events():
     if REQUIRED_CAL_SCOPE not in (tok.scopes.split() if tok.scopes else []):
         return jsonify({"error": "missing_calendar_scope"}), 403
 
-    creds = _load_credentials(tok)
-
-    # Refresh access token if expired
-    if not creds.valid and creds.refresh_token:
-        creds.refresh(GoogleRequest())
-        tok.access_token_encrypted = encrypt_bytes(
-            (creds.token or "").encode())
-        db.session.commit()
-
-    service = build("calendar", "v3", credentials=creds, cache_discovery=False)
+    try:
+        synced_at = calendar_sync.sync_if_stale(tok)
+    except Exception as e:
+        # Google down, token revoked, ...: serve the last copy if there is one
+        print("[GOOGLE CALENDAR] sync failed:", repr(e))
+        db.session.rollback()
+        state = calendar_sync.sync_state(uid, "primary")
+        synced_at = state.synced_at if state else None
+    if synced_at is None:
+        return jsonify({"error": "calendar_unavailable"}), 502
 
-    now = datetime.now(timezone.utc).isoformat()
-    events_result = (
-        service.events()
-        .list(calendarId="primary", timeMin=now, maxResults=10, singleEvents=True, orderBy="startTime")
-        .execute()
-    )
-    items = events_result.get("items", [])
-    out = [
-        {
-            "id": e.get("id"),
-            "summary": e.get("summary"),
-            "start": e.get("start", {}).get("dateTime") or e.get("start", {}).get("date"),
-            "end": e.get("end", {}).get("dateTime") or e.get("end", {}).get("date"),
-            "htmlLink": e.get("htmlLink"),
-        }
-        for e in items
-    ]
-    return jsonify(out), 200
+    out = [e.to_dict() for e in calendar_sync.upcoming(uid)]
+    return jsonify(out), 200, {"X-Calendar-Synced-At": synced_at.isoformat() + "Z"}
 
 
 @bp_google.delete("/disconnect")
+@query_budget(4)
 def disconnect():
     """Optional: remove stored Google tokens for this user (useful during dev)."""
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
     tok = IntegrationToken.query.filter_by(
         user_id=uid, provider="google").first()
     if tok:
         db.session.delete(tok)
+        calendar_sync.clear_user(uid)
         db.session.commit()
+        credential_cache.invalidate(uid)
     return jsonify({"ok": True})
@@ -0,0 +1,201 @@
+"""
+Background summarize jobs.
+
+Jobs live in the `summary_job` table so they survive restarts; a bounded
+thread pool (optionally handing the LLM call to a process pool) works them.
+
+With SUMMARY_EXECUTOR=process, summarize_notes runs in the pool's child
+processes (forkserver or spawn, never fork). Each child has its own token
+buckets, provider circuit breakers and concurrency slots and its own memory
+cache with no DB tier, so those limits apply per child: size LLM_RPM/LLM_TPM
+for SUMMARY_WORKERS times as many processes.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, Meeting, SummaryJob
+from summaries import meeting_content_hash, previous_version, save_summary
+from summarizer import summarize_notes
+from utils import process_context
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_app = None
+_lock = threading.Lock()
+_threads = None      # ThreadPoolExecutor: one thread per in-flight job
+_procs = None        # ProcessPoolExecutor when SUMMARY_EXECUTOR=process
+_recovered = False
+
+
+def init_app(app):
+    global _app
+    _app = app
+    app.before_request(_recover_once)
+
+
+def _pools():
+    global _threads, _procs
+    with _lock:
+        if _threads is None:
+            workers = max(1, _app.config["SUMMARY_WORKERS"])
+            _threads = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="summary-job")
+            if _app.config["SUMMARY_EXECUTOR"] == "process":
+                _procs = ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+    return _threads, _procs
+
+
+# ---- enqueue ----
+
+
+def active_job(meeting: Meeting, h: str, create_action_items: bool = False):
+    """
+    The in-flight job that already covers this content hash, or None.
+    Jobs stuck in running past the stale timeout are failed first, so a job
+    whose worker died is never handed back.
+    """
+    reaped = _reap_stale(meeting.id)
+    job = (
+        SummaryJob.query.filter(
+            SummaryJob.meeting_id == meeting.id,
+            SummaryJob.content_hash == h,
+            SummaryJob.create_action_items == create_action_items,
+            SummaryJob.status.in_(ACTIVE_STATUSES),
+        )
+        .order_by(SummaryJob.id.desc())
+        .first()
+    )
+    if reaped:
+        db.session.commit()
+    return job
+
+
+def new_job(meeting: Meeting, h: str, create_action_items: bool = False) -> SummaryJob:
+    """Queue a summarize job without looking for an in-flight one (see active_job)."""
+    job = SummaryJob(meeting_id=meeting.id, content_hash=h, status="queued",
+                     create_action_items=create_action_items)
+    db.session.add(job)
+    db.session.commit()
+    _submit(job.id)
+    return job
+
+
+def enqueue_summary(meeting: Meeting, h: str, create_action_items: bool = False) -> SummaryJob:
+    """
+    Queue a summarize job for the meeting, or return the in-flight job that
+    already covers the same content hash (double clicks collapse into one).
+    """
+    return (active_job(meeting, h, create_action_items)
+            or new_job(meeting, h, create_action_items))
+
+
+def _stale_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=_app.config["SUMMARY_JOB_STALE_SECONDS"])
+
+
+def _reap_stale(meeting_id: int) -> int:
+    """Fail the meeting's jobs still marked running past the stale timeout."""
+    return (
+        SummaryJob.query.filter(
+            SummaryJob.meeting_id == meeting_id,
+            SummaryJob.status == "running",
+            SummaryJob.started_at < _stale_cutoff(),
+        )
+        .update({"status": "failed", "error": "worker lost (running past the stale timeout)",
+                 "finished_at": datetime.utcnow()}, synchronize_session=False)
+    )
+
+
+def _submit(job_id: int):
+    threads, _ = _pools()
+    threads.submit(_run, job_id)
+
+
+# ---- worker ----
+
+
+def _claim(job_id: int) -> bool:
+    """Atomically flip queued -> running so only one worker runs a job."""
+    n = (
+        SummaryJob.query.filter_by(id=job_id, status="queued")
+        .update({"status": "running", "started_at": datetime.utcnow()},
+                synchronize_session=False)
+    )
+    db.session.commit()
+    return n == 1
+
+
+def _run(job_id: int):
+    with _app.app_context():
+        try:
+            if not _claim(job_id):
+                return
+            job = db.session.get(SummaryJob, job_id)
+            m = db.session.get(Meeting, job.meeting_id)
+            if m is None or not (m.title and m.raw_notes):
+                raise ValueError("meeting must have title and raw_notes to summarize")
+
+            # Notes may have changed since enqueue; summarize what is there now.
+            title, notes = m.title, m.raw_notes
+            h = meeting_content_hash(title, notes)
+            previous = previous_version(m.id)
+            _, procs = _pools()
+            if procs is not None:
+                result, meta = procs.submit(
+                    summarize_notes, title, notes, previous).result()
+            else:
+                result, meta = summarize_notes(title, notes, previous)
+
+            s, _ = save_summary(m.id, result, meta, h,
+                                with_action_items=job.create_action_items, notes=notes)
+            job.summary_id = s.id
+            job.status = "done"
+        except Exception as e:
+            print("[SUMMARY JOB ERROR]", job_id, repr(e))
+            db.session.rollback()
+            job = db.session.get(SummaryJob, job_id)
+            if job is None:
+                return
+            job.status = "failed"
+            job.error = repr(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+# ---- restart recovery ----
+
+
+def recover_jobs():
+    """
+    Re-submit jobs left over from a previous process. Jobs still marked
+    running past the stale timeout belonged to a dead worker and are reset.
+    """
+    SummaryJob.query.filter(
+        SummaryJob.status == "running", SummaryJob.started_at < _stale_cutoff()
+    ).update({"status": "queued", "started_at": None}, synchronize_session=False)
+    db.session.commit()
+
+    ids = [jid for (jid,) in db.session.query(SummaryJob.id)
+           .filter_by(status="queued").order_by(SummaryJob.id)]
+    for jid in ids:
+        _submit(jid)
+    return len(ids)
+
+
+def _recover_once():
+    global _recovered
+    if _recovered:
+        return
+    with _lock:
+        if _recovered:
+            return
+        _recovered = True
+    try:
+        n = recover_jobs()
+        if n:
+            print("[SUMMARY JOB] re-queued", n, "job(s) after restart")
+    except SQLAlchemyError as e:
+        # e.g. table not migrated yet; don't block the request
+        db.session.rollback()
+        print("[SUMMARY JOB] recovery skipped:", repr(e))
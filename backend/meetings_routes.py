@@ -1,35 +1,140 @@
+import base64
 import json
-from os import getenv
-from flask import Blueprint, request, jsonify, session
-from models import db, Meeting, Summary
-from utils import content_hash, json_response, check_if_none_match
-from summarizer import summarize_notes
+import math
+from datetime import datetime
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, selectinload
+from flask import (Blueprint, Response, abort, current_app, request, jsonify,
+                   stream_with_context, url_for)
+from models import db, Meeting, Summary, SummaryJob, User
+from auth import require_auth
+from utils import content_hash, json_response, check_if_none_match, not_modified
+from summarizer import llm_enabled, summarize_notes, stream_summary
+from summaries import (latest_summary, latest_summary_stamp, meeting_content_hash,
+                       previous_version, save_summary, summary_etag)
+from jobs import active_job, new_job
+from query_budget import query_budget
+import response_cache
+import token_budget
 
 bp_meetings = Blueprint("meetings", __name__, url_prefix="/meetings")
 
 
-def _require_auth():
-    uid = session.get("user_id")
-    if not uid:
-        return None, (jsonify({"error": "unauthorized"}), 401)
-    return uid, None
+MAX_PAGE_SIZE = 200
+
+
+def _encode_cursor(m: Meeting) -> str:
+    key = [m.meeting_date.isoformat() if m.meeting_date else None, m.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    date_s, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return (datetime.fromisoformat(date_s) if date_s else None), int(last_id)
+
+
+def _after_cursor(last_date, last_id):
+    """Keyset predicate for ORDER BY meeting_date ASC NULLS LAST, id ASC."""
+    if last_date is None:
+        return and_(Meeting.meeting_date.is_(None), Meeting.id > last_id)
+    return or_(
+        Meeting.meeting_date > last_date,
+        and_(Meeting.meeting_date == last_date, Meeting.id > last_id),
+        Meeting.meeting_date.is_(None),
+    )
+
+
+def _versioned(key: tuple, build):
+    """
+    Serve a GET from its version-keyed ETag: 304 when the client has it,
+    else the cached body, else build() -> (payload, headers) and cache it.
+    """
+    etag = content_hash(*[str(k) for k in key])
+    if check_if_none_match(etag):
+        return not_modified(etag)
+    cached = response_cache.get(key)
+    if cached is None:
+        payload, headers = build()
+        if not isinstance(payload, list | dict):
+            return payload   # error response; not cached
+        cached = (json.dumps(payload), headers)
+        response_cache.put(key, *cached)
+    body, headers = cached
+    resp = json_response(body, etag_value=etag)
+    resp.headers["Cache-Control"] = "private, no-cache"   # always revalidate
+    resp.headers.update(headers)
+    return resp
 
 
 @bp_meetings.get("")
+@query_budget(2)
 def list_meetings():
-    uid, err = _require_auth()
+    """
+    Optional query params:
+      limit=N       page size (keyset pagination; next page cursor in X-Next-Cursor)
+      cursor=...    value of X-Next-Cursor from the previous page
+      fields=a,b    only load/return these columns (e.g. skip raw_notes)
+
+    The ETag comes from the user's meetings_version, so an unchanged list
+    costs one single-column query and no row loads.
+    """
+    uid, err = require_auth()
     if err:
         return err
+    version = db.session.query(User.meetings_version).filter_by(id=uid).scalar()
+    qs = request.query_string.decode()
+    return _versioned(("meetings", uid, version, qs), lambda: _meetings_page(uid))
+
+
+def _meetings_page(uid: int):
+    """(list payload, headers) for one page, or (error response, None)."""
+    fields = None
+    if request.args.get("fields"):
+        fields = [f.strip() for f in request.args["fields"].split(",") if f.strip()]
+        unknown = set(fields) - set(Meeting.FIELDS)
+        if unknown:
+            return (jsonify({"error": f"unknown fields: {', '.join(sorted(unknown))}"}), 400), None
+        if "id" not in fields:
+            fields.insert(0, "id")
+
+    limit = None
+    if request.args.get("limit"):
+        try:
+            limit = int(request.args["limit"])
+        except ValueError:
+            return (jsonify({"error": "limit must be an integer"}), 400), None
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return (jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400), None
+
     q = (
         Meeting.query.filter_by(creator_id=uid)
-        .order_by(Meeting.meeting_date.asc().nullslast())
+        .order_by(Meeting.meeting_date.asc().nullslast(), Meeting.id.asc())
     )
-    return jsonify([m.to_dict() for m in q.all()]), 200
+    if fields:
+        # meeting_date is always needed to build the next cursor
+        cols = set(fields) | {"meeting_date"}
+        q = q.options(load_only(*[getattr(Meeting, f) for f in cols]))
+    if request.args.get("cursor"):
+        try:
+            q = q.filter(_after_cursor(*_decode_cursor(request.args["cursor"])))
+        except (ValueError, TypeError):
+            return (jsonify({"error": "invalid cursor"}), 400), None
+    if limit:
+        q = q.limit(limit + 1)
+
+    rows = q.all()
+    headers = {}
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+    return [m.to_dict(fields=fields) for m in rows], headers
 
 
 @bp_meetings.post("")
+@query_budget(3)
 def create_meeting():
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
     data = request.get_json() or {}
@@ -40,30 +145,56 @@ def create_meeting():
         creator_id=uid,
         title=title,
         raw_notes=data.get("raw_notes"),
+        # set when imported from a calendar event (also done by `flask import-calendar`)
+        external_event_id=data.get("external_event_id") or None,
     )
     # Accept ISO datetime string for meeting_date if provided
     if data.get("meeting_date"):
-        from datetime import datetime
         m.meeting_date = datetime.fromisoformat(data["meeting_date"])
     db.session.add(m)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # event already imported: hand back that meeting instead of a copy
+        db.session.rollback()
+        existing = Meeting.query.filter_by(
+            creator_id=uid, external_event_id=m.external_event_id).first()
+        if m.external_event_id is None or existing is None:
+            raise
+        return jsonify(existing.to_dict()), 200
     return jsonify(m.to_dict()), 201
 
 
 @bp_meetings.get("/<int:mid>")
+@query_budget(4)
 def get_meeting(mid):
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
-    m = Meeting.query.get_or_404(mid)
-    if m.creator_id != uid:
+    row = (db.session.query(Meeting.creator_id, Meeting.version)
+           .filter_by(id=mid).first())
+    if row is None:
+        abort(404)
+    if row.creator_id != uid:
         return jsonify({"error": "forbidden"}), 403
-    return jsonify(m.to_dict(include_children=True)), 200
+
+    def build():
+        # children come back in two IN-queries no matter how many there are
+        m = (
+            Meeting.query.options(
+                selectinload(Meeting.summaries), selectinload(Meeting.action_items))
+            .filter_by(id=mid)
+            .first_or_404()
+        )
+        return m.to_dict(include_children=True), {}
+
+    return _versioned(("meeting", mid, row.version), build)
 
 
 @bp_meetings.patch("/<int:mid>")
+@query_budget(5)
 def update_meeting(mid):
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
     m = Meeting.query.get_or_404(mid)
@@ -75,7 +206,6 @@ def update_meeting(mid):
     if "raw_notes" in data:
         m.raw_notes = data["raw_notes"]
     if "meeting_date" in data:
-        from datetime import datetime
         m.meeting_date = (
             datetime.fromisoformat(
                 data["meeting_date"]) if data["meeting_date"] else None
@@ -85,8 +215,9 @@ def update_meeting(mid):
 
 
 @bp_meetings.delete("/<int:mid>")
+@query_budget(10)
 def delete_meeting(mid):
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
     m = Meeting.query.get_or_404(mid)
@@ -97,10 +228,34 @@ def delete_meeting(mid):
     return "", 204
 
 
+def _rate_limited(e: token_budget.BudgetExceeded):
+    retry_after = max(1, math.ceil(e.retry_after))
+    return (jsonify({"error": "rate limited", "scope": e.scope, "retry_after": retry_after}),
+            429, {"Retry-After": str(retry_after)})
+
+
+def _llm_budget_error(uid: int, m: Meeting):
+    """413/429 response when summarizing m would go over the LLM budget, else None."""
+    if not llm_enabled():
+        return None
+    tokens = token_budget.estimate_tokens(f"{m.title}\n{m.raw_notes}")
+    limit = token_budget.max_input_tokens()
+    if tokens > limit:
+        return jsonify({"error": "notes too long to summarize",
+                        "tokens": tokens, "max_tokens": limit}), 413
+    try:
+        token_budget.check_user(uid, tokens + token_budget.MAX_COMPLETION_TOKENS)
+    except token_budget.BudgetExceeded as e:
+        return _rate_limited(e)
+    return None
+
+
 # ---- Summarize (POST) ----
 @bp_meetings.post("/<int:mid>/summarize")
+# long notes add one batched chunk-cache lookup, whatever the number of chunks
+@query_budget(14)
 def summarize(mid):
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
     m = Meeting.query.get_or_404(mid)
@@ -110,67 +265,166 @@ def summarize(mid):
     if not (m.raw_notes and m.title):
         return jsonify({"error": "meeting must have title and raw_notes to summarize"}), 400
 
-    # Include prompt version in the content hash so changing the prompt forces regeneration
-    prompt_version = getenv("PROMPT_VERSION", "v1")
-    h = content_hash(m.title, m.raw_notes, prompt_version)
+    h = meeting_content_hash(m.title, m.raw_notes)
 
     # Short-circuit if latest summary already matches this content hash
-    latest = (
-        Summary.query.filter_by(meeting_id=mid)
-        .order_by(Summary.created_at.desc())
-        .first()
-    )
-    if latest:
+    latest = latest_summary(mid)
+    if latest and latest.content_hash == h:
+        etag = summary_etag(latest)
+        if check_if_none_match(etag, latest.updated_at):
+            return not_modified(etag, latest.updated_at)
+        return json_response(json.dumps(latest.to_dict()), etag_value=etag,
+                             last_modified=latest.updated_at)
+
+    # Opt-in: also store the extracted action items (deduped per meeting)
+    with_items = request.args.get("action_items", "").lower() in ("1", "true", "yes")
+
+    # Job mode: hand off to the worker pool and let the client poll.
+    # Polls/retries that join an in-flight job don't touch the LLM budget.
+    mode = request.args.get("mode") or current_app.config["SUMMARIZE_MODE"]
+    if mode == "job":
+        job = active_job(m, h, create_action_items=with_items)
+        if job is None:
+            over_budget = _llm_budget_error(uid, m)
+            if over_budget:
+                return over_budget
+            job = new_job(m, h, create_action_items=with_items)
+        status_url = url_for("meetings.summary_job_status",
+                             mid=mid, jid=job.id)
+        return jsonify({**job.to_dict(), "status_url": status_url}), 202, {
+            "Location": status_url}
+
+    over_budget = _llm_budget_error(uid, m)
+    if over_budget:
+        return over_budget
+
+    # Generate a fresh summary (OpenAI if configured, else stub).
+    notes = m.raw_notes
+    try:
+        result, meta = summarize_notes(m.title, notes, previous_version(mid))
+    except token_budget.BudgetExceeded as e:
+        return _rate_limited(e)
+    s, created = save_summary(mid, result, meta, h,
+                              with_action_items=with_items, notes=notes)
+
+    etag = summary_etag(s)
+    payload = s.to_dict()
+    if with_items:
+        payload["created_action_items"] = created
+    return json_response(json.dumps(payload), status=201, etag_value=etag,
+                         last_modified=s.updated_at)
+
+
+# ---- Summarize (GET, server-sent events) ----
+SSE_EVENT_NAMES = {
+    "summary_bullets": "bullet",
+    "decisions": "decision",
+    "action_items": "action_item",
+}
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@bp_meetings.get("/<int:mid>/summarize/stream")
+@query_budget(2)
+def summarize_stream(mid):
+    """
+    Stream a summary as it is generated. Events:
+      bullet / decision / action_item  one per completed element
+      reset                            provider failed; drop what you have
+      summary                          the persisted Summary row (last event)
+    """
+    uid, err = require_auth()
+    if err:
+        return err
+    m = Meeting.query.get_or_404(mid)
+    if m.creator_id != uid:
+        return jsonify({"error": "forbidden"}), 403
+    if not (m.raw_notes and m.title):
+        return jsonify({"error": "meeting must have title and raw_notes to summarize"}), 400
+
+    title, notes = m.title, m.raw_notes
+    h = meeting_content_hash(title, notes)
+    latest = latest_summary(mid)
+    if not (latest and latest.content_hash == h):
+        over_budget = _llm_budget_error(uid, m)
+        if over_budget:
+            return over_budget
+
+    def generate():
+        # first bytes out immediately so proxies/browsers open the stream
+        yield ": ok\n\n"
+        if latest and latest.content_hash == h:
+            yield _sse("summary", latest.to_dict())
+            return
+        events = stream_summary(title, notes)
         try:
-            meta = json.loads(latest.model_metadata or "{}")
-        except Exception:
-            meta = {}
-        if meta.get("content_hash") == h:
-            etag = content_hash(
-                str(latest.id),
-                latest.updated_at.isoformat() if latest.updated_at else "",
-            )
-            if check_if_none_match(etag):
-                return "", 304
-            return json_response(json.dumps(latest.to_dict()), etag_value=etag)
-
-    # Generate a fresh summary (OpenAI if configured, else stub)
-    result, meta = summarize_notes(m.title, m.raw_notes)
-
-    s = Summary(
-        meeting_id=mid,
-        bullets_json=json.dumps(result.get("summary_bullets", [])),
-        decisions_json=json.dumps(result.get("decisions", [])),
-        model_metadata=json.dumps({**meta, "content_hash": h}),
+            for event in events:
+                if event[0] == "item":
+                    yield _sse(SSE_EVENT_NAMES.get(event[1], event[1]), event[2])
+                elif event[0] == "fallback":
+                    yield _sse("reset", {})
+                else:
+                    s, _ = save_summary(mid, event[1], event[2], h, notes=notes)
+                    yield _sse("summary", s.to_dict())
+        except token_budget.BudgetExceeded as e:
+            yield _sse("error", {"error": "rate limited",
+                                 "retry_after": max(1, math.ceil(e.retry_after))})
+        except Exception as e:
+            print("[SSE ERROR]", repr(e))
+            yield _sse("error", {"error": "summarize failed"})
+        finally:
+            # client disconnects surface as GeneratorExit here; closing the
+            # inner generator closes the upstream OpenAI stream too
+            events.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    db.session.add(s)
-    db.session.commit()
 
-    etag = content_hash(str(s.id), s.updated_at.isoformat()
-                        if s.updated_at else "")
-    return json_response(json.dumps(s.to_dict()), status=201, etag_value=etag)
+
+# ---- Summarize job status (GET) ----
+@bp_meetings.get("/<int:mid>/summarize/jobs/<int:jid>")
+@query_budget(2)
+def summary_job_status(mid, jid):
+    uid, err = require_auth()
+    if err:
+        return err
+    m = Meeting.query.get_or_404(mid)
+    if m.creator_id != uid:
+        return jsonify({"error": "forbidden"}), 403
+    job = SummaryJob.query.filter_by(id=jid, meeting_id=mid).first_or_404()
+    data = job.to_dict()
+    if job.summary_id:
+        data["summary_url"] = url_for("meetings.get_latest_summary", mid=mid)
+    return jsonify(data), 200
 
 
 # ---- Read latest summary (GET) ----
 @bp_meetings.get("/<int:mid>/summary")
+@query_budget(2)
 def get_latest_summary(mid):
-    uid, err = _require_auth()
+    uid, err = require_auth()
     if err:
         return err
-    m = Meeting.query.get_or_404(mid)
-    if m.creator_id != uid:
+    # ownership + validators in one narrow query; pollers stop at the 304
+    stamp = latest_summary_stamp(mid)
+    if stamp is None:
+        abort(404)
+    if stamp.creator_id != uid:
         return jsonify({"error": "forbidden"}), 403
-
-    s = (
-        Summary.query.filter_by(meeting_id=mid)
-        .order_by(Summary.created_at.desc())
-        .first()
-    )
-    if not s:
+    if stamp.id is None:
         return jsonify({"error": "no summary"}), 404
 
-    etag = content_hash(str(s.id), s.updated_at.isoformat()
-                        if s.updated_at else "")
-    if check_if_none_match(etag):
-        return "", 304
-    return json_response(json.dumps(s.to_dict()), etag_value=etag)
+    etag = summary_etag(stamp)
+    if check_if_none_match(etag, stamp.updated_at):
+        return not_modified(etag, stamp.updated_at)
+    s = db.session.get(Summary, stamp.id)
+    if s is None:
+        return jsonify({"error": "no summary"}), 404
+    return json_response(json.dumps(s.to_dict()), etag_value=etag,
+                         last_modified=s.updated_at)
@@ -0,0 +1,57 @@
+import hmac
+import os
+from flask import Blueprint, request, jsonify
+import auth
+import calendar_sync
+import credential_cache
+import passwords
+import response_cache
+import summary_cache
+import token_budget
+from query_budget import query_budget
+from summarizer import PROVIDERS, get_provider, hedge_stats
+
+bp_metrics = Blueprint("metrics", __name__, url_prefix="/metrics")
+
+
+def _require_auth():
+    """A logged-in session, or `Authorization: Bearer $METRICS_TOKEN` for scrapers."""
+    token = os.getenv("METRICS_TOKEN")
+    header = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(header, f"Bearer {token}"):
+        return None
+    if not auth.current_user_id():
+        return jsonify({"error": "unauthorized"}), 401
+    return None
+
+
+# ---- LLM path metrics for this worker process (GET) ----
+@bp_metrics.get("")
+@query_budget(0)
+def get_metrics():
+    err = _require_auth()
+    if err:
+        return err
+    providers = {}
+    for name, p in PROVIDERS.items():
+        providers[name] = {
+            "max_concurrency": int(p.setting("max_concurrency")),
+            "timeout": p.setting("timeout"),
+            "prompt_cost_per_1m": p.setting("prompt_cost"),
+            "completion_cost_per_1m": p.setting("completion_cost"),
+            "breaker": p.breaker.snapshot(),
+        }
+    return jsonify({
+        "pid": os.getpid(),
+        "active_provider": get_provider().name,
+        "providers": providers,
+        "hedging": {"percentile": float(os.getenv("LLM_HEDGE_PERCENTILE", "0")), **hedge_stats},
+        "summary_cache": summary_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "password_hashing": passwords.pool_stats(),
+        "user_cache": auth.cache_stats(),
+        "credential_cache": credential_cache.cache_stats(),
+        "calendar_sync": dict(calendar_sync.stats),
+        "llm_usage_last_minute": token_budget.process_usage(60),
+        "llm_budget_available": token_budget.available(),
+    }), 200
@@ -0,0 +1,116 @@
+"""summary metadata columns
+
+Revision ID: cfb8c27a2d05
+Revises: d26199900aaa
+Create Date: 2026-10-17 06:45:14.628020
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cfb8c27a2d05'
+down_revision = 'd26199900aaa'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 500
+
+summary = sa.table(
+    'summary',
+    sa.column('id', sa.Integer),
+    sa.column('model_metadata', sa.Text),
+    sa.column('content_hash', sa.String),
+    sa.column('provider', sa.String),
+    sa.column('model', sa.String),
+    sa.column('prompt_version', sa.String),
+    sa.column('prompt_tokens', sa.Integer),
+    sa.column('completion_tokens', sa.Integer),
+    sa.column('total_tokens', sa.Integer),
+)
+
+
+def _backfill():
+    """
+    Copy fields out of the model_metadata JSON, walking ids in batches:
+    one SELECT and one executemany UPDATE per batch.
+    """
+    conn = op.get_bind()
+    stmt = summary.update().where(summary.c.id == sa.bindparam('b_id')).values(
+        content_hash=sa.bindparam('b_content_hash'),
+        provider=sa.bindparam('b_provider'),
+        model=sa.bindparam('b_model'),
+        prompt_version=sa.bindparam('b_prompt_version'),
+        prompt_tokens=sa.bindparam('b_prompt_tokens'),
+        completion_tokens=sa.bindparam('b_completion_tokens'),
+        total_tokens=sa.bindparam('b_total_tokens'),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(summary.c.id, summary.c.model_metadata)
+            .where(summary.c.id > last_id)
+            .order_by(summary.c.id)
+            .limit(BACKFILL_BATCH)
+        ).fetchall()
+        if not rows:
+            break
+        params = []
+        for sid, raw in rows:
+            try:
+                meta = json.loads(raw or "{}")
+            except ValueError:
+                meta = {}
+            usage = meta.get("usage") or {}
+            params.append({
+                'b_id': sid,
+                'b_content_hash': meta.get("content_hash"),
+                'b_provider': meta.get("provider"),
+                'b_model': meta.get("model"),
+                'b_prompt_version': meta.get("prompt_version"),
+                'b_prompt_tokens': usage.get("prompt_tokens"),
+                'b_completion_tokens': usage.get("completion_tokens"),
+                'b_total_tokens': usage.get("total_tokens"),
+            })
+        conn.execute(stmt, params)
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('summary', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('provider', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('model', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('prompt_version', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('prompt_tokens', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('completion_tokens', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('total_tokens', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_summary_content_hash'), ['content_hash'], unique=False)
+        batch_op.create_index('ix_summary_meeting_id_created_at', ['meeting_id', 'created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_summary_prompt_version'), ['prompt_version'], unique=False)
+        batch_op.create_index('ix_summary_provider_model', ['provider', 'model'], unique=False)
+
+    # ### end Alembic commands ###
+
+    _backfill()
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('summary', schema=None) as batch_op:
+        batch_op.drop_index('ix_summary_provider_model')
+        batch_op.drop_index(batch_op.f('ix_summary_prompt_version'))
+        batch_op.drop_index('ix_summary_meeting_id_created_at')
+        batch_op.drop_index(batch_op.f('ix_summary_content_hash'))
+        batch_op.drop_column('total_tokens')
+        batch_op.drop_column('completion_tokens')
+        batch_op.drop_column('prompt_tokens')
+        batch_op.drop_column('prompt_version')
+        batch_op.drop_column('model')
+        batch_op.drop_column('provider')
+        batch_op.drop_column('content_hash')
+
+    # ### end Alembic commands ###
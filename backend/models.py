@@ -1,5 +1,8 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session, validates
+from utils import description_hash
 
 db = SQLAlchemy()
 
@@ -12,6 +15,9 @@ class User(db.Model):
     name = db.Column(db.String(255), nullable=False)
     password_hash = db.Column(db.LargeBinary, nullable=False)  # bcrypt hash
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # bumped whenever one of the user's meetings changes (list ETag)
+    meetings_version = db.Column(db.Integer, default=1, nullable=False,
+                                 server_default="1")
 
     meetings = db.relationship("Meeting", backref="creator", lazy=True)
 
@@ -33,6 +39,8 @@ class Meeting(db.Model):
     # store a JSON string of attendees
     attendees_json = db.Column(db.Text, nullable=True)
     raw_notes = db.Column(db.Text, nullable=True)
+    # bumped on every write to the meeting, its summaries or action items (detail ETag)
+    version = db.Column(db.Integer, default=1, nullable=False, server_default="1")
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
@@ -42,18 +50,30 @@ class Meeting(db.Model):
         "Summary", backref="meeting", lazy=True, cascade="all, delete-orphan")
     action_items = db.relationship(
         "ActionItem", backref="meeting", lazy=True, cascade="all, delete-orphan")
+    summary_jobs = db.relationship(
+        "SummaryJob", backref="meeting", lazy=True, cascade="all, delete-orphan")
+    notes_snapshot = db.relationship(
+        "NotesSnapshot", uselist=False, lazy=True, cascade="all, delete-orphan")
 
-    def to_dict(self, include_children=False):
-        data = {
-            "id": self.id,
-            "creator_id": self.creator_id,
-            "title": self.title,
-            "meeting_date": self.meeting_date.isoformat() if self.meeting_date else None,
-            "attendees_json": self.attendees_json,
-            "raw_notes": self.raw_notes,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+    # list_meetings: WHERE creator_id = ? ORDER BY meeting_date, id
+    # calendar import: upsert ON CONFLICT (creator_id, external_event_id)
+    __table_args__ = (
+        db.Index("ix_meeting_creator_id_meeting_date",
+                 "creator_id", "meeting_date", "id"),
+        db.Index("ux_meeting_creator_id_external_event_id",
+                 "creator_id", "external_event_id", unique=True),
+    )
+
+    # Columns exposed by to_dict (and selectable via GET /meetings?fields=)
+    FIELDS = ("id", "creator_id", "title", "meeting_date", "attendees_json",
+              "raw_notes", "created_at", "updated_at")
+
+    def to_dict(self, include_children=False, fields=None):
+        # Only touch the requested columns so deferred ones (raw_notes) stay unloaded
+        data = {}
+        for f in fields or self.FIELDS:
+            value = getattr(self, f)
+            data[f] = value.isoformat() if isinstance(value, datetime) else value
         if include_children:
             data["summaries"] = [s.to_dict() for s in self.summaries]
             data["action_items"] = [a.to_dict() for a in self.action_items]
@@ -72,10 +92,24 @@ class Summary(db.Model):
     # JSON of provider/model/tokens/prompt version
     model_metadata = db.Column(db.Text, nullable=True)
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Promoted from model_metadata so cache checks and cost reports don't parse JSON
+    content_hash = db.Column(db.String(64), nullable=True, index=True)
+    provider = db.Column(db.String(32), nullable=True)
+    model = db.Column(db.String(64), nullable=True)
+    prompt_version = db.Column(db.String(32), nullable=True, index=True)
+    prompt_tokens = db.Column(db.Integer, nullable=True)
+    completion_tokens = db.Column(db.Integer, nullable=True)
+    total_tokens = db.Column(db.Integer, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index("ix_summary_meeting_id_created_at", "meeting_id", "created_at"),
+        db.Index("ix_summary_provider_model", "provider", "model"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -83,21 +117,116 @@ class Summary(db.Model):
             "bullets_json": self.bullets_json,
             "decisions_json": self.decisions_json,
             "model_metadata": self.model_metadata,
+            "content_hash": self.content_hash,
+            "provider": self.provider,
+            "model": self.model,
+            "prompt_version": self.prompt_version,
+            "total_tokens": self.total_tokens,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
+# ---- NotesSnapshot (notes + result the latest summary was built from) ----
+
+
+class NotesSnapshot(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(db.Integer, db.ForeignKey(
+        "meeting.id"), nullable=False, unique=True, index=True)
+    content_hash = db.Column(db.String(64), nullable=False)
+    raw_notes = db.Column(db.Text, nullable=False)
+    # full structured result (incl. action_items) for incremental updates
+    result_json = db.Column(db.Text, nullable=False)
+    # what produced result_json; only a base for the same provider/model/prompt
+    provider = db.Column(db.String(32), nullable=True)
+    model = db.Column(db.String(64), nullable=True)
+    prompt_version = db.Column(db.String(32), nullable=True)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# ---- SummaryJob (async summarize queue) ----
+
+
+class SummaryJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(db.Integer, db.ForeignKey(
+        "meeting.id"), nullable=False)
+    # hash of (title, raw_notes, prompt version) at enqueue time
+    content_hash = db.Column(db.String(64), nullable=False, index=True)
+    # queued | running | done | failed
+    status = db.Column(db.String(16), nullable=False,
+                       default="queued", index=True)
+    summary_id = db.Column(db.Integer, db.ForeignKey(
+        "summary.id", ondelete="SET NULL"), nullable=True)
+    # also persist the extracted action items (see summaries.save_summary)
+    create_action_items = db.Column(db.Boolean, nullable=False, default=False)
+    error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "meeting_id": self.meeting_id,
+            "status": self.status,
+            "summary_id": self.summary_id,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+# ---- SummaryCacheEntry (cross-meeting LLM result cache) ----
+
+
+class SummaryCacheEntry(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # sha256 of (content_hash, provider, model)
+    cache_key = db.Column(db.String(64), unique=True,
+                          nullable=False, index=True)
+    content_hash = db.Column(db.String(64), nullable=False)
+    provider = db.Column(db.String(32), nullable=False)
+    model = db.Column(db.String(64), nullable=False)
+    result_json = db.Column(db.Text, nullable=False)
+    meta_json = db.Column(db.Text, nullable=True)
+    hits = db.Column(db.Integer, default=0, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+# ---- BackfillCheckpoint (resumable bulk CLI runs) ----
+
+
+class BackfillCheckpoint(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # e.g. "resummarize:v2"; one row per logical run
+    name = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    last_meeting_id = db.Column(db.Integer, default=0, nullable=False)
+    processed = db.Column(db.Integer, default=0, nullable=False)
+    skipped = db.Column(db.Integer, default=0, nullable=False)
+    failed = db.Column(db.Integer, default=0, nullable=False)
+    total_tokens = db.Column(db.Integer, default=0, nullable=False)
+
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
 # ---- ActionItem ----
 
 
 class ActionItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     meeting_id = db.Column(db.Integer, db.ForeignKey(
-        "meeting.id"), nullable=False)
+        "meeting.id"), nullable=False, index=True)
 
     assignee_id = db.Column(db.Integer, db.ForeignKey(
-        "user.id"), nullable=True)  # optional assignee
+        "user.id"), nullable=True, index=True)  # optional assignee
     description = db.Column(db.String(500), nullable=False)
+    # normalized description hash, used to dedupe LLM-extracted items
+    description_hash = db.Column(db.String(64), nullable=True)
     # low | medium | high
     priority = db.Column(db.String(16), default="medium")
     due_date = db.Column(db.Date, nullable=True)
@@ -110,6 +239,29 @@ class ActionItem(db.Model):
 
     assignee = db.relationship("User", foreign_keys=[assignee_id])
 
+    __table_args__ = (
+        db.Index("ix_action_item_meeting_id_description_hash",
+                 "meeting_id", "description_hash"),
+    )
+
+    @validates("description")
+    def _hash_description(self, key, value):
+        self.description_hash = description_hash(value)
+        return value
+
+    @classmethod
+    def bulk_insert(cls, rows: list) -> list:
+        """INSERT ... RETURNING for many item dicts (bypasses ORM events); caller commits."""
+        if not rows:
+            return []
+        now = datetime.utcnow()
+        rows = [{"created_at": now, "updated_at": now,
+                 "description_hash": description_hash(r["description"]), **r}
+                for r in rows]
+        items = list(db.session.scalars(insert(cls).returning(cls), rows))
+        bump_versions(meeting_ids={r["meeting_id"] for r in rows})
+        return items
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -134,3 +286,101 @@ class IntegrationToken(db.Model):
     refresh_token_encrypted = db.Column(db.LargeBinary, nullable=True)
     scopes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # one token row per user + provider; also the lookup every google route does
+    __table_args__ = (
+        db.Index("ux_integration_token_user_id_provider",
+                 "user_id", "provider", unique=True),
+    )
+
+# ---- Calendar (local copy of Google Calendar, see calendar_sync.py) ----
+
+
+class CalendarEvent(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    calendar_id = db.Column(db.String(255), nullable=False, default="primary")
+    event_id = db.Column(db.String(1024), nullable=False)   # Google's id
+    status = db.Column(db.String(32), nullable=True)
+    summary = db.Column(db.Text, nullable=True)
+    # as Google sent them (dateTime or all-day date) ...
+    start_raw = db.Column(db.String(64), nullable=True)
+    end_raw = db.Column(db.String(64), nullable=True)
+    # ... and as naive UTC for filtering/ordering
+    start_at = db.Column(db.DateTime, nullable=True)
+    end_at = db.Column(db.DateTime, nullable=True)
+    html_link = db.Column(db.Text, nullable=True)
+    attendees_json = db.Column(db.Text, nullable=True)
+    updated = db.Column(db.DateTime, nullable=True)   # Google's last-modified
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ux_calendar_event_user_calendar_event",
+                 "user_id", "calendar_id", "event_id", unique=True),
+        # GET /google/events: upcoming events for a user by start time
+        db.Index("ix_calendar_event_user_id_start_at", "user_id", "start_at"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.event_id,
+            "summary": self.summary,
+            "start": self.start_raw,
+            "end": self.end_raw,
+            "htmlLink": self.html_link,
+        }
+
+
+class CalendarSyncState(db.Model):
+    """Where incremental sync left off for one user's calendar."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    calendar_id = db.Column(db.String(255), nullable=False, default="primary")
+    sync_token = db.Column(db.Text, nullable=True)   # nextSyncToken from the last sync
+    synced_at = db.Column(db.DateTime, nullable=True)
+    full_synced_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ux_calendar_sync_state_user_calendar",
+                 "user_id", "calendar_id", unique=True),
+    )
+
+# ---- Version counters (ETags for GET /meetings and /meetings/<id>) ----
+
+
+def bump_versions(meeting_ids=(), user_ids=(), session=None):
+    """
+    Increment Meeting.version / User.meetings_version in the current
+    transaction of `session` (default: db.session). Runs automatically
+    before each flush; bulk statements that bypass the unit of work
+    (insert()/update()/delete() executes) call it themselves.
+    """
+    session = session or db.session
+    meeting_ids = {i for i in meeting_ids if i is not None}
+    user_ids = {i for i in user_ids if i is not None}
+    if meeting_ids:
+        t = Meeting.__table__
+        # keep updated_at: a version bump isn't an edit of the meeting itself
+        session.execute(update(t).where(t.c.id.in_(meeting_ids))
+                        .values(version=t.c.version + 1, updated_at=t.c.updated_at))
+    if user_ids:
+        t = User.__table__
+        session.execute(update(t).where(t.c.id.in_(user_ids))
+                        .values(meetings_version=t.c.meetings_version + 1))
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_versions_on_flush(session, flush_context, instances):
+    meeting_ids, user_ids = set(), set()
+    changed = [o for o in session.dirty if session.is_modified(o)]
+    for obj in [*session.new, *changed, *session.deleted]:
+        if isinstance(obj, Meeting):
+            meeting_ids.add(obj.id)
+            user_ids.add(obj.creator_id)
+        elif isinstance(obj, (Summary, ActionItem)):
+            meeting_ids.add(obj.meeting_id)
+    # no point bumping a meeting that is being deleted (with its children)
+    meeting_ids -= {o.id for o in session.deleted if isinstance(o, Meeting)}
+    if meeting_ids or user_ids:
+        # the flushing session, which isn't necessarily db.session
+        bump_versions(meeting_ids, user_ids, session=session)
@@ -0,0 +1,141 @@
+"""
+bcrypt hashing off the request threads.
+
+Hashes and checks run in a small per-process ProcessPoolExecutor
+(PASSWORD_HASH_WORKERS, default half the cores; 0 = inline in the caller).
+create_app() builds it with init_pool(); its workers are started by
+forkserver (or spawn), never forked from the threaded server.
+At most PASSWORD_HASH_QUEUE calls may be queued or running; past that
+HashingBusy is raised at once so the route can answer 503 instead of
+holding a request thread behind a login storm.
+
+The cost factor is BCRYPT_ROUNDS (default 12). needs_rehash() reports
+stored hashes made with a different cost so login can upgrade them.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+import bcrypt
+from utils import process_context
+
+
+class HashingBusy(Exception):
+    """The hashing pool is saturated; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(f"password hashing busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def rounds() -> int:
+    return int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+
+def _workers() -> int:
+    default = max(1, (os.cpu_count() or 1) // 2)
+    return int(os.getenv("PASSWORD_HASH_WORKERS", str(default)))
+
+
+def _max_queue() -> int:
+    return int(os.getenv("PASSWORD_HASH_QUEUE", str(max(1, _workers()) * 4)))
+
+
+# ---- worker functions (run in the pool; must be top-level to pickle) ----
+
+
+def _hashpw(pw: bytes, cost: int) -> bytes:
+    return bcrypt.hashpw(pw, bcrypt.gensalt(rounds=cost))
+
+
+def _checkpw(pw: bytes, hashed: bytes) -> bool:
+    try:
+        return bcrypt.checkpw(pw, hashed)
+    except Exception:
+        return False
+
+
+# ---- pool ----
+
+_pool = None
+_pool_lock = threading.Lock()
+_in_flight = 0
+stats = {"submitted": 0, "rejected": 0, "inline": 0}
+
+
+def _reset_after_fork():
+    global _pool, _in_flight
+    _pool = None  # its worker processes belong to the parent
+    _in_flight = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _new_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+
+
+def init_pool():
+    """Create the hashing pool at startup; _run() still creates it lazily after a fork."""
+    global _pool
+    workers = _workers()
+    with _pool_lock:
+        if workers > 0 and _pool is None:
+            _pool = _new_pool(workers)
+
+
+def _done(_future):
+    global _in_flight
+    with _pool_lock:
+        _in_flight -= 1
+
+
+def _run(fn, *args):
+    global _pool, _in_flight
+    workers = _workers()
+    if workers <= 0:
+        with _pool_lock:
+            stats["inline"] += 1
+        return fn(*args)
+    with _pool_lock:
+        if _in_flight >= _max_queue():
+            stats["rejected"] += 1
+            raise HashingBusy()
+        if _pool is None:
+            _pool = _new_pool(workers)
+        _in_flight += 1
+        stats["submitted"] += 1
+        future = _pool.submit(fn, *args)
+    future.add_done_callback(_done)
+    try:
+        return future.result(timeout=float(os.getenv("PASSWORD_HASH_TIMEOUT", "10")))
+    except FutureTimeout:
+        future.cancel()
+        raise HashingBusy() from None
+
+
+def pool_stats() -> dict:
+    with _pool_lock:
+        return {**stats, "in_flight": _in_flight, "max_queue": _max_queue(),
+                "workers": _workers(), "rounds": rounds()}
+
+
+# ---- public API ----
+
+
+def hash_password(pw: str) -> bytes:
+    return _run(_hashpw, pw.encode("utf-8"), rounds())
+
+
+def check_password(pw: str, hashed: bytes) -> bool:
+    return _run(_checkpw, pw.encode("utf-8"), bytes(hashed))
+
+
+def needs_rehash(hashed: bytes) -> bool:
+    """True if `hashed` wasn't made with the current BCRYPT_ROUNDS."""
+    try:
+        return int(bytes(hashed).split(b"$")[2]) != rounds()
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,91 @@
+"""
+Per-request SQL statement counting.
+
+Routes declare an upper bound with @query_budget(n). With
+QUERY_BUDGET_MODE=warn the app logs requests that go over budget, with
+QUERY_BUDGET_MODE=raise it fails them (use this under the test client),
+and in both modes the count is sent back as X-Query-Count.
+
+For scripts/tests outside a request:
+
+    with count_queries() as qc:
+        ...
+    assert qc.count <= 3
+"""
+import threading
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_local = threading.local()
+
+
+def query_budget(n: int):
+    """Declare the max number of SQL statements a view may run."""
+    def deco(fn):
+        fn._query_budget = n
+        return fn
+    return deco
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def add(self, statement: str):
+        self.count += 1
+        self.statements.append(statement)
+
+
+def _listen():
+    if not event.contains(Engine, "before_cursor_execute", _on_execute):
+        event.listen(Engine, "before_cursor_execute", _on_execute)
+
+
+@contextmanager
+def count_queries():
+    _listen()
+    prev = getattr(_local, "counter", None)
+    _local.counter = qc = QueryCounter()
+    try:
+        yield qc
+    finally:
+        _local.counter = prev
+
+
+def _on_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = getattr(_local, "counter", None)
+    if counter is not None:
+        counter.add(statement)
+    if has_request_context() and "query_counter" in g:
+        g.query_counter.add(statement)
+
+
+def _before_request():
+    g.query_counter = QueryCounter()
+
+
+def _after_request(resp):
+    qc = g.get("query_counter")
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, "_query_budget", None)
+    if qc is None:
+        return resp
+    resp.headers["X-Query-Count"] = str(qc.count)
+    if budget is not None and qc.count > budget:
+        msg = (f"{request.method} {request.path} ({request.endpoint}) ran "
+               f"{qc.count} SQL statements, budget is {budget}")
+        if current_app.config["QUERY_BUDGET_MODE"] == "raise":
+            raise AssertionError(msg + ":\n" + "\n".join(qc.statements))
+        print("[QUERY BUDGET]", msg)
+    return resp
+
+
+def init_app(app):
+    if app.config["QUERY_BUDGET_MODE"] not in ("warn", "raise"):
+        return
+    _listen()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,123 @@
+"""
+EXPLAIN check for the queries our routes run.
+
+    flask check-query-plans
+
+Runs EXPLAIN on each route query (SQLite: EXPLAIN QUERY PLAN, Postgres:
+EXPLAIN with seq scans disabled so we see whether an index path exists)
+and exits non-zero if any of them falls back to a full table scan.
+Keep ROUTE_QUERIES in sync when a route's WHERE / ORDER BY changes.
+"""
+import re
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from models import (db, User, Meeting, Summary, SummaryJob, ActionItem, IntegrationToken,
+                    CalendarEvent, CalendarSyncState)
+
+
+def _route_queries():
+    uid, mid = 1, 1
+    return {
+        "auth.login": User.query.filter_by(email="a@example.com"),
+        "meetings.list_meetings": (
+            Meeting.query.filter_by(creator_id=uid)
+            .order_by(Meeting.meeting_date.asc().nullslast(), Meeting.id.asc())
+        ),
+        "meetings.get_meeting": Meeting.query.filter_by(id=mid),
+        "meetings.get_meeting:summaries": Summary.query.filter_by(meeting_id=mid),
+        "meetings.get_latest_summary": (
+            db.session.query(Meeting.creator_id, Summary.id, Summary.updated_at)
+            .outerjoin(Summary, Summary.meeting_id == Meeting.id)
+            .filter(Meeting.id == mid)
+            .order_by(Summary.created_at.desc()).limit(1)
+        ),
+        "meetings.summarize:job_dedupe": SummaryJob.query.filter(
+            SummaryJob.meeting_id == mid,
+            SummaryJob.content_hash == "0" * 64,
+            SummaryJob.status.in_(("queued", "running")),
+        ),
+        "action_items.list_items": ActionItem.query.filter_by(meeting_id=mid),
+        "action_items.by_assignee": ActionItem.query.filter_by(assignee_id=uid),
+        "google.token": IntegrationToken.query.filter_by(user_id=uid, provider="google"),
+        "google.list_events:state": CalendarSyncState.query.filter_by(
+            user_id=uid, calendar_id="primary"),
+        "google.list_events": (
+            CalendarEvent.query.filter(
+                CalendarEvent.user_id == uid, CalendarEvent.calendar_id == "primary",
+                CalendarEvent.end_at >= "2024-01-01")
+            .order_by(CalendarEvent.start_at).limit(10)
+        ),
+        "calendar_import.events": (
+            db.session.query(CalendarEvent.event_id, CalendarEvent.summary, CalendarEvent.start_at)
+            .filter(CalendarEvent.user_id == uid, CalendarEvent.calendar_id == "primary",
+                    CalendarEvent.end_at >= "2024-01-01", CalendarEvent.start_at < "2024-01-15")
+        ),
+        "calendar_import.orm_upsert": Meeting.query.filter(
+            Meeting.creator_id == uid, Meeting.external_event_id.in_(["a", "b"])),
+        "google.list_events:sync_lookup": CalendarEvent.query.filter(
+            CalendarEvent.user_id == uid, CalendarEvent.calendar_id == "primary",
+            CalendarEvent.event_id.in_(["a", "b"])),
+        "usage.get_usage:global": Summary.query.filter(Summary.created_at >= "2024-01-01"),
+        "usage.get_usage:user": (
+            Summary.query.join(Meeting, Meeting.id == Summary.meeting_id)
+            .filter(Meeting.creator_id == uid, Summary.created_at >= "2024-01-01")
+        ),
+    }
+
+
+def _sql(query) -> str:
+    return str(query.statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _sqlite_scans(conn, sql):
+    rows = conn.execute(text("EXPLAIN QUERY PLAN " + sql)).fetchall()
+    details = [r[-1] for r in rows]
+    # "SCAN meeting" is a table scan; "SCAN meeting USING INDEX ..." is not.
+    bad = [d for d in details if d.startswith("SCAN ") and " USING " not in d]
+    return details, bad
+
+
+def _postgres_scans(conn, sql):
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    rows = conn.execute(text("EXPLAIN " + sql)).fetchall()
+    details = [r[0] for r in rows]
+    bad = [d for d in details if re.search(r"\bSeq Scan on\b", d)]
+    return details, bad
+
+
+def check_query_plans(verbose: bool = False) -> list:
+    """Return [(route, plan_line)] for every route query that table-scans."""
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        explain = _sqlite_scans
+    elif dialect == "postgresql":
+        explain = _postgres_scans
+    else:
+        raise click.ClickException(f"unsupported dialect: {dialect}")
+
+    failures = []
+    with db.engine.connect() as conn:
+        for name, query in _route_queries().items():
+            with conn.begin():
+                details, bad = explain(conn, _sql(query))
+            if verbose:
+                click.echo(f"{name}:")
+                for d in details:
+                    click.echo(f"    {d}")
+            failures.extend((name, d) for d in bad)
+    return failures
+
+
+@click.command("check-query-plans")
+@click.option("-v", "--verbose", is_flag=True, help="Print every plan.")
+@with_appcontext
+def check_query_plans_command(verbose):
+    """Fail if any route query falls back to a table scan."""
+    failures = check_query_plans(verbose)
+    for name, detail in failures:
+        click.echo(f"TABLE SCAN  {name}: {detail}", err=True)
+    if failures:
+        raise SystemExit(1)
+    click.echo("ok: no table scans")
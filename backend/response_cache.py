@@ -0,0 +1,51 @@
+"""
+In-process LRU of serialized GET /meetings bodies.
+
+Keys carry the version counter the ETag is built from (User.meetings_version
+for the list, Meeting.version for the detail; see models.bump_versions), so
+writes never invalidate anything here: the next request asks for a new key
+and stale entries fall off the end of the LRU. Per worker, like the memory
+tier of summary_cache.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+_lock = threading.Lock()
+_entries = OrderedDict()   # key -> (body, headers)
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+
+def get(key):
+    with _lock:
+        hit = _entries.get(key)
+        if hit is None:
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        return hit
+
+
+def put(key, body: str, headers: dict | None = None):
+    if MAX_ENTRIES <= 0:
+        return
+    with _lock:
+        _entries[key] = (body, dict(headers or {}))
+        _entries.move_to_end(key)
+        _stats["stores"] += 1
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "entries": len(_entries), "size": MAX_ENTRIES}
+
+
+def clear():
+    with _lock:
+        _entries.clear()
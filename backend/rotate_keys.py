@@ -0,0 +1,75 @@
+"""
+Re-encrypt stored integration tokens under the newest Fernet key.
+
+    flask rotate-tokens [--batch-size 200] [--dry-run]
+
+Rotation: put the new key first in FERNET_KEYS and keep the old ones after
+it (everything stays readable), run this command, and once it reports no
+rows left on older keys, drop the old keys from FERNET_KEYS.
+
+Rows are read by id a page at a time with one commit per page. Each column
+is written with a compare-and-set on its old ciphertext, so a token the app
+refreshes mid-run is left alone rather than overwritten; re-run to pick it
+up. Safe to interrupt and re-run.
+"""
+import click
+from cryptography.fernet import InvalidToken
+from flask.cli import with_appcontext
+from sqlalchemy import update
+from models import db, IntegrationToken
+from utils import needs_rotation, rotate_bytes
+
+COLUMNS = (IntegrationToken.access_token_encrypted, IntegrationToken.refresh_token_encrypted)
+
+
+def _rotate_row(row, dry_run: bool):
+    """Number of columns moved to the newest key (or that would be)."""
+    moved = 0
+    for col, old in zip(COLUMNS, (row.access_token_encrypted, row.refresh_token_encrypted)):
+        if not old or not needs_rotation(old):
+            continue
+        new = rotate_bytes(old)   # InvalidToken when no configured key fits
+        if not dry_run:
+            res = db.session.execute(
+                update(IntegrationToken)
+                .where(IntegrationToken.id == row.id, col == old)
+                .values({col.key: new}))
+            if res.rowcount == 0:
+                continue   # changed under us; it was written with the newest key
+        moved += 1
+    return moved
+
+
+@click.command("rotate-tokens")
+@click.option("--batch-size", default=200, show_default=True,
+              help="Rows per page; one commit per page.")
+@click.option("--dry-run", is_flag=True, help="Only count rows still on older keys.")
+@with_appcontext
+def rotate_tokens_command(batch_size, dry_run):
+    """Re-encrypt IntegrationToken rows with the first key in FERNET_KEYS."""
+    last_id, seen, rotated, failed = 0, 0, 0, 0
+    while True:
+        rows = (
+            db.session.query(IntegrationToken.id, *COLUMNS)
+            .filter(IntegrationToken.id > last_id)
+            .order_by(IntegrationToken.id).limit(batch_size).all()
+        )
+        if not rows:
+            break
+        for row in rows:
+            try:
+                rotated += bool(_rotate_row(row, dry_run))
+            except InvalidToken:
+                failed += 1
+                print("[ROTATE TOKENS] no configured key decrypts row", row.id)
+        if not dry_run:
+            db.session.commit()
+        seen += len(rows)
+        last_id = rows[-1].id
+        click.echo(f"{seen} rows checked, {rotated} "
+                   f"{'on older keys' if dry_run else 'rotated'}, {failed} undecryptable")
+
+    click.echo(f"done: {seen} rows, {rotated} {'need rotation' if dry_run else 'rotated'}, "
+               f"{failed} undecryptable")
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,216 @@
+import json
+from datetime import date, datetime
+from os import getenv
+from sqlalchemy import func, insert, or_, select, update
+from models import db, bump_versions, ActionItem, Meeting, NotesSnapshot, Summary, User
+from summarizer import get_provider
+from utils import content_hash, description_hash
+
+
+def meeting_content_hash(title: str, raw_notes: str) -> str:
+    # Include prompt version in the content hash so changing the prompt forces regeneration
+    return content_hash(title, raw_notes, getenv("PROMPT_VERSION", "v1"))
+
+
+def latest_summary(meeting_id: int):
+    """Most recent Summary row for a meeting (or None)."""
+    return (
+        Summary.query.filter_by(meeting_id=meeting_id)
+        .order_by(Summary.created_at.desc())
+        .first()
+    )
+
+
+def latest_summary_stamp(meeting_id: int):
+    """
+    (creator_id, id, updated_at) for a meeting and its latest summary, from
+    one narrow query on ix_summary_meeting_id_created_at. None if the meeting
+    doesn't exist; id/updated_at are None if it has no summary yet.
+    """
+    return (
+        db.session.query(Meeting.creator_id, Summary.id, Summary.updated_at)
+        .outerjoin(Summary, Summary.meeting_id == Meeting.id)
+        .filter(Meeting.id == meeting_id)
+        .order_by(Summary.created_at.desc())
+        .first()
+    )
+
+
+def summary_etag(s) -> str:
+    """ETag of a Summary (or any row with its id and updated_at)."""
+    return content_hash(str(s.id), s.updated_at.isoformat() if s.updated_at else "")
+
+
+def _owner_map(owners) -> dict:
+    """lowercased email/name -> user id, built with one query for all owners."""
+    keys = {o.strip().lower() for o in owners if o and o.strip()}
+    if not keys:
+        return {}
+    users = (
+        db.session.query(User.id, User.email, User.name)
+        .filter(or_(func.lower(User.email).in_(keys), func.lower(User.name).in_(keys)))
+        .all()
+    )
+    out = {}
+    for uid, email, name in users:
+        # email matches win over (possibly ambiguous) name matches
+        out.setdefault((name or "").lower(), uid)
+    for uid, email, name in users:
+        out[(email or "").lower()] = uid
+    return out
+
+
+def _parse_due(value):
+    try:
+        return date.fromisoformat(value[:10]) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def add_extracted_action_items(meeting_id: int, extracted: list) -> list:
+    """
+    Bulk-insert summarizer action items for a meeting, skipping any whose
+    normalized description already exists there. Does not commit.
+    """
+    existing = {
+        h for (h,) in db.session.query(ActionItem.description_hash)
+        .filter_by(meeting_id=meeting_id)
+    }
+    owners = _owner_map(a.get("owner") for a in extracted)
+
+    rows = []
+    for a in extracted:
+        desc = (a.get("description") or "").strip()[:500]
+        h = description_hash(desc)
+        if not desc or h in existing:
+            continue
+        existing.add(h)
+        rows.append({
+            "meeting_id": meeting_id,
+            "description": desc,
+            "priority": a.get("priority") or "medium",
+            "status": "open",
+            "assignee_id": owners.get((a.get("owner") or "").strip().lower()),
+            "due_date": _parse_due(a.get("due_date")),
+        })
+    return ActionItem.bulk_insert(rows)
+
+
+def _provenance(meta: dict) -> dict:
+    return {"provider": meta.get("provider"), "model": meta.get("model"),
+            "prompt_version": meta.get("prompt_version")}
+
+
+def _is_base(meta: dict) -> bool:
+    """Only LLM results are a base for incremental updates; stub/fallback ones aren't."""
+    return bool(meta.get("provider")) and meta.get("provider") != "stub"
+
+
+def previous_version(meeting_id: int):
+    """
+    (raw_notes, result) the latest LLM summary was built from, or None.
+    Only a snapshot made by the provider, model and PROMPT_VERSION that would
+    summarize now is returned; anything else takes the full summarize path.
+    """
+    provider = get_provider()
+    if provider.name == "stub":
+        return None
+    snap = NotesSnapshot.query.filter_by(
+        meeting_id=meeting_id, provider=provider.name, model=provider.model(),
+        prompt_version=getenv("PROMPT_VERSION", "v1")).first()
+    if snap is None:
+        return None
+    return snap.raw_notes, json.loads(snap.result_json)
+
+
+def _save_snapshot(meeting_id: int, notes: str, result: dict, meta: dict, h: str):
+    if not _is_base(meta):
+        return
+    snap = NotesSnapshot.query.filter_by(meeting_id=meeting_id).first()
+    if snap is None:
+        snap = NotesSnapshot(meeting_id=meeting_id)
+        db.session.add(snap)
+    snap.raw_notes = notes
+    snap.result_json = json.dumps(result)
+    snap.content_hash = h
+    for key, value in _provenance(meta).items():
+        setattr(snap, key, value)
+
+
+def _save_snapshots_bulk(items):
+    """
+    _save_snapshot for many meetings: one SELECT for the existing rows, then
+    an executemany INSERT for new meetings and an executemany UPDATE (by id)
+    for the rest. items: (meeting_id, notes, result, meta, content_hash).
+    """
+    values = {mid: {"meeting_id": mid, "raw_notes": notes, "result_json": json.dumps(result),
+                    "content_hash": h, "updated_at": datetime.utcnow(), **_provenance(meta)}
+              for mid, notes, result, meta, h in items if _is_base(meta)}
+    if not values:
+        return
+    existing = dict(db.session.execute(
+        select(NotesSnapshot.meeting_id, NotesSnapshot.id)
+        .where(NotesSnapshot.meeting_id.in_(list(values)))).all())
+    new = [v for mid, v in values.items() if mid not in existing]
+    changed = [{**v, "id": existing[mid]} for mid, v in values.items() if mid in existing]
+    if new:
+        db.session.execute(insert(NotesSnapshot), new)
+    if changed:
+        db.session.execute(update(NotesSnapshot), changed)
+
+
+def _summary_values(meeting_id: int, result: dict, meta: dict, h: str) -> dict:
+    usage = meta.get("usage") or {}
+    return {
+        "meeting_id": meeting_id,
+        "bullets_json": json.dumps(result.get("summary_bullets", [])),
+        "decisions_json": json.dumps(result.get("decisions", [])),
+        "model_metadata": json.dumps({**meta, "content_hash": h}),
+        "content_hash": h,
+        "provider": meta.get("provider"),
+        "model": meta.get("model"),
+        "prompt_version": meta.get("prompt_version"),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "total_tokens": usage.get("total_tokens"),
+    }
+
+
+def save_summaries_bulk(rows, notes: dict | None = None) -> int:
+    """
+    Insert many summaries with one executemany INSERT.
+    rows: list of (meeting_id, result, meta, content_hash). notes maps
+    meeting_id -> summarized raw_notes to refresh the incremental-update
+    snapshots, as save_summary does (in bulk too). Does not commit.
+    """
+    values = [_summary_values(*r) for r in rows]
+    if values:
+        db.session.execute(insert(Summary), values)
+        bump_versions(meeting_ids={v["meeting_id"] for v in values})
+    if notes:
+        _save_snapshots_bulk((meeting_id, notes[meeting_id], result, meta, h)
+                             for meeting_id, result, meta, h in rows)
+    return len(values)
+
+
+def save_summary(meeting_id: int, result: dict, meta: dict, h: str,
+                 with_action_items: bool = False, notes: str | None = None):
+    """
+    Persist a summarizer result for a meeting and commit.
+    Shared by the inline summarize route and the background job workers.
+    With with_action_items the extracted action items are inserted in the
+    same transaction. Passing the summarized notes keeps them (and the full
+    result) as the base for the next incremental re-summarize; stub and
+    fallback results are never used as a base.
+    Returns (summary, created_items).
+    """
+    s = Summary(**_summary_values(meeting_id, result, meta, h))
+    db.session.add(s)
+    if notes is not None:
+        _save_snapshot(meeting_id, notes, result, meta, h)
+    created = []
+    if with_action_items:
+        created = [a.to_dict() for a in add_extracted_action_items(
+            meeting_id, result.get("action_items", []))]
+    db.session.commit()
+    return s, created
@@ -1,8 +1,27 @@
+import abc
+import atexit
+import difflib
 import json
+import logging
 import os
+import random
+import re
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor,
+                                TimeoutError as FutureTimeout, wait)
+from itertools import islice
+from email.utils import parsedate_to_datetime
 from typing import Tuple
 from jsonschema import Draft202012Validator
+import summary_cache
+from circuit_breaker import CircuitBreaker, CircuitOpen
+import token_budget
+from utils import content_hash, process_context
+
+log = logging.getLogger(__name__)
 
 SCHEMA = {
     "type": "object",
@@ -29,32 +48,84 @@ SCHEMA = {
 }
 
 
+# Compiled once; building a validator per call costs more than validating.
+_VALIDATOR = Draft202012Validator(SCHEMA)
+SCHEMA_TEXT = json.dumps(SCHEMA, indent=2)
+_TOP_KEYS = frozenset(SCHEMA["required"])
+_PRIORITIES = frozenset(
+    SCHEMA["properties"]["action_items"]["items"]["properties"]["priority"]["enum"])
+
+
+def _fast_check(data) -> bool:
+    """
+    Hand-rolled check for this fixed SCHEMA. Returns True only for documents
+    the full validator would accept; anything else goes to the full validator,
+    so errors (type and message) are exactly jsonschema's.
+    """
+    if not isinstance(data, dict) or data.keys() != _TOP_KEYS:
+        return False
+    for key in ("summary_bullets", "decisions"):
+        items = data[key]
+        if not isinstance(items, list) or not all(isinstance(x, str) for x in items):
+            return False
+    items = data["action_items"]
+    if not isinstance(items, list):
+        return False
+    for a in items:
+        if not isinstance(a, dict):
+            return False
+        if not isinstance(a.get("description"), str):
+            return False
+        priority = a.get("priority")
+        if not isinstance(priority, str) or priority not in _PRIORITIES:
+            return False
+        for opt in ("owner", "due_date"):
+            if opt in a and a[opt] is not None and not isinstance(a[opt], str):
+                return False
+    return True
+
+
 def _validate(data: dict):
-    Draft202012Validator(SCHEMA).validate(data)
+    if os.getenv("SUMMARY_FAST_VALIDATE", "1") != "0" and _fast_check(data):
+        return
+    _VALIDATOR.validate(data)
 
 # ---------- Stub fallback ----------
 
 
+# "decision: ..." / "todo: ..." prefixes, matched case-insensitively in one pass
+_RULE_RE = re.compile(r"(?:(decisions?)|ai|action|todo):(.*)", re.IGNORECASE | re.DOTALL)
+
+
 def _rules_stub(notes_text: str, title: str) -> dict:
     lines = [ln.strip()
              for ln in (notes_text or "").splitlines() if ln.strip()]
     bullets, decisions, actions = [], [], []
+    match = _RULE_RE.match
     for ln in lines:
-        low = ln.lower()
-        if low.startswith(("decision:", "decisions:")):
-            decisions.append(ln.split(":", 1)[1].strip() or ln)
-        elif low.startswith(("ai:", "action:", "todo:")):
-            desc = ln.split(":", 1)[1].strip() or ln
-            actions.append({"description": desc, "owner": None,
-                           "due_date": None, "priority": "medium"})
-        else:
+        m = match(ln)
+        if m is None:
             bullets.append(ln)
+        elif m.group(1):
+            decisions.append(m.group(2).strip() or ln)
+        else:
+            actions.append({"description": m.group(2).strip() or ln, "owner": None,
+                           "due_date": None, "priority": "medium"})
     if not bullets and lines:
         bullets = lines[:5]
-    result = {"summary_bullets": bullets[:8],
-              "decisions": decisions[:8], "action_items": actions[:15]}
-    _validate(result)
-    return result
+    # Built from str lines and fixed-shape dicts, so it matches SCHEMA by construction
+    return {"summary_bullets": bullets[:8],
+            "decisions": decisions[:8], "action_items": actions[:15]}
+
+
+def _stub_meta() -> dict:
+    return {"provider": "stub", "model": "rules",
+            "prompt_version": os.getenv("PROMPT_VERSION", "v1"), "usage": None}
+
+
+def _rules_batch(docs: list) -> list:
+    """Process-pool task: [(id, title, notes)] -> [(id, result)]."""
+    return [(mid, _rules_stub(notes, title)) for mid, title, notes in docs]
 
 # ---------- OpenAI prompt + call ----------
 
@@ -69,7 +140,7 @@ Notes (raw text):
 \"\"\"{notes}\"\"\"
 
 Return STRICT JSON with this schema:
-{json.dumps(SCHEMA, indent=2)}
+{SCHEMA_TEXT}
 
 Rules:
 - Write concise, actionable bullets.
@@ -79,28 +150,223 @@ Rules:
 """
 
 
-def _call_openai(title: str, notes: str, model: str) -> Tuple[dict, dict]:
-    # Build an httpx client that ignores proxy env vars entirely.
-    # trust_env=False prevents httpx from using HTTP(S)_PROXY, etc.
+# ---------- Pooled OpenAI client ----------
+# One client (and httpx connection pool) per process, reused across calls so
+# summaries don't pay a TCP+TLS handshake each time. Reset after fork so
+# gunicorn workers never share the parent's sockets.
+
+_clients = {}
+_clients_lock = threading.Lock()
+_clients_pid = os.getpid()
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _reset_clients_after_fork():
+    global _clients_pid, _hedge_pool
+    # Don't close: the sockets belong to the parent process.
+    _clients.clear()
+    _clients_pid = os.getpid()
+    _hedge_pool = None  # its threads don't exist in the child
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+
+def _openai_client():
     import httpx
     from openai import OpenAI
 
-    http_client = httpx.Client(timeout=30.0, trust_env=False)
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"),
-                    http_client=http_client)
+    api_key = os.getenv("OPENAI_API_KEY")
+    base_url = os.getenv("OPENAI_BASE_URL") or None
+    key = (api_key, base_url)
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _reset_clients_after_fork()
+        client = _clients.get(key)
+        if client is None:
+            # trust_env=False prevents httpx from using HTTP(S)_PROXY, etc.
+            http_client = httpx.Client(
+                trust_env=False,
+                timeout=httpx.Timeout(
+                    PROVIDERS["openai"].setting("timeout"),
+                    connect=_env_float("OPENAI_CONNECT_TIMEOUT", 5.0),
+                ),
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("OPENAI_POOL_MAX", "20")),
+                    max_keepalive_connections=int(
+                        os.getenv("OPENAI_POOL_KEEPALIVE", "10")),
+                    keepalive_expiry=_env_float("OPENAI_KEEPALIVE_EXPIRY", 30.0),
+                ),
+            )
+            # Retries are ours (see _retry_delay); the SDK's own are disabled.
+            client = OpenAI(api_key=api_key, base_url=base_url,
+                            http_client=http_client, max_retries=0)
+            _clients[key] = client
+        return client
+
+
+def close_clients():
+    """Close this process's pooled clients (registered with atexit)."""
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            return  # inherited across fork; the sockets are the parent's
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+atexit.register(close_clients)
+
+
+# ---------- Retry policy ----------
+
+
+def _retry_after_seconds(exc):
+    """Seconds from a Retry-After(-ms) header on an API error, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _is_retryable(exc) -> bool:
+    if isinstance(exc, token_budget.BudgetExceeded):
+        return False  # already waited up to LLM_BUDGET_MAX_WAIT for capacity
+    if isinstance(exc, CircuitOpen):
+        return False
+    if isinstance(exc, ProviderBusy):
+        return False  # already waited the slot timeout; another wait won't help
+    # 4xx other than 408/409/429 won't get better by retrying (bad key, bad request)
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        return True  # network errors, timeouts, bad JSON from the model
+    return status in (408, 409, 429) or status >= 500
+
+
+def _retry_delay(attempt: int, exc) -> float:
+    """Exponential backoff with full jitter, or the server's Retry-After if given."""
+    cap = _env_float("OPENAI_BACKOFF_MAX", 8.0)
+    retry_after = _retry_after_seconds(exc)
+    if retry_after is not None:
+        return min(retry_after, _env_float("OPENAI_RETRY_AFTER_MAX", 30.0))
+    base = _env_float("OPENAI_BACKOFF_BASE", 0.5)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _reserve(messages: list, model: str) -> int:
+    """Take the estimated prompt + max completion from the global budget."""
+    return token_budget.acquire(token_budget.estimate_messages(messages, model)
+                                + token_budget.MAX_COMPLETION_TOKENS)
+
+
+def _call_openai(title: str, notes: str, model: str, messages=None) -> Tuple[dict, dict]:
+    client = _openai_client()
+    messages = messages or _messages(title, notes)
+    breaker = PROVIDERS["openai"].breaker
+    breaker.check()  # fail fast while OpenAI is degraded
+    reserved, meta, sent = None, None, False
+    try:
+        reserved = _reserve(messages, model)
+        with PROVIDERS["openai"].slot():
+            sent = True
+            start = time.monotonic()
+            try:
+                resp = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.2,
+                    max_tokens=token_budget.MAX_COMPLETION_TOKENS,  # cost cap
+                )
+                meta = _openai_meta(model, getattr(resp, "usage", None))
+                data = _parse_content(resp.choices[0].message.content)
+            except Exception:
+                breaker.record(False, time.monotonic() - start)
+                raise
+            breaker.record(True, time.monotonic() - start)
+    finally:
+        if not sent:
+            breaker.release_probe()
+        if reserved is not None:
+            token_budget.settle(reserved, meta and meta["usage"])
+    return data, meta
+
+
+# ---------- Hedged requests ----------
+# With LLM_HEDGE_PERCENTILE set (e.g. 95), a call still running after that
+# percentile of recent latencies gets a second, identical request; whichever
+# answers first wins. The loser runs to completion in the background.
+
+_hedge_pool = None
+_hedge_lock = threading.Lock()
+hedge_stats = {"hedged": 0, "hedge_wins": 0}
+
+
+def _hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(
+                max_workers=int(os.getenv("LLM_HEDGE_WORKERS", "16")),
+                thread_name_prefix="llm-hedge")
+        return _hedge_pool
+
+
+def _call_openai_hedged(title: str, notes: str, model: str, messages=None) -> Tuple[dict, dict]:
+    pct = _env_float("LLM_HEDGE_PERCENTILE", 0)
+    delay = PROVIDERS["openai"].breaker.latency_percentile(pct) if pct else None
+    if delay is None:
+        return _call_openai(title, notes, model, messages)
+
+    pool = _hedge_executor()
+    first = pool.submit(_call_openai, title, notes, model, messages)
+    try:
+        return first.result(timeout=delay)
+    except FutureTimeout:
+        pass
+    second = pool.submit(_call_openai, title, notes, model, messages)
+    with _hedge_lock:
+        hedge_stats["hedged"] += 1
+
+    pending, error = {first, second}, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for f in done:
+            if f.exception() is None:
+                if f is second:
+                    with _hedge_lock:
+                        hedge_stats["hedge_wins"] += 1
+                return f.result()
+            error = f.exception()
+    raise error
 
-    prompt = _prompt(title, notes)
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You output only valid JSON."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.2,
-        max_tokens=400,  # cost cap
-    )
 
-    content = (resp.choices[0].message.content or "").strip()
+def _messages(title: str, notes: str) -> list:
+    return [
+        {"role": "system", "content": "You output only valid JSON."},
+        {"role": "user", "content": _prompt(title, notes)}
+    ]
+
+
+def _parse_content(content: str) -> dict:
+    content = (content or "").strip()
 
     # Strip ``` fences if present
     if content.startswith("```"):
@@ -114,44 +380,575 @@ def _call_openai(title: str, notes: str, model: str) -> Tuple[dict, dict]:
 
     data = json.loads(content)
     _validate(data)
+    return data
+
 
-    usage = getattr(resp, "usage", None)
+def _openai_meta(model: str, usage) -> dict:
     usage_meta = {
         "prompt_tokens": getattr(usage, "prompt_tokens", None) if usage else None,
         "completion_tokens": getattr(usage, "completion_tokens", None) if usage else None,
         "total_tokens": getattr(usage, "total_tokens", None) if usage else None,
     }
+    return {
+        "provider": "openai",
+        "model": model,
+        "prompt_version": os.getenv("PROMPT_VERSION", "v1"),
+        "usage": usage_meta
+    }
+
+
+def _call_openai_with_retries(title: str, notes: str, model: str, messages=None) -> Tuple[dict, dict]:
+    """_call_openai with backoff on transient failures; raises the last error."""
+    attempts = max(1, int(os.getenv("OPENAI_MAX_ATTEMPTS", "2")))
+    for attempt in range(attempts):
+        try:
+            return _call_openai_hedged(title, notes, model, messages)
+        except Exception as e:
+            retry = attempt + 1 < attempts and _is_retryable(e)
+            log.warning("OpenAI call failed (attempt %d/%d%s): %r", attempt + 1, attempts,
+                        ", retrying" if retry else "", e)
+            if not retry:
+                raise
+            time.sleep(_retry_delay(attempt, e))
+
+# ---------- Incremental re-summarize ----------
+# Only the added/changed line spans go to the model, with the normal prompt
+# and completion cap, so output cost scales with the edit rather than with
+# the whole summary. Entries of the previous result that came from removed
+# lines are dropped locally, and the two are merged like chunk results.
 
+_WORD_RE = re.compile(r"[a-z']{3,}|\d+")
+_STOPWORDS = frozenset("the and for with that this from was were are will have has not but "
+                       "all its into onto our their they them then than".split())
+
+
+def _notes_diff(old: str, new: str):
+    """Line-level diff: (added_or_changed spans as text, removed_lines)."""
+    a, b = (old or "").splitlines(), (new or "").splitlines()
+    spans, removed = [], []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag in ("replace", "delete"):
+            removed.extend(a[i1:i2])
+        if tag in ("replace", "insert"):
+            spans.append("\n".join(ln for ln in b[j1:j2] if ln.strip()))
+    return [s for s in spans if s], [ln for ln in removed if ln.strip()]
+
+
+def _words(text: str) -> set:
+    return set(_WORD_RE.findall((text or "").lower())) - _STOPWORDS
+
+
+def _drop_removed(result: dict, removed: list, notes: str) -> dict:
+    """
+    The previous result minus entries that came from removed lines: those
+    whose closest line (word Jaccard) is a removed one rather than a line
+    still in the notes.
+    """
+    removed_sets = [w for w in map(_words, removed) if w]
+    current_sets = [w for w in map(_words, (notes or "").splitlines()) if w]
+
+    def closest(words, sets):
+        return max((len(words & s) / len(words | s) for s in sets), default=0.0)
+
+    def keep(text):
+        words = _words(text)
+        return not words or closest(words, removed_sets) <= closest(words, current_sets)
+
+    return {
+        "summary_bullets": [t for t in result.get("summary_bullets", []) if keep(t)],
+        "decisions": [t for t in result.get("decisions", []) if keep(t)],
+        "action_items": [a for a in result.get("action_items", []) if keep(a.get("description"))],
+    }
+
+
+def _summarize_incremental(title: str, notes: str, previous, model: str):
+    """
+    Summarize only the changed spans and merge them into the previous result.
+    Returns None when the edit is too large for that to pay off.
+    """
+    prev_notes, prev_result = previous
+    spans, removed = _notes_diff(prev_notes, notes)
+    added = "\n\n".join(spans)
+    ratio = float(os.getenv("SUMMARY_INCREMENTAL_MAX_RATIO", "0.5"))
+    if not (spans or removed):
+        return None
+    if _estimate_tokens(added + "\n".join(removed)) > ratio * _estimate_tokens(notes):
+        return None
+    # new text must fit one normal call; bigger edits take the full (chunked) path
+    if _estimate_tokens(added) > int(os.getenv("SUMMARY_CHUNK_TOKENS", "1500")):
+        return None
+
+    parts = [_drop_removed(prev_result, removed, notes)]
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    if added:
+        data, call_meta = _call_openai_with_retries(title, added, model)
+        parts.append(data)
+        usage = call_meta.get("usage") or usage
     meta = {
         "provider": "openai",
         "model": model,
         "prompt_version": os.getenv("PROMPT_VERSION", "v1"),
-        "usage": usage_meta
+        "usage": usage,
+        "incremental": {"added_spans": len(spans), "removed_lines": len(removed)},
     }
-    return data, meta
+    return _merge_results(parts), meta
+
+# ---------- Streaming ----------
+
+
+class _PartialJSONScanner:
+    """
+    Incremental scanner over a streamed JSON object. Reports each element of
+    a top-level array ("summary_bullets", "decisions", "action_items") as
+    soon as it is complete, without re-parsing what was already seen.
+    """
+
+    def __init__(self):
+        self.buf = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_str = False
+        self.esc = False
+        self.str_start = None
+        self.elem_start = None
+        self.last_key = None
+        self.key = None
+
+    def _emit(self, out, end):
+        try:
+            out.append((self.key, json.loads(self.buf[self.elem_start:end])))
+        except ValueError:
+            pass
+        self.elem_start = None
+
+    def feed(self, text: str) -> list:
+        self.buf += text
+        out = []
+        buf = self.buf
+        for i in range(self.pos, len(buf)):
+            ch = buf[i]
+            if self.in_str:
+                if self.esc:
+                    self.esc = False
+                elif ch == "\\":
+                    self.esc = True
+                elif ch == '"':
+                    self.in_str = False
+                    if self.depth == 1:
+                        self.last_key = buf[self.str_start:i + 1]
+                    elif self.depth == 2 and self.elem_start == self.str_start:
+                        self._emit(out, i + 1)
+            elif ch == '"':
+                self.in_str = True
+                self.str_start = i
+                if self.depth == 2 and self.elem_start is None:
+                    self.elem_start = i
+            elif ch in "{[":
+                if self.depth == 2 and self.elem_start is None:
+                    self.elem_start = i
+                self.depth += 1
+                if self.depth == 2:
+                    try:
+                        self.key = json.loads(self.last_key or '""')
+                    except ValueError:
+                        self.key = None
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 2 and self.elem_start is not None:
+                    self._emit(out, i + 1)
+        self.pos = len(buf)
+        return out
+
+
+def _stream_openai(title: str, notes: str, model: str):
+    """
+    Yield ("item", key, value) while the model writes, then ("done", data, meta).
+    Closing this generator (client went away) closes the upstream HTTP stream.
+    """
+    client = _openai_client()
+    messages = _messages(title, notes)
+    breaker = PROVIDERS["openai"].breaker
+    breaker.check()
+    reserved, usage, ok = None, None, None
+    try:
+        reserved = _reserve(messages, model)
+        with PROVIDERS["openai"].slot():
+            start = time.monotonic()
+            try:
+                stream = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.2,
+                    max_tokens=token_budget.MAX_COMPLETION_TOKENS,  # cost cap
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                scanner = _PartialJSONScanner()
+                try:
+                    for chunk in stream:
+                        if getattr(chunk, "usage", None):
+                            usage = chunk.usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content or ""
+                        for key, value in scanner.feed(delta):
+                            yield "item", key, value
+                finally:
+                    stream.close()
+                data = _parse_content(scanner.buf)
+                ok = True
+            except Exception:
+                ok = False
+                raise
+            finally:
+                # a client disconnect (GeneratorExit) says nothing about OpenAI
+                if ok is not None:
+                    breaker.record(ok, time.monotonic() - start)
+    finally:
+        if ok is None:
+            breaker.release_probe()
+        if reserved is not None:
+            token_budget.settle(reserved, _openai_meta(model, usage)["usage"] if usage else None)
+    yield "done", data, _openai_meta(model, usage)
+
+
+def _result_events(data: dict):
+    for key in ("summary_bullets", "decisions", "action_items"):
+        for value in data.get(key, []):
+            yield "item", key, value
+
+
+def stream_summary(title: str, notes_text: str):
+    """
+    Streaming variant of summarize_notes.
+    Yields ("item", key, value) as results become available, ("fallback",)
+    if the stream failed and the items so far should be discarded, and
+    finally ("done", result, meta).
+    """
+    provider = get_provider()
+    if provider.name != "stub":
+        model = provider.model()
+        h = content_hash(title, notes_text, os.getenv("PROMPT_VERSION", "v1"))
+        cached = summary_cache.get(h, provider.name, model)
+        if cached is not None:
+            data, meta = cached
+            yield from _result_events(data)
+            yield "done", data, {**meta, "usage": None, "cache_hit": True, "cost_usd": 0.0}
+            return
+        try:
+            for event in provider.stream(title, notes_text):
+                if event[0] == "done":
+                    event[2]["cost_usd"] = provider.cost(event[2].get("usage"))
+                    summary_cache.put(h, provider.name, model, event[1], event[2])
+                yield event
+            return
+        except token_budget.BudgetExceeded:
+            raise
+        except Exception:
+            log.warning("%s stream failed, falling back to stub", provider.name, exc_info=True)
+            yield ("fallback",)
+
+    yield from PROVIDERS["stub"].stream(title, notes_text)
+
+# ---------- Long inputs: chunked map-reduce ----------
+
+
+def _estimate_tokens(text: str) -> int:
+    return token_budget.estimate_tokens(text)
+
+
+def _chunk_notes(notes: str, max_tokens: int) -> list:
+    """Split notes on line boundaries into chunks of at most ~max_tokens."""
+    max_chars = max_tokens * 4
+    chunks, cur, cur_len = [], [], 0
+    for line in (notes or "").splitlines():
+        # a single huge line (pasted transcript) gets hard-split
+        pieces = [line[i:i + max_chars]
+                  for i in range(0, len(line), max_chars)] or [""]
+        for piece in pieces:
+            if cur and cur_len + len(piece) + 1 > max_chars:
+                chunks.append("\n".join(cur))
+                cur, cur_len = [], 0
+            cur.append(piece)
+            cur_len += len(piece) + 1
+    if cur:
+        chunks.append("\n".join(cur))
+    return [c for c in chunks if c.strip()]
+
+
+def _chunk_hash(title: str, chunk: str) -> str:
+    return content_hash("chunk", title, chunk, os.getenv("PROMPT_VERSION", "v1"))
+
+
+def _norm(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _merge_results(parts: list) -> dict:
+    """Concatenate chunk results in order, dropping repeated entries."""
+    merged = {"summary_bullets": [], "decisions": [], "action_items": []}
+    seen = {k: set() for k in merged}
+    for part in parts:
+        for key in ("summary_bullets", "decisions"):
+            for text in part.get(key, []):
+                if _norm(text) not in seen[key]:
+                    seen[key].add(_norm(text))
+                    merged[key].append(text)
+        for item in part.get("action_items", []):
+            k = _norm(item.get("description"))
+            if k not in seen["action_items"]:
+                seen["action_items"].add(k)
+                merged["action_items"].append(item)
+    _validate(merged)
+    return merged
+
+
+def _summarize_long(title: str, notes: str, model: str) -> Tuple[dict, dict]:
+    """
+    Summarize each chunk and merge. Chunk results are cached by chunk hash so
+    unchanged sections are free; the lookup is one batch (one SELECT) and the
+    stores are one batch too, however many chunks there are.
+    """
+    chunks = _chunk_notes(notes, int(os.getenv("SUMMARY_CHUNK_TOKENS", "1500")))
+    workers = max(1, int(os.getenv("SUMMARY_CHUNK_WORKERS", "4")))
+    hashes = [_chunk_hash(title, c) for c in chunks]
+    cached = summary_cache.get_many(hashes, "openai", model)
+    todo = {h: c for h, c in zip(hashes, chunks) if h not in cached}   # repeats run once
+
+    fresh = {}
+    if todo:
+        pool = ThreadPoolExecutor(max_workers=min(workers, len(todo)))
+        futures = {h: pool.submit(_call_openai_with_retries, title, c, model)
+                   for h, c in todo.items()}
+        try:
+            fresh = {h: f.result() for h, f in futures.items()}
+        finally:
+            # store every chunk that succeeded, even when another one failed,
+            # so a retry only pays for the failed chunks
+            pool.shutdown(wait=True)
+            summary_cache.put_many([(h, *f.result()) for h, f in futures.items()
+                                    if f.exception() is None], "openai", model)
+
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    for _, chunk_meta in fresh.values():
+        for k in usage:
+            usage[k] += (chunk_meta.get("usage") or {}).get(k) or 0
+    meta = {
+        "provider": "openai",
+        "model": model,
+        "prompt_version": os.getenv("PROMPT_VERSION", "v1"),
+        "usage": usage,
+        "chunks": len(chunks),
+        "chunk_cache_hits": sum(1 for h in hashes if h in cached),
+    }
+    results = {**{h: data for h, (data, _) in cached.items()},
+               **{h: data for h, (data, _) in fresh.items()}}
+    return _merge_results([results[h] for h in hashes]), meta
+
+# ---------- Providers ----------
+
+
+class ProviderBusy(Exception):
+    """No concurrency slot freed up within the provider's timeout."""
+
+
+class Provider(abc.ABC):
+    """
+    A summarize backend. Each one declares its concurrency limit, timeout
+    (seconds) and cost (USD per 1M prompt / completion tokens); any of them
+    can be overridden with <NAME>_MAX_CONCURRENCY, <NAME>_TIMEOUT,
+    <NAME>_PROMPT_COST or <NAME>_COMPLETION_COST.
+    Subclasses implement summarize(); stream() defaults to emitting the
+    finished result at once.
+    """
+    name = ""
+
+    def __init__(self, max_concurrency: int, timeout: float,
+                 prompt_cost: float = 0.0, completion_cost: float = 0.0):
+        self.declared = {"max_concurrency": max_concurrency, "timeout": timeout,
+                         "prompt_cost": prompt_cost, "completion_cost": completion_cost}
+        self._slots = None
+        self._lock = threading.Lock()
+        self.breaker = CircuitBreaker(self.name)
+
+    def setting(self, key: str) -> float:
+        return _env_float(f"{self.name.upper()}_{key.upper()}", self.declared[key])
+
+    def enabled(self) -> bool:
+        return True
+
+    def model(self) -> str:
+        return self.name
+
+    def cost(self, usage) -> float:
+        usage = usage or {}
+        return round(((usage.get("prompt_tokens") or 0) * self.setting("prompt_cost")
+                      + (usage.get("completion_tokens") or 0) * self.setting("completion_cost"))
+                     / 1_000_000, 6)
+
+    @contextmanager
+    def slot(self):
+        """Hold one of max_concurrency call slots, waiting at most `timeout`."""
+        with self._lock:
+            if self._slots is None:
+                self._slots = threading.BoundedSemaphore(int(self.setting("max_concurrency")))
+        if not self._slots.acquire(timeout=self.setting("timeout")):
+            raise ProviderBusy(f"{self.name}: no free slot after {self.setting('timeout')}s")
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    @abc.abstractmethod
+    def summarize(self, title: str, notes: str, previous=None) -> Tuple[dict, dict]:
+        """(result, meta) for the notes; previous=(old_notes, old_result) may be ignored."""
+
+    def stream(self, title: str, notes: str):
+        data, meta = self.summarize(title, notes)
+        yield from _result_events(data)
+        yield "done", data, meta
+
+
+class StubProvider(Provider):
+    name = "stub"
+
+    def model(self) -> str:
+        return "rules"
+
+    def summarize(self, title, notes, previous=None):
+        return _rules_stub(notes, title), _stub_meta()
+
+
+class OpenAIProvider(Provider):
+    name = "openai"
+
+    def enabled(self) -> bool:
+        return bool(os.getenv("OPENAI_API_KEY"))
+
+    def model(self) -> str:
+        return os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+    def _is_long(self, notes: str) -> bool:
+        return _estimate_tokens(notes) > int(os.getenv("SUMMARY_CHUNK_THRESHOLD", "3000"))
+
+    def summarize(self, title, notes, previous=None):
+        model = self.model()
+        out = None
+        if previous is not None:
+            out = _summarize_incremental(title, notes, previous, model)
+        if out is not None:
+            return out
+        # Long transcripts are summarized per chunk and merged
+        if self._is_long(notes):
+            return _summarize_long(title, notes, model)
+        return _call_openai_with_retries(title, notes, model)
+
+    def stream(self, title, notes):
+        if self._is_long(notes):
+            # chunked path doesn't stream; emit the merged result at once
+            yield from super().stream(title, notes)
+            return
+        yield from _stream_openai(title, notes, self.model())
+
+
+PROVIDERS = {}
+
+
+def register(provider: Provider) -> Provider:
+    PROVIDERS[provider.name] = provider
+    return provider
+
+
+# gpt-4o-mini list prices
+register(OpenAIProvider(max_concurrency=8, timeout=30.0,
+                        prompt_cost=0.15, completion_cost=0.60))
+# in-process and CPU-bound; nothing takes its slots today
+register(StubProvider(max_concurrency=64, timeout=5.0))
+
+
+def get_provider(name: str | None = None) -> Provider:
+    """The LLM_PROVIDER provider, or the stub when it's unknown or not configured."""
+    provider = PROVIDERS.get((name or os.getenv("LLM_PROVIDER", "stub")).lower())
+    if provider is None or not provider.enabled():
+        return PROVIDERS["stub"]
+    return provider
 
 # ---------- Public API ----------
 
 
-def summarize_notes(title: str, notes_text: str) -> Tuple[dict, dict]:
+def llm_enabled() -> bool:
+    """True when summaries come from an LLM provider rather than the rules stub."""
+    return get_provider().name != "stub"
+
+
+def summarize_notes(title: str, notes_text: str, previous=None) -> Tuple[dict, dict]:
     """
     Returns (result_dict, meta_dict).
-    Uses OpenAI when configured, otherwise falls back to the rules-based stub.
+    Uses the configured provider (LLM_PROVIDER), falling back to the
+    rules-based stub when it isn't configured or fails.
+    previous=(old_notes, old_result) lets small edits be summarized from the
+    diff instead of the whole document.
+    Raises token_budget.BudgetExceeded when the global LLM budget is full.
     """
-    provider = os.getenv("LLM_PROVIDER", "stub").lower()
+    provider = get_provider()
+    if provider.name != "stub":
+        model = provider.model()
 
-    if provider == "openai" and os.getenv("OPENAI_API_KEY"):
-        model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-        # Try twice to recover from minor transient issues; then fall back to stub.
-        for _ in range(2):
-            try:
-                return _call_openai(title, notes_text, model)
-            except Exception as e:
-                print("[LLM ERROR]", repr(e))  # TEMP log during dev
-                time.sleep(0.5)
+        # Shared cache: identical notes (any meeting) reuse the earlier LLM result
+        h = content_hash(title, notes_text, os.getenv("PROMPT_VERSION", "v1"))
+        cached = summary_cache.get(h, provider.name, model)
+        if cached is not None:
+            data, meta = cached
+            # usage=None so cost reports don't count a cached call twice
+            return data, {**meta, "usage": None, "cache_hit": True, "cost_usd": 0.0}
+
+        try:
+            data, meta = provider.summarize(title, notes_text, previous)
+            meta["cost_usd"] = provider.cost(meta.get("usage"))
+            summary_cache.put(h, provider.name, model, data, meta)
+            return data, meta
+        except token_budget.BudgetExceeded:
+            raise  # callers turn this into a 429; a stub summary would stick
+        except Exception:
+            log.warning("%s summarize failed, falling back to stub", provider.name, exc_info=True)
 
     # Fallback: stub (works offline / without key)
-    out = _rules_stub(notes_text, title)
-    meta = {"provider": "stub", "model": "rules",
-            "prompt_version": os.getenv("PROMPT_VERSION", "v1"), "usage": None}
-    return out, meta
+    return PROVIDERS["stub"].summarize(title, notes_text)
+
+
+def summarize_many(meetings, workers: int | None = None, batch_size: int = 256):
+    """
+    Rules-stub summaries for many meetings, for bulk back-fills.
+    `meetings` is any iterable of objects with id/title/raw_notes (Meeting
+    rows or column tuples) and is consumed lazily. Batches are spread over a
+    process pool with a bounded number in flight; yields
+    (meeting_id, result, meta) in input order.
+    """
+    if workers is None:
+        workers = int(os.getenv("SUMMARY_BATCH_WORKERS", "0")) or os.cpu_count() or 1
+    meta = _stub_meta()
+    docs = ((m.id, m.title, m.raw_notes) for m in meetings)
+    batches = iter(lambda: list(islice(docs, batch_size)), [])
+
+    if workers <= 1:
+        for batch in batches:
+            for mid, result in _rules_batch(batch):
+                yield mid, result, meta
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=process_context()) as pool:
+        pending = deque()
+        try:
+            for batch in batches:
+                pending.append(pool.submit(_rules_batch, batch))
+                if len(pending) < workers * 2:
+                    continue
+                for mid, result in pending.popleft().result():
+                    yield mid, result, meta
+            while pending:
+                for mid, result in pending.popleft().result():
+                    yield mid, result, meta
+        finally:
+            # caller stopped early: don't run batches nobody will read
+            for f in pending:
+                f.cancel()
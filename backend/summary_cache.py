@@ -0,0 +1,277 @@
+"""
+Content-addressed cache for LLM summaries, shared across meetings.
+
+Two tiers:
+  - an in-process LRU (fast, per worker)
+  - the `summary_cache_entry` table (shared by all workers, survives restarts)
+
+Keys are sha256(content_hash, provider, model), so identical notes in
+different meetings (templated stand-ups, re-created meetings) hit the cache.
+The DB tier is only consulted when an app context is available (it is not
+inside process-pool workers).
+
+The DB tier never touches the caller's db.session, so a lookup or store
+can't commit or roll back the request's pending work:
+  - lookups are one SELECT on a connection of their own and don't write
+  - stores are queued and written in batches by a background writer thread
+  - hit counts are kept in memory; the writer flushes them and trims expired
+    and least recently used rows at most once every
+    SUMMARY_CACHE_MAINTENANCE_SECONDS (default 60), so hits and
+    last_used_at are approximate
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import has_app_context
+from sqlalchemy import and_, bindparam, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from models import db, SummaryCacheEntry
+from utils import content_hash
+
+MEMORY_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "512"))
+DB_MAX_ROWS = int(os.getenv("SUMMARY_CACHE_DB_MAX_ROWS", "10000"))
+TTL_SECONDS = int(os.getenv("SUMMARY_CACHE_TTL", str(7 * 24 * 3600)))
+WRITE_BATCH = 500
+
+_lock = threading.Lock()
+_memory = OrderedDict()   # key -> (stored_at, result, meta)
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0,
+          "stores": 0, "evictions": 0, "maintenance_runs": 0}
+_pending_hits = {}        # key -> (hits since the last flush, last used)
+_writes = queue.Queue()   # (engine, row) for the writer thread
+_writer = None
+_engine = None            # last engine seen, for maintenance
+
+
+def cache_key(h: str, provider: str, model: str) -> str:
+    return content_hash(h, provider, model)
+
+
+def _count(name: str, n: int = 1):
+    with _lock:
+        _stats[name] += n
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "memory_entries": len(_memory),
+                "memory_size": MEMORY_SIZE, "pending_writes": _writes.qsize()}
+
+
+def clear_memory():
+    with _lock:
+        _memory.clear()
+
+
+# ---- memory tier ----
+
+
+def _memory_get(key: str):
+    with _lock:
+        hit = _memory.get(key)
+        if hit is None:
+            return None
+        stored_at, result, meta = hit
+        if time.time() - stored_at > TTL_SECONDS:
+            del _memory[key]
+            return None
+        _memory.move_to_end(key)
+        return result, meta
+
+
+def _memory_put(key: str, result: dict, meta: dict, stored_at: float | None = None):
+    with _lock:
+        _memory[key] = (stored_at or time.time(), result, meta)
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_SIZE:
+            _memory.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+# ---- DB tier ----
+
+
+def _table():
+    return SummaryCacheEntry.__table__
+
+
+def _db_get_many(keys: list) -> dict:
+    """key -> (result, meta, created_at) for unexpired rows, one SELECT."""
+    t = _table()
+    cutoff = datetime.utcnow() - timedelta(seconds=TTL_SECONDS)
+    with db.engine.connect() as conn:
+        rows = conn.execute(
+            select(t.c.cache_key, t.c.result_json, t.c.meta_json, t.c.created_at)
+            .where(t.c.cache_key.in_(keys), t.c.created_at >= cutoff)
+        ).all()
+    now = datetime.utcnow()
+    with _lock:
+        for row in rows:
+            hits, _ = _pending_hits.get(row.cache_key, (0, now))
+            _pending_hits[row.cache_key] = (hits + 1, now)
+    return {row.cache_key: (json.loads(row.result_json), json.loads(row.meta_json or "{}"),
+                            row.created_at) for row in rows}
+
+
+def _db_put_many(engine, rows: list):
+    """Replace the rows for these keys in one transaction (DELETE + INSERT)."""
+    t = _table()
+    rows = list({r["cache_key"]: r for r in rows}.values())   # last write wins
+    now = datetime.utcnow()
+    for r in rows:
+        r.update(created_at=now, last_used_at=now, hits=0)
+    try:
+        with engine.begin() as conn:
+            conn.execute(delete(t).where(t.c.cache_key.in_([r["cache_key"] for r in rows])))
+            conn.execute(insert(t), rows)
+    except IntegrityError:
+        pass   # another worker stored the same keys first
+
+
+def maintain(engine=None):
+    """Flush pending hit counts, then drop expired and least recently used rows."""
+    engine = engine or db.engine
+    with _lock:
+        hits = list(_pending_hits.items())
+        _pending_hits.clear()
+    t = _table()
+    cutoff = datetime.utcnow() - timedelta(seconds=TTL_SECONDS)
+    with engine.begin() as conn:
+        if hits:
+            conn.execute(
+                update(t).where(t.c.cache_key == bindparam("k"))
+                .values(hits=t.c.hits + bindparam("n"), last_used_at=bindparam("at")),
+                [{"k": k, "n": n, "at": at} for k, (n, at) in hits])
+        n = conn.execute(delete(t).where(t.c.created_at < cutoff)).rowcount
+        # the first row past DB_MAX_ROWS (most recently used first); it and older go
+        boundary = conn.execute(
+            select(t.c.last_used_at, t.c.id)
+            .order_by(t.c.last_used_at.desc(), t.c.id.desc())
+            .offset(DB_MAX_ROWS).limit(1)).first()
+        if boundary is not None:
+            used, bid = boundary
+            n += conn.execute(delete(t).where(or_(
+                t.c.last_used_at < used,
+                and_(t.c.last_used_at == used, t.c.id <= bid)))).rowcount
+    _count("maintenance_runs")
+    if n:
+        _count("evictions", n)
+
+
+def _write_loop():
+    interval = float(os.getenv("SUMMARY_CACHE_MAINTENANCE_SECONDS", "60"))
+    last_run, dirty = time.monotonic(), False
+    while True:
+        try:
+            batch = [_writes.get(timeout=max(0.1, interval - (time.monotonic() - last_run)))]
+        except queue.Empty:
+            batch = []
+        while batch and len(batch) < WRITE_BATCH:
+            try:
+                batch.append(_writes.get_nowait())
+            except queue.Empty:
+                break
+        by_engine = {}
+        for engine, row in batch:
+            by_engine.setdefault(engine, []).append(row)
+        for engine, rows in by_engine.items():
+            try:
+                _db_put_many(engine, rows)
+                dirty = True
+            except SQLAlchemyError as e:
+                print("[SUMMARY CACHE] db put failed:", repr(e))
+        for _ in batch:
+            _writes.task_done()
+
+        dirty = dirty or bool(_pending_hits)
+        if dirty and _engine is not None and time.monotonic() - last_run >= interval:
+            try:
+                maintain(_engine)
+            except SQLAlchemyError as e:
+                print("[SUMMARY CACHE] maintenance failed:", repr(e))
+            last_run, dirty = time.monotonic(), False
+
+
+def _enqueue(row: dict):
+    global _writer, _engine
+    _engine = db.engine
+    with _lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, daemon=True,
+                                       name="summary-cache-writer")
+            _writer.start()
+    _writes.put((_engine, row))
+
+
+def flush():
+    """Block until queued stores are written (tests, shutdown)."""
+    _writes.join()
+
+
+def _reset_after_fork():
+    global _writer, _writes
+    # the writer thread doesn't exist in the child; queued rows are the parent's
+    _writer = None
+    _writes = queue.Queue()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# ---- public API ----
+
+
+def get_many(hashes, provider: str, model: str) -> dict:
+    """
+    {content hash: (result, meta)} for the cached ones among `hashes`: memory
+    first, then one SELECT for the rest.
+    """
+    keys = {cache_key(h, provider, model): h for h in hashes}
+    out, missing = {}, []
+    for key, h in keys.items():
+        hit = _memory_get(key)
+        if hit is not None:
+            out[h] = hit
+        else:
+            missing.append(key)
+    _count("memory_hits", len(out))
+
+    if missing and has_app_context():
+        try:
+            rows = _db_get_many(missing)
+        except SQLAlchemyError as e:
+            print("[SUMMARY CACHE] db get failed:", repr(e))
+            rows = {}
+        for key, (result, meta, created_at) in rows.items():
+            age = (datetime.utcnow() - created_at).total_seconds() if created_at else 0
+            _memory_put(key, result, meta, time.time() - age)
+            out[keys[key]] = result, meta
+        _count("db_hits", len(rows))
+    _count("misses", len(keys) - len(out))
+    return out
+
+
+def get(h: str, provider: str, model: str):
+    """Return (result, meta) for a cached summary, or None."""
+    return get_many([h], provider, model).get(h)
+
+
+def put_many(items, provider: str, model: str):
+    """Store [(content hash, result, meta)]; the DB write happens in the background."""
+    for h, result, meta in items:
+        key = cache_key(h, provider, model)
+        _memory_put(key, result, meta)
+        _count("stores")
+        if has_app_context():
+            _enqueue({"cache_key": key, "content_hash": h, "provider": provider,
+                      "model": model, "result_json": json.dumps(result),
+                      "meta_json": json.dumps(meta)})
+
+
+def put(h: str, provider: str, model: str, result: dict, meta: dict):
+    put_many([(h, result, meta)], provider, model)
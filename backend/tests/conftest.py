@@ -0,0 +1,71 @@
+"""
+Shared fixtures. Run from backend/:
+
+    python -m pytest -q
+
+The app reads its settings at import, so the environment is set up here
+first: a throwaway SQLite file, a generated Fernet key and
+QUERY_BUDGET_MODE=raise so routes that go over their SQL budget fail.
+"""
+import os
+import sys
+import tempfile
+import pytest
+from cryptography.fernet import Fernet
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["QUERY_BUDGET_MODE"] = "raise"
+os.environ["FERNET_KEY"] = Fernet.generate_key().decode()
+os.environ.pop("FERNET_KEYS", None)
+os.environ["LLM_PROVIDER"] = "stub"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app  # noqa: E402
+from models import db, User  # noqa: E402
+import fake_openai  # noqa: E402
+import summary_cache  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config["TESTING"] = True   # let route errors (and budget overruns) propagate
+    with flask_app.app_context():
+        db.create_all()
+        try:
+            yield flask_app
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    u = User(email="a@example.com", name="A", password_hash=b"x")
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+
+@pytest.fixture
+def client(app):
+    """Test client signed in as a fresh user."""
+    c = app.test_client()
+    r = c.post("/auth/signup", json={"email": "me@example.com", "name": "Me", "password": "pw"})
+    assert r.status_code == 201, r.data
+    return c
+
+
+@pytest.fixture
+def openai_server(monkeypatch):
+    """LLM_PROVIDER=openai against an in-process fake_openai server."""
+    server, base_url = fake_openai.serve_in_thread()
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "fake")
+    monkeypatch.setenv("OPENAI_BASE_URL", base_url)
+    summary_cache.clear_memory()
+    yield server
+    summary_cache.flush()
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,110 @@
+"""Batch create/update/delete endpoints for action items."""
+import pytest
+
+
+@pytest.fixture
+def meeting_id(client):
+    return client.post("/meetings", json={"title": "Planning"}).json["id"]
+
+
+@pytest.fixture
+def other_meeting_id(app):
+    other = app.test_client()
+    r = other.post("/auth/signup", json={"email": "other@example.com", "name": "O",
+                                         "password": "pw"})
+    assert r.status_code == 201, r.data
+    mid = other.post("/meetings", json={"title": "Theirs"}).json["id"]
+    item = other.post(f"/meetings/{mid}/action-items", json={"description": "theirs"}).json
+    return mid, item["id"]
+
+
+def _create(client, mid, n):
+    r = client.post(f"/meetings/{mid}/action-items:batch",
+                    json=[{"description": f"task {i}"} for i in range(n)])
+    assert r.status_code == 201, r.data
+    return [res["item"]["id"] for res in r.json["results"]], r
+
+
+def _items(client, mid):
+    return client.get(f"/meetings/{mid}/action-items").json
+
+
+def test_create_batch_is_all_or_nothing(client, meeting_id):
+    r = client.post(f"/meetings/{meeting_id}/action-items:batch", json={"items": [
+        {"description": "ok"}, {"description": "  "}, {"description": "x", "priority": "urgent"}]})
+
+    assert r.status_code == 400
+    assert [(e["index"], e["status"]) for e in r.json["results"]] == [(1, 400), (2, 400)]
+    assert _items(client, meeting_id) == []
+
+
+def test_update_batch_is_all_or_nothing(client, meeting_id):
+    ids, _ = _create(client, meeting_id, 2)
+
+    r = client.patch("/action-items:batch", json=[
+        {"id": ids[0], "status": "done"}, {"id": ids[1], "due_date": "tomorrow"}])
+
+    assert r.status_code == 400
+    assert r.json["results"] == [{"index": 1, "status": 400, "error": "due_date must be YYYY-MM-DD"}]
+    assert {a["status"] for a in _items(client, meeting_id)} == {"open"}
+
+
+def test_batches_reject_other_users_meetings_and_items(client, meeting_id, other_meeting_id):
+    other_mid, other_item = other_meeting_id
+    ids, _ = _create(client, meeting_id, 1)
+
+    assert client.post(f"/meetings/{other_mid}/action-items:batch",
+                       json=[{"description": "x"}]).status_code == 403
+    assert client.post("/meetings/999999/action-items:batch",
+                       json=[{"description": "x"}]).status_code == 404
+
+    r = client.patch("/action-items:batch", json=[
+        {"id": ids[0], "status": "done"}, {"id": other_item, "delete": True},
+        {"id": 999999, "status": "done"}])
+    assert r.status_code == 400
+    assert [(e["index"], e["status"]) for e in r.json["results"]] == [(1, 403), (2, 404)]
+    assert _items(client, meeting_id)[0]["status"] == "open"
+
+
+def test_duplicate_ids_in_one_batch_are_rejected(client, meeting_id):
+    ids, _ = _create(client, meeting_id, 1)
+
+    r = client.patch("/action-items:batch", json=[
+        {"id": ids[0], "status": "done"}, {"id": ids[0], "delete": True}])
+
+    assert r.status_code == 400
+    assert r.json["results"] == [{"index": 1, "status": 400, "error": "duplicate id"}]
+    assert len(_items(client, meeting_id)) == 1
+
+
+def test_update_batch_mixes_updates_and_deletes(client, meeting_id):
+    ids, _ = _create(client, meeting_id, 3)
+
+    r = client.patch("/action-items:batch", json=[
+        {"id": ids[0], "status": "done", "priority": "high"},
+        {"id": ids[1], "delete": True},
+        {"id": ids[2], "description": "renamed"}])
+
+    assert r.status_code == 200, r.data
+    assert [res["status"] for res in r.json["results"]] == [200, 204, 200]
+    items = {a["id"]: a for a in _items(client, meeting_id)}
+    assert set(items) == {ids[0], ids[2]}
+    assert (items[ids[0]]["status"], items[ids[0]]["priority"]) == ("done", "high")
+    assert items[ids[2]]["description"] == "renamed"
+
+
+def test_batch_statement_count_does_not_grow_with_the_batch(client, meeting_id):
+    create_counts, update_counts = [], []
+    for n in (2, 40):
+        ids, r = _create(client, meeting_id, n)
+        create_counts.append(int(r.headers["X-Query-Count"]))
+        half = n // 2
+        r = client.patch("/action-items:batch",
+                         json=[{"id": i, "status": "done"} for i in ids[:half]]
+                         + [{"id": i, "delete": True} for i in ids[half:]])
+        assert r.status_code == 200, r.data
+        update_counts.append(int(r.headers["X-Query-Count"]))
+
+    # QUERY_BUDGET_MODE=raise already failed any request over its budget
+    assert create_counts[0] == create_counts[1]
+    assert update_counts[0] == update_counts[1]
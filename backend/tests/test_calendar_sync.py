@@ -0,0 +1,103 @@
+"""calendar_sync against the local fake Calendar API (fake_calendar.py)."""
+from datetime import datetime, timedelta, timezone
+import pytest
+import calendar_sync
+import credential_cache
+import fake_calendar
+from models import db, CalendarEvent, IntegrationToken
+from utils import decrypt_bytes, encrypt_bytes
+
+SCOPES = "openid https://www.googleapis.com/auth/calendar.readonly"
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server, api_url, token_uri = fake_calendar.serve_in_thread()
+    monkeypatch.setenv("GOOGLE_CALENDAR_API_URL", api_url)
+    monkeypatch.setenv("GOOGLE_TOKEN_URI", token_uri)
+    monkeypatch.setenv("GOOGLE_CLIENT_ID", "cid")
+    monkeypatch.setenv("GOOGLE_CLIENT_SECRET", "secret")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def tok(user, server):
+    tok = IntegrationToken(user_id=user.id, provider="google", scopes=SCOPES,
+                           access_token_encrypted=encrypt_bytes(b"access-1"),
+                           refresh_token_encrypted=encrypt_bytes(b"refresh-1"))
+    db.session.add(tok)
+    db.session.commit()
+    yield tok
+    calendar_sync.forget(user.id)
+    credential_cache.clear()
+
+
+def _at(days: int) -> datetime:
+    return datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=days)
+
+
+def _stored(user_id: int) -> dict:
+    return {e.event_id: e for e in CalendarEvent.query.filter_by(user_id=user_id)}
+
+
+def test_full_then_incremental_sync(tok, server):
+    fake_calendar.seed(server, 3)
+    out = calendar_sync.sync(tok)
+    assert out == {"full": True, "upserted": 3, "deleted": 0}
+    assert calendar_sync.sync_state(tok.user_id, "primary").sync_token
+    stored = _stored(tok.user_id)
+    assert len(stored) == 3
+    first = next(iter(stored.values()))
+    assert first.attendees_json and first.start_at is not None
+
+    server.update_event("primary", first.event_id, summary="Renamed")
+    server.add_event("primary", summary="New", start=_at(5), end=_at(5) + timedelta(hours=1))
+    out = calendar_sync.sync(tok)
+
+    # only the two changed events came back, via the stored syncToken
+    assert out == {"full": False, "upserted": 2, "deleted": 0}
+    assert server.stats["full"] == 1 and server.stats["incremental"] == 1
+    stored = _stored(tok.user_id)
+    assert len(stored) == 4
+    assert stored[first.event_id].summary == "Renamed"
+
+
+def test_expired_sync_token_falls_back_to_full_sync(tok, server):
+    fake_calendar.seed(server, 2)
+    calendar_sync.sync(tok)
+    server.expire_sync_tokens()
+    server.add_event("primary", event_id="late", summary="Late", start=_at(3),
+                     end=_at(3) + timedelta(hours=1))
+
+    out = calendar_sync.sync(tok)
+
+    assert out["full"] is True
+    assert server.stats["gone"] == 1 and server.stats["full"] == 2
+    assert set(_stored(tok.user_id)) == {"evt1", "evt2", "late"}
+    # the new token works for the next incremental sync
+    assert calendar_sync.sync(tok)["full"] is False
+
+
+def test_cancelled_events_are_deleted(tok, server):
+    fake_calendar.seed(server, 3)
+    calendar_sync.sync(tok)
+    server.delete_event("primary", "evt2")
+
+    out = calendar_sync.sync(tok)
+
+    assert out == {"full": False, "upserted": 0, "deleted": 1}
+    assert set(_stored(tok.user_id)) == {"evt1", "evt3"}
+
+
+def test_expired_access_token_is_refreshed_and_saved(tok, server):
+    tok.access_token_encrypted = encrypt_bytes(b"expired-1")
+    db.session.commit()
+    fake_calendar.seed(server, 1)
+
+    calendar_sync.sync(tok)
+
+    assert server.stats["unauthorized"] == 1 and server.stats["refreshes"] == 1
+    saved = db.session.get(IntegrationToken, tok.id)
+    assert decrypt_bytes(saved.access_token_encrypted) == b"fake-access-1"
@@ -0,0 +1,59 @@
+"""Summarize job queue: dedupe of in-flight jobs and stale running jobs."""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import pytest
+import jobs
+import token_budget
+from models import db, Meeting, SummaryJob
+from summaries import meeting_content_hash
+
+
+@pytest.fixture
+def meeting(user, monkeypatch):
+    monkeypatch.setattr(jobs, "_submit", lambda job_id: None)
+    m = Meeting(creator_id=user.id, title="Standup", raw_notes="Shipped the release")
+    db.session.add(m)
+    db.session.commit()
+    return m
+
+
+def _running_job(m, age_seconds):
+    job = SummaryJob(meeting_id=m.id, content_hash=meeting_content_hash(m.title, m.raw_notes),
+                     status="running",
+                     started_at=datetime.utcnow() - timedelta(seconds=age_seconds))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_enqueue_returns_the_running_job(meeting):
+    job = _running_job(meeting, 10)
+
+    got = jobs.enqueue_summary(meeting, job.content_hash)
+
+    assert got.id == job.id
+
+
+def test_enqueue_fails_a_stale_running_job_and_queues_a_new_one(app, meeting):
+    job = _running_job(meeting, app.config["SUMMARY_JOB_STALE_SECONDS"] + 60)
+
+    got = jobs.enqueue_summary(meeting, job.content_hash)
+
+    assert got.id != job.id and got.status == "queued"
+    db.session.expire_all()
+    assert db.session.get(SummaryJob, job.id).status == "failed"
+
+
+def test_joining_an_in_flight_job_does_not_charge_the_llm_budget(client, openai_server,
+                                                                  monkeypatch):
+    monkeypatch.setattr(jobs, "_submit", lambda job_id: None)   # the job stays queued
+    monkeypatch.setattr(token_budget, "_users", OrderedDict())
+    monkeypatch.setenv("LLM_USER_RPM", "1")
+    mid = client.post("/meetings", json={"title": "Standup",
+                                         "raw_notes": "Shipped the release"}).json["id"]
+
+    first = client.post(f"/meetings/{mid}/summarize?mode=job")
+    again = client.post(f"/meetings/{mid}/summarize?mode=job")
+
+    assert first.status_code == again.status_code == 202, again.data
+    assert again.json["id"] == first.json["id"]
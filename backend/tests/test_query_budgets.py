@@ -0,0 +1,41 @@
+"""
+Per-endpoint SQL bounds under QUERY_BUDGET_MODE=raise: a request over its
+@query_budget fails outright, and the count must not grow with the number
+of child rows.
+"""
+
+
+def _meeting_with_items(client, n: int):
+    mid = client.post("/meetings", json={"title": "Planning",
+                                         "raw_notes": "decision: ship it\nShipped"}).json["id"]
+    r = client.post(f"/meetings/{mid}/action-items:batch",
+                    json=[{"description": f"task {i}"} for i in range(n)])
+    assert r.status_code == 201, r.data
+    assert client.post(f"/meetings/{mid}/summarize").status_code == 201
+    return mid, [res["item"]["id"] for res in r.json["results"]]
+
+
+def _count(r, status: int) -> int:
+    assert r.status_code == status, r.data
+    return int(r.headers["X-Query-Count"])
+
+
+def test_get_meeting_is_bounded_regardless_of_children(client):
+    counts = []
+    for n in (1, 60):
+        mid, _ = _meeting_with_items(client, n)
+        r = client.get(f"/meetings/{mid}")
+        assert len(r.json["action_items"]) == n
+        counts.append(_count(r, 200))
+    assert counts[0] == counts[1], counts
+
+
+def test_update_and_delete_item_are_bounded_regardless_of_siblings(client):
+    update_counts, delete_counts = [], []
+    for n in (1, 60):
+        _, ids = _meeting_with_items(client, n)
+        r = client.patch(f"/action-items/{ids[0]}", json={"status": "done"})
+        update_counts.append(_count(r, 200))
+        delete_counts.append(_count(client.delete(f"/action-items/{ids[-1]}"), 204))
+    assert update_counts[0] == update_counts[1], update_counts
+    assert delete_counts[0] == delete_counts[1], delete_counts
@@ -0,0 +1,41 @@
+"""Bulk summary writes used by the back-fill commands."""
+import json
+from sqlalchemy import event
+from models import db, Meeting, NotesSnapshot, Summary
+from summaries import save_summaries_bulk
+
+META = {"provider": "openai", "model": "m"}
+
+
+def _result(text):
+    return {"summary_bullets": [text], "decisions": [], "action_items": []}
+
+
+def test_bulk_save_writes_snapshots_in_constant_statements(user):
+    meetings = [Meeting(creator_id=user.id, title=f"M{i}", raw_notes=f"notes {i}")
+                for i in range(6)]
+    db.session.add_all(meetings)
+    db.session.flush()
+    db.session.add(NotesSnapshot(meeting_id=meetings[0].id, raw_notes="old",
+                                 result_json="{}", content_hash="old"))
+    db.session.commit()
+    rows = [(m.id, _result(m.raw_notes), META, f"h{m.id}") for m in meetings]
+    notes = {m.id: m.raw_notes for m in meetings}
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        assert save_summaries_bulk(rows, notes) == 6
+        db.session.flush()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    db.session.commit()
+
+    snapshot_sql = [s for s in statements if "notes_snapshot" in s]
+    assert len(snapshot_sql) == 3   # SELECT existing, INSERT new, UPDATE existing
+    snaps = {s.meeting_id: s for s in NotesSnapshot.query}
+    assert len(snaps) == 6 and Summary.query.count() == 6
+    first = snaps[meetings[0].id]
+    assert first.raw_notes == "notes 0" and first.content_hash == f"h{meetings[0].id}"
+    assert json.loads(first.result_json) == _result("notes 0")
@@ -0,0 +1,50 @@
+"""POST /meetings/<id>/summarize with the OpenAI provider, against fake_openai.py."""
+import json
+
+
+def _summarize(client, notes: str):
+    m = client.post("/meetings", json={"title": "Planning", "raw_notes": notes}).json
+    r = client.post(f"/meetings/{m['id']}/summarize?action_items=1")
+    assert r.status_code == 201, r.data
+    return r
+
+
+def test_chunked_summarize_runs_a_constant_number_of_statements(client, openai_server, monkeypatch):
+    monkeypatch.setenv("SUMMARY_CHUNK_THRESHOLD", "50")
+    monkeypatch.setenv("SUMMARY_CHUNK_TOKENS", "20")
+    counts = []
+    for n in (6, 30):
+        notes = "\n".join([f"topic {i} of {n} was discussed at length" for i in range(n)]
+                          + ["todo: send the notes"])
+        r = _summarize(client, notes)
+        meta = json.loads(r.json["model_metadata"])
+        assert meta["provider"] == "openai" and meta["chunks"] > 1
+        counts.append(int(r.headers["X-Query-Count"]))
+
+    # QUERY_BUDGET_MODE=raise already failed any request over its budget
+    assert counts[0] == counts[1], counts
+
+
+def test_stub_summary_is_never_the_base_for_an_llm_update(client, openai_server, monkeypatch):
+    lines = [f"Component {i} review covered latency budgets" for i in range(20)]
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    first = _summarize(client, "\n".join(lines))
+    assert json.loads(first.json["model_metadata"])["provider"] == "stub"
+    mid = first.json["meeting_id"]
+
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    lines.append("decision: ship the beta on Monday")
+    assert client.patch(f"/meetings/{mid}", json={"raw_notes": "\n".join(lines)}).status_code == 200
+    r = client.post(f"/meetings/{mid}/summarize")
+    assert r.status_code == 201, r.data
+
+    meta = json.loads(r.json["model_metadata"])
+    assert meta["provider"] == "openai" and "incremental" not in meta
+    assert lines[0] in openai_server.last_request["messages"][-1]["content"]   # full notes sent
+
+    # the openai result is now the base for the next small edit
+    lines.append("todo: send the rollout plan")
+    client.patch(f"/meetings/{mid}", json={"raw_notes": "\n".join(lines)})
+    r = client.post(f"/meetings/{mid}/summarize")
+    assert json.loads(r.json["model_metadata"])["incremental"] == {"added_spans": 1,
+                                                                    "removed_lines": 0}
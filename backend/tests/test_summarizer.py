@@ -0,0 +1,89 @@
+"""Provider retries and fallbacks in summarizer.summarize_notes."""
+import json
+import pytest
+import summarizer
+
+
+@pytest.fixture
+def openai_env(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "fake")
+    monkeypatch.setenv("OPENAI_MAX_ATTEMPTS", "3")
+    monkeypatch.setenv("OPENAI_BACKOFF_BASE", "0")
+    summarizer.summary_cache.clear_memory()
+
+
+def test_provider_busy_is_not_retried(openai_env, monkeypatch):
+    calls = []
+
+    def busy(*args):
+        calls.append(args)
+        raise summarizer.ProviderBusy("openai: no free slot after 30s")
+
+    monkeypatch.setattr(summarizer, "_call_openai_hedged", busy)
+
+    result, meta = summarizer.summarize_notes("Standup", "Shipped the release")
+
+    assert len(calls) == 1
+    assert meta["provider"] == "stub"
+    assert result["summary_bullets"] == ["Shipped the release"]
+
+
+def test_small_edit_to_a_long_summary_stays_incremental(openai_server, monkeypatch):
+    monkeypatch.setenv("OPENAI_MAX_ATTEMPTS", "1")
+    old_lines = [f"Component {i} review covered latency budgets and rollout plan {i}"
+                 for i in range(120)]
+    old_notes = "\n".join(old_lines)
+    # far more than the 400-token completion cap if it had to be re-emitted
+    previous = (old_notes, {"summary_bullets": list(old_lines), "decisions": [],
+                            "action_items": []})
+    assert summarizer.token_budget.estimate_tokens(json.dumps(previous[1])) > 4 * 400
+
+    new_lines = list(old_lines)
+    new_lines[7] = "Component seven was cancelled after the security audit"
+    new_lines.append("decision: ship the beta on Monday")
+
+    result, meta = summarizer.summarize_notes("Planning", "\n".join(new_lines), previous)
+
+    assert meta["provider"] == "openai"
+    assert meta["incremental"] == {"added_spans": 2, "removed_lines": 1}
+    assert openai_server.stats == {**openai_server.stats, "requests": 1, "truncated": 0}
+    prompt = openai_server.last_request["messages"][-1]["content"]
+    assert old_lines[0] not in prompt   # only the changed spans were sent
+    assert old_lines[7] not in result["summary_bullets"]
+    assert "Component seven was cancelled after the security audit" in result["summary_bullets"]
+    assert len(result["summary_bullets"]) == 120
+    assert result["decisions"] == ["ship the beta on Monday"]
+
+
+def test_chunks_that_succeeded_are_cached_when_another_fails(openai_env, monkeypatch):
+    monkeypatch.setenv("SUMMARY_CHUNK_TOKENS", "20")
+    calls = []
+
+    def call(title, chunk, model):
+        calls.append(chunk)
+        if "boom" in chunk:
+            raise RuntimeError("provider error")
+        return {"summary_bullets": [chunk.splitlines()[0]], "decisions": [],
+                "action_items": []}, {"usage": None}
+
+    monkeypatch.setattr(summarizer, "_call_openai_with_retries", call)
+    notes = "\n".join(f"section {i} covered the rollout plan in detail" for i in range(6))
+
+    with pytest.raises(RuntimeError):
+        summarizer._summarize_long("Planning", notes + "\nboom", "m")
+    first = len(calls)
+    calls.clear()
+    result, meta = summarizer._summarize_long("Planning", notes + "\nfixed", "m")
+
+    assert meta["chunk_cache_hits"] == meta["chunks"] - 1 == first - 1
+    assert len(calls) == 1 and "fixed" in calls[0]
+    assert result["summary_bullets"][0] == "section 0 covered the rollout plan in detail"
+
+
+def test_provider_without_summarize_fails_when_created():
+    class Incomplete(summarizer.Provider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete(max_concurrency=1, timeout=1.0)
@@ -0,0 +1,66 @@
+"""DB tier of summary_cache: isolation from the caller's session, hit flushing, trimming."""
+import pytest
+import summary_cache
+from models import db, Meeting, SummaryCacheEntry
+
+RESULT = {"summary_bullets": ["a"], "decisions": [], "action_items": []}
+META = {"provider": "openai", "model": "m"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_memory(app):
+    summary_cache.clear_memory()
+    summary_cache._pending_hits.clear()
+    yield
+    summary_cache.clear_memory()
+
+
+def _row(h: str):
+    key = summary_cache.cache_key(h, "openai", "m")
+    db.session.expire_all()
+    return SummaryCacheEntry.query.filter_by(cache_key=key).first()
+
+
+def test_cache_never_commits_or_discards_callers_work(user):
+    summary_cache.put("h1", "openai", "m", RESULT, META)
+    summary_cache.flush()
+    summary_cache.clear_memory()
+    pending = Meeting(creator_id=user.id, title="not committed")
+    db.session.add(pending)
+    db.session.flush()
+
+    assert summary_cache.get("h1", "openai", "m") == (RESULT, META)
+    summary_cache.put("h2", "openai", "m", RESULT, META)
+    assert pending in db.session   # not committed, expired or rolled back
+
+    db.session.rollback()
+    summary_cache.flush()
+    assert Meeting.query.count() == 0
+    assert _row("h2") is not None
+
+
+def test_hits_are_counted_in_memory_and_flushed_by_maintain():
+    summary_cache.put("h1", "openai", "m", RESULT, META)
+    summary_cache.flush()
+    for _ in range(2):
+        summary_cache.clear_memory()
+        summary_cache.get("h1", "openai", "m")
+    assert _row("h1").hits == 0
+
+    summary_cache.maintain()
+
+    assert _row("h1").hits == 2
+
+
+def test_maintain_keeps_the_most_recently_used_rows(monkeypatch):
+    monkeypatch.setattr(summary_cache, "DB_MAX_ROWS", 2)
+    for h in ("h1", "h2", "h3"):
+        summary_cache.put(h, "openai", "m", RESULT, META)
+        summary_cache.flush()
+    summary_cache.clear_memory()
+    summary_cache.get("h1", "openai", "m")
+
+    summary_cache.maintain()
+
+    assert _row("h1") is not None and _row("h3") is not None
+    assert _row("h2") is None
@@ -0,0 +1,28 @@
+"""Meeting/User version counters behind the list and detail ETags."""
+from sqlalchemy.orm import Session
+from models import db, Meeting, User
+
+
+def test_flush_bumps_versions_through_the_flushing_session(user):
+    uid = user.id
+    db.session.commit()
+    # a session of its own (scripts, background jobs), not db.session
+    with Session(db.engine) as other:
+        other.add(Meeting(creator_id=uid, title="Standup"))
+        other.commit()
+
+    assert not db.session.new and not db.session.dirty
+    db.session.expire_all()
+    assert db.session.get(User, uid).meetings_version == 2
+
+
+def test_editing_a_meeting_bumps_its_version(user):
+    m = Meeting(creator_id=user.id, title="Standup")
+    db.session.add(m)
+    db.session.commit()
+    before = m.version
+
+    m.title = "Retro"
+    db.session.commit()
+
+    assert m.version == before + 1
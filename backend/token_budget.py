@@ -0,0 +1,239 @@
+"""
+Token accounting and rate limiting for LLM calls.
+
+Token buckets refilled continuously over a minute:
+  - global (LLM_RPM / LLM_TPM): taken by every provider call, so bursts wait
+    here instead of turning into provider 429s
+  - per user (LLM_USER_RPM / LLM_USER_TPM): taken by the summarize routes
+A limit of 0 disables that bucket. Buckets are per process, so with several
+workers set the global limits to the provider limit divided by the worker
+count.
+
+Prompt sizes are estimated locally before a call (tiktoken when installed,
+~4 chars/token otherwise); the reservation is settled against the real usage
+afterwards. Settled calls feed a rolling in-process ledger for /usage.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to the chars/4 estimate
+    tiktoken = None
+
+MAX_COMPLETION_TOKENS = 400   # matches max_tokens on every completion call
+LEDGER_SECONDS = 3600
+MAX_TRACKED_USERS = 10000
+
+_lock = threading.Lock()
+
+
+class BudgetExceeded(Exception):
+    """A request would go over a token/request budget; retry after `retry_after` s."""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"{scope} LLM budget exceeded, retry in {retry_after:.1f}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+# ---- token estimates ----
+
+_encoders = {}
+
+
+def _encoder(model: str):
+    if tiktoken is None:
+        return None
+    if model not in _encoders:
+        try:
+            try:
+                enc = tiktoken.encoding_for_model(model)
+            except KeyError:
+                enc = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # BPE files are fetched on first use; offline boxes use the estimate
+            print("[TOKENS] tokenizer unavailable:", repr(e))
+            enc = None
+        _encoders[model] = enc
+    return _encoders[model]
+
+
+def estimate_tokens(text: str, model: str | None = None) -> int:
+    enc = _encoder(model or os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+    if enc is None:
+        # ~4 chars per token for English text
+        return (len(text or "") + 3) // 4
+    return len(enc.encode(text or "", disallowed_special=()))
+
+
+def estimate_messages(messages: list, model: str | None = None) -> int:
+    # +4 per message and +3 for the reply primer, as in OpenAI's cookbook
+    return sum(estimate_tokens(m["content"], model) + 4 for m in messages) + 3
+
+
+def max_input_tokens() -> int:
+    return int(os.getenv("LLM_MAX_INPUT_TOKENS", "200000"))
+
+
+# ---- buckets ----
+
+
+class TokenBucket:
+    """`per_minute` units, refilled continuously; capacity is one minute's worth."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, n: float, now: float) -> float:
+        """Seconds until n units are available (0 = now)."""
+        self._refill(now)
+        n = min(n, self.capacity)   # a request bigger than the bucket waits for a full one
+        return 0.0 if self.level >= n else (n - self.level) / self.rate
+
+    def take(self, n: float):
+        # may go negative for oversized requests / settled overruns; refill pays it back
+        self.level -= n
+
+
+def _limit(name: str) -> int:
+    return int(os.getenv(name, "0"))
+
+
+_global = {}
+_users = OrderedDict()   # user_id -> {"requests": bucket, "tokens": bucket}
+
+
+def _buckets(store: dict, rpm: int, tpm: int) -> dict:
+    if store.get("limits") != (rpm, tpm):
+        store.clear()
+        store["limits"] = (rpm, tpm)
+        if rpm:
+            store["requests"] = TokenBucket(rpm)
+        if tpm:
+            store["tokens"] = TokenBucket(tpm)
+    return store
+
+
+def _global_buckets() -> dict:
+    return _buckets(_global, _limit("LLM_RPM"), _limit("LLM_TPM"))
+
+
+def _user_buckets(user_id: int) -> dict:
+    store = _users.get(user_id)
+    if store is None:
+        store = _users[user_id] = {}
+        while len(_users) > MAX_TRACKED_USERS:
+            _users.popitem(last=False)
+    _users.move_to_end(user_id)
+    return _buckets(store, _limit("LLM_USER_RPM"), _limit("LLM_USER_TPM"))
+
+
+def _try_take(store: dict, tokens: int) -> float:
+    """Take one request + tokens if both fit; else return the wait in seconds."""
+    now = time.monotonic()
+    wait = 0.0
+    if "requests" in store:
+        wait = max(wait, store["requests"].wait_time(1, now))
+    if "tokens" in store:
+        wait = max(wait, store["tokens"].wait_time(tokens, now))
+    if wait == 0.0:
+        if "requests" in store:
+            store["requests"].take(1)
+        if "tokens" in store:
+            store["tokens"].take(tokens)
+    return wait
+
+
+def check_user(user_id: int, tokens: int):
+    """Charge a user's buckets for a summarize request or raise BudgetExceeded."""
+    with _lock:
+        wait = _try_take(_user_buckets(user_id), tokens)
+    if wait:
+        raise BudgetExceeded("user", wait)
+
+
+def acquire(tokens: int) -> int:
+    """
+    Reserve one request + `tokens` from the global buckets, waiting up to
+    LLM_BUDGET_MAX_WAIT seconds. Returns the reserved token count for settle().
+    """
+    deadline = time.monotonic() + float(os.getenv("LLM_BUDGET_MAX_WAIT", "10"))
+    while True:
+        with _lock:
+            wait = _try_take(_global_buckets(), tokens)
+        if not wait:
+            return tokens
+        if time.monotonic() + wait > deadline:
+            raise BudgetExceeded("global", wait)
+        time.sleep(wait)
+
+
+def settle(reserved: int, usage: dict | None):
+    """Correct the global token bucket to the real usage and log the call."""
+    usage = usage or {}
+    actual = usage.get("total_tokens")
+    with _lock:
+        bucket = _global_buckets().get("tokens")
+        if bucket is not None and actual is not None:
+            bucket.take(actual - reserved)   # negative = refund
+        _ledger.append((time.time(), usage.get("prompt_tokens") or 0,
+                        usage.get("completion_tokens") or 0, actual or 0))
+        _trim_ledger()
+
+
+# ---- rolling usage (this process) ----
+
+_ledger = deque()   # (ts, prompt_tokens, completion_tokens, total_tokens)
+
+
+def _trim_ledger():
+    cutoff = time.time() - LEDGER_SECONDS
+    while _ledger and _ledger[0][0] < cutoff:
+        _ledger.popleft()
+
+
+def process_usage(window: int) -> dict:
+    cutoff = time.time() - window
+    out = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    with _lock:
+        _trim_ledger()
+        for ts, p, c, t in _ledger:
+            if ts >= cutoff:
+                out["calls"] += 1
+                out["prompt_tokens"] += p
+                out["completion_tokens"] += c
+                out["total_tokens"] += t
+    return out
+
+
+def limits() -> dict:
+    return {"rpm": _limit("LLM_RPM"), "tpm": _limit("LLM_TPM"),
+            "user_rpm": _limit("LLM_USER_RPM"), "user_tpm": _limit("LLM_USER_TPM"),
+            "max_input_tokens": max_input_tokens()}
+
+
+def available(user_id: int | None = None) -> dict:
+    """Units left right now in this process's buckets (None = unlimited)."""
+    now = time.monotonic()
+    out = {}
+    with _lock:
+        stores = [("", _global_buckets())]
+        if user_id is not None:
+            stores.append(("user_", _user_buckets(user_id)))
+        for prefix, store in stores:
+            for kind in ("requests", "tokens"):
+                bucket = store.get(kind)
+                if bucket is not None:
+                    bucket._refill(now)
+                out[prefix + kind] = int(bucket.level) if bucket is not None else None
+    return out
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify
+from sqlalchemy import func
+from models import db, Meeting, Summary
+from auth import require_auth
+from query_budget import query_budget
+import token_budget
+
+bp_usage = Blueprint("usage", __name__, url_prefix="/usage")
+
+MAX_WINDOW = 30 * 24 * 3600
+
+
+def _summary_usage(since: datetime, uid: int | None = None) -> dict:
+    """LLM token totals of summaries created since `since` (all workers, from the DB)."""
+    q = db.session.query(
+        func.count(Summary.id),
+        func.coalesce(func.sum(Summary.prompt_tokens), 0),
+        func.coalesce(func.sum(Summary.completion_tokens), 0),
+        func.coalesce(func.sum(Summary.total_tokens), 0),
+    ).filter(Summary.created_at >= since, Summary.provider != "stub")
+    if uid is not None:
+        q = q.join(Meeting, Meeting.id == Summary.meeting_id).filter(Meeting.creator_id == uid)
+    summaries, prompt, completion, total = q.one()
+    return {"summaries": summaries, "prompt_tokens": prompt,
+            "completion_tokens": completion, "total_tokens": total}
+
+
+# ---- Rolling LLM usage (GET) ----
+@bp_usage.get("")
+@query_budget(2)
+def get_usage():
+    """
+    Token usage over the last `window` seconds (default 1h): the caller's and
+    everyone's, from stored summaries, plus this worker's live call ledger
+    and remaining rate-limit budget.
+    """
+    uid, err = require_auth()
+    if err:
+        return err
+    try:
+        window = min(MAX_WINDOW, max(1, int(request.args.get("window", 3600))))
+    except ValueError:
+        return jsonify({"error": "window must be an integer number of seconds"}), 400
+
+    since = datetime.utcnow() - timedelta(seconds=window)
+    return jsonify({
+        "window_seconds": window,
+        "user": _summary_usage(since, uid),
+        "global": _summary_usage(since),
+        "process": token_budget.process_usage(min(window, token_budget.LEDGER_SECONDS)),
+        "limits": token_budget.limits(),
+        "available": token_budget.available(uid),
+    }), 200
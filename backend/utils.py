@@ -1,8 +1,10 @@
 import hashlib
 import json
+import multiprocessing
 import os
+from datetime import datetime, timezone
 from flask import request, make_response
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 
 
 def content_hash(*parts: str) -> str:
@@ -15,36 +17,97 @@ def content_hash(*parts: str) -> str:
     return h.hexdigest()
 
 
-def json_response(payload: str, status: int = 200, etag_value: str | None = None):
+def process_context():
     """
-    Return a raw JSON payload string (already serialized) with optional ETag.
+    Start method for process pools created inside the (threaded) server:
+    forkserver where the platform has it, spawn otherwise. Plain fork copies
+    locks held by other threads at that moment into the child, where nothing
+    will ever release them.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def description_hash(text: str) -> str:
+    """
+    Hash of an action item description after normalizing case, whitespace
+    and trailing punctuation, so "Send deck." and "send  deck" collide.
+    """
+    norm = " ".join((text or "").lower().split()).rstrip(".!;, ")
+    return content_hash(norm)
+
+
+def json_response(payload: str, status: int = 200, etag_value: str | None = None,
+                  last_modified: datetime | None = None):
+    """
+    Return a raw JSON payload string (already serialized) with optional
+    validators. etag_value is the opaque tag; it is sent quoted.
     NOTE: meetings_routes passes a JSON string (via json.dumps).
     """
     resp = make_response(payload, status)
     resp.headers["Content-Type"] = "application/json"
     if etag_value:
-        resp.headers["ETag"] = etag_value
+        resp.set_etag(etag_value)
         resp.headers["Cache-Control"] = "private, max-age=60"
+    if last_modified:
+        resp.last_modified = _http_time(last_modified)
     return resp
 
 
-def check_if_none_match(etag_value: str) -> bool:
+def _http_time(dt: datetime) -> datetime:
+    # stored timestamps are naive UTC; HTTP dates have whole-second precision
+    return dt.replace(microsecond=0, tzinfo=dt.tzinfo or timezone.utc)
+
+
+def check_if_none_match(etag_value: str, last_modified: datetime | None = None) -> bool:
     """
-    Return True if the client's If-None-Match matches ETag (so I can 304).
+    Return True if the client's cached copy is current (so I can 304).
+
+    RFC 9110 13.1.2: If-None-Match is a list of entity-tags (or "*") compared
+    weakly, so W/"x" matches "x". Only when it is absent is If-Modified-Since
+    checked against last_modified (13.1.3).
     """
-    client_etag = request.headers.get("If-None-Match")
-    return client_etag == etag_value
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag_value)
+    if last_modified and request.if_modified_since:
+        return _http_time(last_modified) <= request.if_modified_since
+    return False
+
+
+def not_modified(etag_value: str, last_modified: datetime | None = None):
+    """Empty 304 carrying the same validators a 200 would have."""
+    resp = make_response("", 304)
+    resp.set_etag(etag_value)
+    if last_modified:
+        resp.last_modified = _http_time(last_modified)
+    return resp
 
 # Encrypt/Decrypt Helpers
 # Will be used for OAuth
 
 
-def _fernet():
-    key = os.getenv("FERNET_KEY")
-    if not key:
+_keyrings = {}   # raw env value -> (MultiFernet, primary Fernet)
+
+
+def _keyring():
+    """
+    Keys come from FERNET_KEYS (comma-separated, newest first) or the single
+    legacy FERNET_KEY. New ciphertext uses the first key; any listed key can
+    decrypt. Built once per distinct env value instead of on every call.
+    """
+    raw = os.getenv("FERNET_KEYS") or os.getenv("FERNET_KEY")
+    if not raw:
         # one-time: generate with Fernet.generate_key().decode() and put into .env
         raise RuntimeError("FERNET_KEY missing")
-    return Fernet(key.encode())
+    ring = _keyrings.get(raw)
+    if ring is None:
+        keys = [Fernet(k.strip().encode()) for k in raw.split(",") if k.strip()]
+        ring = _keyrings[raw] = (MultiFernet(keys), keys[0])
+    return ring
+
+
+def _fernet() -> MultiFernet:
+    return _keyring()[0]
 
 
 def encrypt_bytes(raw: bytes) -> bytes:
@@ -53,3 +116,17 @@ def encrypt_bytes(raw: bytes) -> bytes:
 
 def decrypt_bytes(tok: bytes) -> bytes:
     return _fernet().decrypt(tok)
+
+
+def needs_rotation(tok: bytes) -> bool:
+    """True if `tok` wasn't encrypted with the newest key."""
+    try:
+        _keyring()[1].decrypt(tok)
+        return False
+    except InvalidToken:
+        return True
+
+
+def rotate_bytes(tok: bytes) -> bytes:
+    """Re-encrypt `tok` under the newest key (InvalidToken if no key fits)."""
+    return _fernet().rotate(tok)
@@ -41,17 +41,33 @@ async function apiFetch(
   return { status: res.status, json, etag: res.headers.get("ETag") };
 }
 
+// Last body + ETag per GET path. /meetings and /meetings/<id> answer 304
+// while nothing changed, and the remembered body is handed back instead.
+const etagCache = new Map();
+
+async function cachedGet(path) {
+  const hit = etagCache.get(path);
+  const res = await apiFetch(path, { etag: hit?.etag });
+  if (res.status === 304 && hit) return { ...res, json: hit.json };
+  if (res.etag) etagCache.set(path, { etag: res.etag, json: res.json });
+  return res;
+}
+
 export const api = {
   // auth
   me: () => apiFetch("/auth/me"),
   login: (d) => apiFetch("/auth/login", { method: "POST", body: d }),
   signup: (d) => apiFetch("/auth/signup", { method: "POST", body: d }),
-  logout: () => apiFetch("/auth/logout", { method: "DELETE" }),
+  logout: () => {
+    etagCache.clear();
+    return apiFetch("/auth/logout", { method: "DELETE" });
+  },
 
   // meetings
-  listMeetings: () => apiFetch("/meetings"),
+  // list view only needs these columns; the server skips loading raw_notes
+  listMeetings: () => cachedGet("/meetings?fields=id,title,meeting_date"),
   createMeeting: (d) => apiFetch("/meetings", { method: "POST", body: d }),
-  getMeeting: (id) => apiFetch(`/meetings/${id}`),
+  getMeeting: (id) => cachedGet(`/meetings/${id}`),
   updateMeeting: (id, d) =>
     apiFetch(`/meetings/${id}`, { method: "PATCH", body: d }),
   deleteMeeting: (id) => apiFetch(`/meetings/${id}`, { method: "DELETE" }),
@@ -59,6 +75,25 @@ export const api = {
   // summaries
   summarize: (id) => apiFetch(`/meetings/${id}/summarize`, { method: "POST" }),
   getSummary: (id, etag) => apiFetch(`/meetings/${id}/summary`, { etag }),
+  // Server-sent events: handlers.bullet/decision/action_item fire as the model
+  // writes; resolves with the saved summary row.
+  summarizeStream: (id, handlers = {}) =>
+    new Promise((resolve, reject) => {
+      const es = new EventSource(`${BASE_URL}/meetings/${id}/summarize/stream`, {
+        withCredentials: true,
+      });
+      for (const name of ["bullet", "decision", "action_item", "reset"]) {
+        es.addEventListener(name, (e) => handlers[name]?.(JSON.parse(e.data)));
+      }
+      es.addEventListener("summary", (e) => {
+        es.close();
+        resolve(JSON.parse(e.data));
+      });
+      es.addEventListener("error", (e) => {
+        es.close();
+        reject(new Error(e.data ? JSON.parse(e.data).error : "stream failed"));
+      });
+    }),
 
   // action items
   listItems: (mid) => apiFetch(`/meetings/${mid}/action-items`),
@@ -67,6 +102,14 @@ export const api = {
   updateItem: (id, d) =>
     apiFetch(`/action-items/${id}`, { method: "PATCH", body: d }),
   deleteItem: (id) => apiFetch(`/action-items/${id}`, { method: "DELETE" }),
+  // batch: one request + one transaction for many items
+  createItems: (mid, items) =>
+    apiFetch(`/meetings/${mid}/action-items:batch`, {
+      method: "POST",
+      body: { items },
+    }),
+  updateItems: (items) =>
+    apiFetch("/action-items:batch", { method: "PATCH", body: { items } }),
 
   // google calendar
   googleStatus: () => apiFetch("/google/status"),
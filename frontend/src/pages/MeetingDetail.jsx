@@ -108,8 +108,30 @@ export default function MeetingDetail() {
 
   const summarize = async () => {
     setError("");
+    // Show bullets/decisions as they stream in, then swap in the saved row
+    const partial = { bullets: [], decisions: [] };
+    const showPartial = () =>
+      setSummary({
+        bullets_json: JSON.stringify(partial.bullets),
+        decisions_json: JSON.stringify(partial.decisions),
+        model_metadata: "{}",
+      });
     try {
-      await api.summarize(mid);
+      await api.summarizeStream(mid, {
+        bullet: (b) => {
+          partial.bullets.push(b);
+          showPartial();
+        },
+        decision: (d) => {
+          partial.decisions.push(d);
+          showPartial();
+        },
+        reset: () => {
+          partial.bullets = [];
+          partial.decisions = [];
+          showPartial();
+        },
+      });
       setSummaryEtag(null);
       await loadSummary();
       setToast({ open: true, msg: "Summary created", severity: "success" });
@@ -173,6 +173,7 @@ export default function Meetings() {
     const payload = {
       title,
       raw_notes: "",
+      external_event_id: evt.id,
       ...(evt.start ? { meeting_date: evt.start } : {}),
     };
     await api.createMeeting(payload);